@@ -5,7 +5,7 @@ Flask API for serving NASA NEX-GDDP-CMIP6 temperature projections
 and other climate data layers.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import logging
 import sys
@@ -17,6 +17,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'services'))
 from nasa_climate import NASAClimateService
 from noaa_sea_level import NOAASeaLevelService
 from urban_heat_island import UrbanHeatIslandService
+from h3_utils import ARROW_AVAILABLE, ARROW_STREAM_MIME
+from json_provider import NumpyJSONProvider, json_bytes
 
 # Configure logging
 logging.basicConfig(
@@ -27,6 +29,7 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = NumpyJSONProvider(app)
 CORS(app)
 
 # Initialize climate services
@@ -34,6 +37,31 @@ climate_service = NASAClimateService()
 sea_level_service = NOAASeaLevelService()
 heat_island_service = UrbanHeatIslandService()
 
+NDJSON_MIME = 'application/x-ndjson'
+
+
+def _response_format():
+    """
+    Output format from the Accept header: 'arrow' (when pyarrow is
+    installed), 'ndjson' for streamed features, 'geojson' otherwise
+    """
+    best = request.accept_mimetypes.best_match(['application/json', ARROW_STREAM_MIME, NDJSON_MIME])
+    if best == ARROW_STREAM_MIME and ARROW_AVAILABLE:
+        return 'arrow'
+    if best == NDJSON_MIME:
+        return 'ndjson'
+    return 'geojson'
+
+
+def _ndjson_response(features):
+    """Stream an iterator of features, one JSON document per line"""
+    def generate():
+        for feature in features:
+            yield json_bytes(feature) + b'\n'
+
+    return Response(generate(), mimetype=NDJSON_MIME)
+
+
 # Health check endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -128,14 +156,21 @@ def temperature_projection():
         }
 
         # Get temperature projection
+        output_format = _response_format()
         data = climate_service.get_temperature_projection(
             bounds=bounds,
             year=year,
             scenario=scenario,
             resolution=resolution,
-            use_simulated=not use_real_data
+            use_simulated=not use_real_data,
+            output_format=output_format
         )
 
+        if output_format == 'arrow':
+            return Response(data, mimetype=ARROW_STREAM_MIME)
+        if output_format == 'ndjson':
+            return _ndjson_response(data)
+
         return jsonify({
             'success': True,
             'data': data,
@@ -235,12 +270,19 @@ def sea_level_rise():
         }
 
         # Get sea level hexagons
+        output_format = _response_format()
         data = sea_level_service.get_sea_level_hexagons(
             bounds=bounds,
             feet=feet,
-            resolution=resolution
+            resolution=resolution,
+            output_format=output_format
         )
 
+        if output_format == 'arrow':
+            return Response(data, mimetype=ARROW_STREAM_MIME)
+        if output_format == 'ndjson':
+            return _ndjson_response(data)
+
         return jsonify({
             'success': True,
             'data': data,
@@ -331,12 +373,19 @@ def urban_heat_island():
         }
 
         # Get urban heat island data
+        output_format = _response_format()
         data = heat_island_service.get_heat_island_data(
             bounds=bounds,
             date=date,
-            resolution=resolution
+            resolution=resolution,
+            output_format=output_format
         )
 
+        if output_format == 'arrow':
+            return Response(data, mimetype=ARROW_STREAM_MIME)
+        if output_format == 'ndjson':
+            return _ndjson_response(data)
+
         return jsonify({
             'success': True,
             'data': data,
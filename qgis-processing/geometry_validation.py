@@ -0,0 +1,62 @@
+"""
+Geometry Validation
+
+Vectorized GeoJSON geometry checks used by the QGIS processing server.
+Kept free of QGIS and Flask imports so worker processes can import it
+cheaply when large validations are split across cores.
+"""
+
+import numpy as np
+
+
+def validate_geometry_chunk(features, offset=0):
+    """
+    Validate a chunk of GeoJSON features
+
+    Args:
+        features: List of GeoJSON features
+        offset: Index of the first feature in the full collection
+
+    Returns:
+        Dict with valid/missing counts and invalid geometry entries
+    """
+    n = len(features)
+    if n == 0:
+        return {'valid_geometries': 0, 'missing_coordinates': 0, 'invalid_geometries': []}
+
+    # Extract geometry types and coordinates once, then classify with masks
+    geometries = [feature.get('geometry') or {} for feature in features]
+    types = np.array([geometry.get('type') for geometry in geometries], dtype=object)
+    coords = [geometry.get('coordinates') for geometry in geometries]
+
+    has_coords = np.fromiter((bool(c) for c in coords), dtype=bool, count=n)
+    is_point = has_coords & (types == 'Point')
+    is_polygon = has_coords & (types == 'Polygon')
+
+    point_ok = np.zeros(n, dtype=bool)
+    for i in np.flatnonzero(is_point):
+        c = coords[i]
+        point_ok[i] = len(c) >= 2 and isinstance(c[0], (int, float)) and isinstance(c[1], (int, float))
+
+    # Minimum of 4 positions for a closed polygon ring
+    ring_lens = np.zeros(n, dtype=np.int64)
+    for i in np.flatnonzero(is_polygon):
+        ring_lens[i] = len(coords[i][0])
+    polygon_ok = ring_lens >= 4
+
+    invalid_point = is_point & ~point_ok
+    invalid_polygon = is_polygon & ~polygon_ok
+
+    errors = np.empty(n, dtype=object)
+    errors[~has_coords] = 'Missing coordinates'
+    errors[invalid_point] = 'Invalid point coordinates'
+    errors[invalid_polygon] = 'Invalid polygon coordinates'
+
+    return {
+        'valid_geometries': int(np.count_nonzero(has_coords & ~invalid_point & ~invalid_polygon)),
+        'missing_coordinates': int(np.count_nonzero(~has_coords)),
+        'invalid_geometries': [
+            {'feature_index': offset + int(i), 'error': errors[i]}
+            for i in np.flatnonzero(~has_coords | invalid_point | invalid_polygon)
+        ]
+    }
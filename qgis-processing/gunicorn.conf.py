@@ -0,0 +1,22 @@
+"""
+Gunicorn settings, read from the working directory (/app) by default
+
+Without REDIS_URL the servers keep pipeline jobs and analysis progress in
+process memory, where a poll reaching another worker would not find them, so
+they are run as a single worker (gevent still serves requests concurrently)
+"""
+
+import os
+
+
+def _single_worker_without_redis(server):
+    if os.environ.get('REDIS_URL') or server.cfg.workers <= 1:
+        return
+    server.log.warning("REDIS_URL is not set: job state is per process, "
+                       "running 1 worker instead of %s", server.cfg.workers)
+    server.cfg.set('workers', 1)
+    server.num_workers = 1
+
+
+on_starting = _single_worker_without_redis
+on_reload = _single_worker_without_redis
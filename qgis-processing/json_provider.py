@@ -0,0 +1,68 @@
+"""
+Shared Flask JSON provider for the QGIS/climate servers
+Encodes numpy values and uses orjson when it is installed
+"""
+
+import json
+from types import MappingProxyType
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+# Optional C JSON encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes numpy values and uses orjson when it is installed"""
+
+    @staticmethod
+    def _default(o):
+        if isinstance(o, np.generic):
+            return o.item()
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, MappingProxyType):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
+    def _orjson_option(self, indent=False):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None:
+            option = self._orjson_option(kwargs.get('indent'))
+            return orjson.dumps(obj, default=self._default, option=option).decode('utf-8')
+
+        kwargs.setdefault('default', self._default)
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        # Encode straight to the response body bytes, skipping the str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self._default, option=self._orjson_option(indent))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def json_bytes(obj):
+    """Compact UTF-8 JSON for bodies that are serialized once and reused"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=NumpyJSONProvider._default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(',', ':'), default=NumpyJSONProvider._default).encode('utf-8')
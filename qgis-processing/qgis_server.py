@@ -1,5 +1,9 @@
 import os
+import io
+import re
 import sys
+import csv
+import asyncio
 import json
 import tempfile
 import uuid
@@ -10,17 +14,38 @@ import traceback
 import threading
 import time
 import math
+import hashlib
+from collections import OrderedDict, namedtuple
+from functools import lru_cache, wraps
+from itertools import islice
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file
+from types import MappingProxyType
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
 from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
 from scipy.spatial.distance import cdist
 from scipy.stats import zscore
 from sklearn.cluster import DBSCAN
+from sklearn.neighbors import NearestNeighbors
 from sklearn.preprocessing import StandardScaler
+from shapely.geometry import Point, box
+from shapely.strtree import STRtree
+
+from geometry_validation import validate_geometry_chunk
+from json_provider import NumpyJSONProvider
+
+# joblib ships with scikit-learn; validation falls back to a single chunk without it
+try:
+    from joblib import Parallel, delayed
+except ImportError:
+    Parallel = None
+
+PARALLEL_VALIDATION_MIN_FEATURES = 50000
 
 # Initialize QGIS
 sys.path.append('/usr/share/qgis/python')
@@ -51,12 +76,124 @@ except ImportError:
     Qgis = None
 
 app = Flask(__name__)
+app.json = NumpyJSONProvider(app)
 CORS(app)
 
+# Report templates are compiled once; bytecode is cached across restarts
+JINJA_CACHE_DIR = Path('/tmp/qgis-cache/jinja')
+JINJA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+report_env = Environment(
+    loader=FileSystemLoader(str(Path(__file__).resolve().parent / 'templates')),
+    auto_reload=False,
+    autoescape=select_autoescape(['html']),
+    cache_size=50,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    bytecode_cache=FileSystemBytecodeCache(str(JINJA_CACHE_DIR))
+)
+DEFAULT_REPORT_TEMPLATE = 'report.html'
+
+@lru_cache(maxsize=256)
+def _pretty(name):
+    """Display name for a metric key, e.g. 'sprawl_index' -> 'Sprawl Index'"""
+    return name.replace('_', ' ').title()
+
+report_env.filters['pretty'] = _pretty
+_REPORT_TMPL = report_env.get_template(DEFAULT_REPORT_TEMPLATE)
+
 # Global thread pool for parallel processing
 executor = ThreadPoolExecutor(max_workers=4)
-analysis_progress = {}
-analysis_results = {}
+
+# Running + queued workflows are capped; start requests beyond this get 429
+MAX_PENDING_WORKFLOWS = 8
+workflow_slots = threading.BoundedSemaphore(MAX_PENDING_WORKFLOWS)
+
+# Separate pool for the steps inside a workflow so a running workflow
+# never waits on its own executor slot
+workflow_step_executor = ThreadPoolExecutor(max_workers=6)
+
+# Replay cache for analysis endpoints, keyed on endpoint + request payload hash
+ANALYSIS_CACHE_SIZE = 128
+_analysis_cache = OrderedDict()
+_analysis_cache_lock = threading.Lock()
+
+def _payload_key(obj):
+    """Stable digest of a JSON payload"""
+    canonical = json.dumps(obj, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+
+def cached_analysis(view):
+    """Serve repeated analysis requests with identical payloads from an LRU cache"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.path, _payload_key(request.get_json(silent=True) or {}))
+
+        with _analysis_cache_lock:
+            body = _analysis_cache.get(key)
+            if body is not None:
+                _analysis_cache.move_to_end(key)
+
+        if body is None:
+            response = view(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+            # Analyzers report failures as a results dict with an 'error' key
+            # under success: true; those are neither cached nor made cacheable
+            payload = response.get_json(silent=True) or {}
+            results = payload.get('results')
+            if not payload.get('success') or (isinstance(results, dict) and 'error' in results):
+                return response
+            body = response.get_data()
+            with _analysis_cache_lock:
+                _analysis_cache[key] = body
+                while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+                    _analysis_cache.popitem(last=False)
+
+        response = Response(body, mimetype='application/json')
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+        return response
+    return wrapper
+
+# Optional JIT compilation for the distance kernels
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+EARTH_RADIUS_M = 6371000.0
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters between two lat/lon points in degrees"""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(dlon / 2) ** 2)
+    return EARTH_RADIUS_M * 2 * math.asin(math.sqrt(min(a, 1.0)))
+
+def _haversine_matrix_m(origins, destinations):
+    """Pairwise haversine distances in meters between [lon, lat] degree arrays"""
+    origins = np.radians(origins)
+    destinations = np.radians(destinations)
+    lat1 = origins[:, 1][:, None]
+    lat2 = destinations[:, 1][None, :]
+    dlat = lat2 - lat1
+    dlon = destinations[:, 0][None, :] - origins[:, 0][:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return EARTH_RADIUS_M * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+if njit is not None:
+    _haversine_m = njit(fastmath=True, cache=True)(_haversine_m)
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _haversine_matrix_m(origins, destinations):
+        n, m = origins.shape[0], destinations.shape[0]
+        out = np.empty((n, m))
+        for i in prange(n):
+            for j in range(m):
+                out[i, j] = _haversine_m(origins[i, 1], origins[i, 0], destinations[j, 1], destinations[j, 0])
+        return out
 
 class SustainableUrbanAnalyzer:
     """Enhanced urban sustainability analysis processor with comprehensive GIS capabilities"""
@@ -86,6 +223,10 @@ class SustainableUrbanAnalyzer:
             }
         }
 
+        # Ball-tree indexes keyed by point coordinates, reused across eps values
+        self._ball_tree_cache = {}
+        self._ball_tree_lock = threading.Lock()
+
     def calculate_urban_compactness(self, parcels_data, buffer_distance=1000):
         """
         Calculate urban compactness metrics including density and sprawl indicators
@@ -586,20 +727,13 @@ class SustainableUrbanAnalyzer:
         if not coords1 or not coords2 or len(coords1) < 2 or len(coords2) < 2:
             return float('inf')
 
-        # Haversine formula approximation
-        lat1, lon1 = coords1[1], coords1[0]
-        lat2, lon2 = coords2[1], coords2[0]
-
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-
-        a = (math.sin(dlat/2) ** 2 +
-             math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
-             math.sin(dlon/2) ** 2)
-        c = 2 * math.asin(math.sqrt(a))
+        return _haversine_m(float(coords1[1]), float(coords1[0]), float(coords2[1]), float(coords2[0]))
 
-        # Earth radius in meters
-        return 6371000 * c
+    def _haversine_matrix(self, origins, destinations):
+        """Calculate pairwise haversine distances (meters) between [lon, lat] arrays"""
+        origins = np.ascontiguousarray(origins, dtype=np.float64).reshape(-1, 2)
+        destinations = np.ascontiguousarray(destinations, dtype=np.float64).reshape(-1, 2)
+        return _haversine_matrix_m(origins, destinations)
 
     def _create_sample_green_spaces(self, parcels_data):
         """Create sample green spaces for analysis"""
@@ -839,13 +973,14 @@ class SustainableUrbanAnalyzer:
 
     # Advanced Spatial Analysis Methods
 
-    def perform_buffer_analysis(self, input_data, buffer_distances=[400, 800, 1600]):
+    def perform_buffer_analysis(self, input_data, buffer_distances=[400, 800, 1600], target_data=None):
         """
         Perform multi-ring buffer analysis for accessibility studies
 
         Args:
             input_data: GeoJSON of point features (e.g., transit stations)
             buffer_distances: List of buffer distances in meters
+            target_data: Optional GeoJSON of point features to count per ring
 
         Returns:
             Dict with buffer analysis results
@@ -855,6 +990,12 @@ class SustainableUrbanAnalyzer:
             if not features:
                 return {'error': 'No input features provided'}
 
+            result = {}
+            if target_data:
+                result['ring_counts'] = self._count_points_per_ring(
+                    features, target_data.get('features', []), buffer_distances
+                )
+
             buffer_results = {}
             for distance in buffer_distances:
                 buffer_polygons = []
@@ -883,15 +1024,37 @@ class SustainableUrbanAnalyzer:
                     'features': buffer_polygons
                 }
 
-            return {
+            result.update({
                 'buffer_analysis': buffer_results,
                 'input_features_count': len(features),
                 'buffer_distances_analyzed': buffer_distances
-            }
+            })
+            return result
 
         except Exception as e:
             return {'error': str(e)}
 
+    def _count_points_per_ring(self, source_features, target_features, buffer_distances):
+        """Assign each target point to its nearest-source buffer ring in one pass"""
+        def point_coords(feats):
+            coords = [f.get('geometry', {}).get('coordinates', []) for f in feats]
+            return np.array([c[:2] for c in coords if c and len(c) >= 2], dtype=float)
+
+        origins = point_coords(source_features)
+        destinations = point_coords(target_features)
+        rings = np.sort(np.asarray(buffer_distances, dtype=float))
+
+        ring_labels = [f'within_{int(d)}m' for d in rings] + ['beyond']
+        if len(origins) == 0 or len(destinations) == 0:
+            return {label: 0 for label in ring_labels}
+
+        # Distance from each target to its nearest source, then a single ring lookup
+        dists = self._haversine_matrix(destinations, origins).min(axis=1)
+        ring_idx = np.searchsorted(rings, dists, side='left')
+        counts = np.bincount(ring_idx, minlength=len(rings) + 1)
+
+        return {label: int(count) for label, count in zip(ring_labels, counts)}
+
     def calculate_network_accessibility(self, origins_data, destinations_data, network_data=None):
         """
         Calculate network-based accessibility metrics
@@ -1007,11 +1170,14 @@ class SustainableUrbanAnalyzer:
             coords_array = np.array(coords)
             weights_array = np.array(weights)
 
-            # Use DBSCAN clustering
-            # Convert cluster_distance from meters to degrees (approximate)
-            eps_degrees = cluster_distance / 111000  # rough conversion
+            # Use DBSCAN on a haversine ball-tree neighbourhood graph
+            # eps is the great-circle angle for cluster_distance meters
+            eps_radians = cluster_distance / 6371000.0
+            coords_radians = np.radians(coords_array[:, ::-1])
+            neighbors = self._get_ball_tree(coords_radians)
+            distance_graph = neighbors.radius_neighbors_graph(coords_radians, radius=eps_radians, mode='distance')
 
-            clustering = DBSCAN(eps=eps_degrees, min_samples=3).fit(coords_array)
+            clustering = DBSCAN(eps=eps_radians, min_samples=3, metric='precomputed').fit(distance_graph)
 
             # Process clustering results
             labels = clustering.labels_
@@ -1020,30 +1186,31 @@ class SustainableUrbanAnalyzer:
             cluster_centers = []
             cluster_stats = {}
 
-            for cluster_id in set(labels):
-                if cluster_id == -1:  # Noise points
-                    continue
+            # Group members by label once and reduce each contiguous run
+            clustered = labels >= 0
+            if np.any(clustered):
+                order = np.argsort(labels[clustered], kind='stable')
+                sorted_labels = labels[clustered][order]
+                sorted_coords = coords_array[clustered][order]
+                sorted_weights = weights_array[clustered][order]
 
-                cluster_mask = labels == cluster_id
-                cluster_coords = coords_array[cluster_mask]
-                cluster_weights = weights_array[cluster_mask]
-
-                # Calculate weighted centroid
-                if len(cluster_coords) > 0:
-                    centroid_lon = np.average(cluster_coords[:, 0], weights=cluster_weights)
-                    centroid_lat = np.average(cluster_coords[:, 1], weights=cluster_weights)
+                cluster_ids, starts, counts = np.unique(sorted_labels, return_index=True, return_counts=True)
+                weight_sums = np.add.reduceat(sorted_weights, starts)
+                weighted_coord_sums = np.add.reduceat(sorted_coords * sorted_weights[:, None], starts, axis=0)
+                centroids = weighted_coord_sums / weight_sums[:, None]
 
+                for cluster_id, count, total_weight, centroid in zip(cluster_ids, counts, weight_sums, centroids):
                     cluster_centers.append({
                         'cluster_id': int(cluster_id),
-                        'centroid': [centroid_lon, centroid_lat],
-                        'member_count': int(np.sum(cluster_mask)),
-                        'total_weight': float(np.sum(cluster_weights)),
-                        'avg_weight': float(np.mean(cluster_weights))
+                        'centroid': [float(centroid[0]), float(centroid[1])],
+                        'member_count': int(count),
+                        'total_weight': float(total_weight),
+                        'avg_weight': float(total_weight / count)
                     })
 
                     cluster_stats[f'cluster_{cluster_id}'] = {
-                        'size': int(np.sum(cluster_mask)),
-                        'density': float(np.sum(cluster_weights) / np.sum(cluster_mask))
+                        'size': int(count),
+                        'density': float(total_weight / count)
                     }
 
             # Identify outliers (noise points)
@@ -1053,7 +1220,7 @@ class SustainableUrbanAnalyzer:
                 'clusters_found': n_clusters,
                 'cluster_centers': cluster_centers,
                 'cluster_statistics': cluster_stats,
-                'outlier_points': outlier_count,
+                'outlier_points': int(outlier_count),
                 'total_points_analyzed': len(coords),
                 'clustering_parameters': {
                     'distance_threshold_m': cluster_distance,
@@ -1064,6 +1231,22 @@ class SustainableUrbanAnalyzer:
         except Exception as e:
             return {'error': str(e)}
 
+    def _get_ball_tree(self, coords_radians):
+        """Return a haversine ball-tree index for [lat, lon] radians, reusing cached indexes"""
+        cache_key = coords_radians.tobytes()
+        with self._ball_tree_lock:
+            neighbors = self._ball_tree_cache.get(cache_key)
+        if neighbors is not None:
+            return neighbors
+
+        # Fit outside the lock; a concurrent duplicate fit is harmless
+        neighbors = NearestNeighbors(algorithm='ball_tree', metric='haversine').fit(coords_radians)
+        with self._ball_tree_lock:
+            if cache_key not in self._ball_tree_cache and len(self._ball_tree_cache) >= 8:
+                self._ball_tree_cache.pop(next(iter(self._ball_tree_cache)))
+            self._ball_tree_cache[cache_key] = neighbors
+        return neighbors
+
     def analyze_viewshed(self, observer_point, terrain_data=None, view_distance=2000):
         """
         Simplified viewshed analysis for urban planning applications
@@ -1189,50 +1372,64 @@ class SustainableUrbanAnalyzer:
                     ]
                 }
 
+            # Precompute (zoning, zoning) -> level lookup in both directions;
+            # earlier levels take precedence as with the ordered rule scan
+            conflict_lookup = {}
+            for level, rules in conflict_rules.items():
+                for rule in rules:
+                    zone_a, zone_b = tuple(rule)
+                    conflict_lookup.setdefault((zone_a, zone_b), level)
+                    conflict_lookup.setdefault((zone_b, zone_a), level)
+            rule_zonings = {zone for pair in conflict_lookup for zone in pair}
+
+            # Index parcel points once so each parcel only checks nearby candidates
+            max_distance_m = 200
+            parcel_points = []
+            point_index = []
+            for i, parcel in enumerate(features):
+                coords = parcel.get('geometry', {}).get('coordinates', [])
+                if coords and len(coords) >= 2:
+                    parcel_points.append(Point(coords[0], coords[1]))
+                    point_index.append(i)
+
+            tree = STRtree(parcel_points) if parcel_points else None
             conflicts_found = []
 
             # Check each parcel against nearby parcels
-            for i, parcel1 in enumerate(features):
-                coords1 = parcel1.get('geometry', {}).get('coordinates', [])
+            for k, i in enumerate(point_index):
+                parcel1 = features[i]
                 zoning1 = parcel1.get('properties', {}).get('zoning', '')
-
-                if not coords1 or len(coords1) < 2:
+                if zoning1 not in rule_zonings:
                     continue
 
-                for j, parcel2 in enumerate(features[i+1:], i+1):
-                    coords2 = parcel2.get('geometry', {}).get('coordinates', [])
+                coords1 = parcel1['geometry']['coordinates']
+                search_box = self._search_box(coords1, max_distance_m)
+
+                for m in sorted(int(c) for c in tree.query(search_box) if c > k):
+                    parcel2 = features[point_index[m]]
                     zoning2 = parcel2.get('properties', {}).get('zoning', '')
 
-                    if not coords2 or len(coords2) < 2:
+                    conflict_level = conflict_lookup.get((zoning1, zoning2))
+                    if not conflict_level:
                         continue
 
+                    coords2 = parcel2['geometry']['coordinates']
                     distance = self._calculate_distance(coords1, coords2)
 
                     # Only check conflicts for adjacent parcels (within 200m)
-                    if distance > 200:
+                    if distance > max_distance_m:
                         continue
 
-                    # Check for conflicts
-                    conflict_level = None
-                    conflict_pair = (zoning1, zoning2)
-                    conflict_pair_reverse = (zoning2, zoning1)
-
-                    for level, rules in conflict_rules.items():
-                        if conflict_pair in rules or conflict_pair_reverse in rules:
-                            conflict_level = level
-                            break
-
-                    if conflict_level:
-                        conflicts_found.append({
-                            'parcel1_id': parcel1.get('properties', {}).get('gpin', 'unknown'),
-                            'parcel2_id': parcel2.get('properties', {}).get('gpin', 'unknown'),
-                            'parcel1_zoning': zoning1,
-                            'parcel2_zoning': zoning2,
-                            'conflict_level': conflict_level,
-                            'distance_m': round(distance, 2),
-                            'parcel1_coords': coords1,
-                            'parcel2_coords': coords2
-                        })
+                    conflicts_found.append({
+                        'parcel1_id': parcel1.get('properties', {}).get('gpin', 'unknown'),
+                        'parcel2_id': parcel2.get('properties', {}).get('gpin', 'unknown'),
+                        'parcel1_zoning': zoning1,
+                        'parcel2_zoning': zoning2,
+                        'conflict_level': conflict_level,
+                        'distance_m': round(distance, 2),
+                        'parcel1_coords': coords1,
+                        'parcel2_coords': coords2
+                    })
 
             # Summarize conflicts by level
             conflict_summary = {
@@ -1279,6 +1476,15 @@ class SustainableUrbanAnalyzer:
                     'community_facilities': 0.2
                 }
 
+            # Index point criteria layers once; each site only scores the
+            # features inside its search radius bounding box
+            transit_stations = criteria_layers.get('transit_stations', [])
+            parcels = criteria_layers.get('parcels', [])
+            facilities = criteria_layers.get('facilities', [])
+            transit_index = self._build_point_index(transit_stations)
+            parcels_index = self._build_point_index(parcels)
+            facilities_index = self._build_point_index(facilities)
+
             site_scores = []
 
             for site in sites:
@@ -1293,12 +1499,12 @@ class SustainableUrbanAnalyzer:
 
                 # Transit accessibility score
                 criteria_scores['transit_access'] = self._calculate_transit_accessibility_score(
-                    site_coords, criteria_layers.get('transit_stations', [])
+                    site_coords, transit_stations, self._features_near(transit_index, site_coords, 1600)
                 )
 
                 # Existing development density score (higher density = higher score)
                 criteria_scores['existing_development'] = self._calculate_development_density_score(
-                    site_coords, criteria_layers.get('parcels', [])
+                    site_coords, parcels, self._features_near(parcels_index, site_coords, 500)
                 )
 
                 # Environmental constraints score (fewer constraints = higher score)
@@ -1313,7 +1519,7 @@ class SustainableUrbanAnalyzer:
 
                 # Community facilities accessibility
                 criteria_scores['community_facilities'] = self._calculate_facilities_score(
-                    site_coords, criteria_layers.get('facilities', [])
+                    site_coords, facilities, self._features_near(facilities_index, site_coords, 800)
                 )
 
                 # Calculate weighted composite score
@@ -1345,7 +1551,7 @@ class SustainableUrbanAnalyzer:
                 'summary': {
                     'total_sites_evaluated': len(site_scores),
                     'highest_scoring_site': site_scores[0] if site_scores else None,
-                    'mean_composite_score': round(np.mean([s['composite_score'] for s in site_scores]), 2) if site_scores else 0
+                    'mean_composite_score': round(sum(s['composite_score'] for s in site_scores) / len(site_scores), 2) if site_scores else 0
                 }
             }
 
@@ -1369,13 +1575,37 @@ class SustainableUrbanAnalyzer:
         points.append(points[0])
         return points
 
-    def _calculate_transit_accessibility_score(self, site_coords, transit_stations):
+    def _build_point_index(self, features):
+        """Build an STRtree over point features for bounding-box prefiltering"""
+        indexed = [
+            f for f in features
+            if len(f.get('geometry', {}).get('coordinates', []) or []) >= 2
+        ]
+        if not indexed:
+            return None, []
+        points = [Point(f['geometry']['coordinates'][0], f['geometry']['coordinates'][1]) for f in indexed]
+        return STRtree(points), indexed
+
+    def _search_box(self, coords, radius_m):
+        """Lon/lat bounding box enclosing a radius around a [lon, lat] point"""
+        dlat = radius_m / 111000
+        dlon = dlat / max(math.cos(math.radians(coords[1])), 1e-6)
+        return box(coords[0] - dlon, coords[1] - dlat, coords[0] + dlon, coords[1] + dlat)
+
+    def _features_near(self, index, coords, radius_m):
+        """Indexed features whose points fall inside the search box of coords"""
+        tree, indexed = index
+        if tree is None:
+            return []
+        return [indexed[int(i)] for i in sorted(tree.query(self._search_box(coords, radius_m)))]
+
+    def _calculate_transit_accessibility_score(self, site_coords, transit_stations, nearby=None):
         """Calculate transit accessibility score for a site"""
         if not transit_stations:
             return 30  # Default score if no transit data
 
         min_distance = float('inf')
-        for station in transit_stations:
+        for station in (transit_stations if nearby is None else nearby):
             station_coords = station.get('geometry', {}).get('coordinates', [])
             if station_coords and len(station_coords) >= 2:
                 distance = self._calculate_distance(site_coords, station_coords)
@@ -1391,7 +1621,7 @@ class SustainableUrbanAnalyzer:
         else:
             return 20
 
-    def _calculate_development_density_score(self, site_coords, parcels):
+    def _calculate_development_density_score(self, site_coords, parcels, nearby=None):
         """Calculate existing development density score"""
         if not parcels:
             return 50
@@ -1400,7 +1630,7 @@ class SustainableUrbanAnalyzer:
         developed_count = 0
         total_count = 0
 
-        for parcel in parcels:
+        for parcel in (parcels if nearby is None else nearby):
             parcel_coords = parcel.get('geometry', {}).get('coordinates', [])
             if not parcel_coords or len(parcel_coords) < 2:
                 continue
@@ -1452,13 +1682,13 @@ class SustainableUrbanAnalyzer:
 
         return infrastructure_scores.get(zoning, 50)
 
-    def _calculate_facilities_score(self, site_coords, facilities):
+    def _calculate_facilities_score(self, site_coords, facilities, nearby=None):
         """Calculate community facilities accessibility score"""
         if not facilities:
             return 40  # Default score
 
         accessible_facilities = 0
-        for facility in facilities:
+        for facility in (facilities if nearby is None else nearby):
             facility_coords = facility.get('geometry', {}).get('coordinates', [])
             if facility_coords and len(facility_coords) >= 2:
                 distance = self._calculate_distance(site_coords, facility_coords)
@@ -1468,6 +1698,55 @@ class SustainableUrbanAnalyzer:
         # Score based on number of accessible facilities
         return min(100, accessible_facilities * 20)
 
+# Zoning -> property class, built once at import. Zonings are also encoded
+# as small integer codes so sample data can gather classes from an array.
+_ZONING_MAP = {
+    "R-1": "Single Family",
+    "R-A": "Large Lot Residential",
+    "R-2": "Two Family",
+    "R-3": "Multi Family",
+    "C": "Commercial",
+    "M": "Manufacturing"
+}
+_ZONING_CODES = {zone: code for code, zone in enumerate(_ZONING_MAP)}
+_ZONING_NAMES = np.array(list(_ZONING_MAP), dtype=object)
+_PROP_CLASS_ARR = np.array(list(_ZONING_MAP.values()), dtype=object)
+
+def _build_zoning_grid(zone):
+    """5x5 zoning-code grid for a sample location: commercial core, R-A edges around R-1"""
+    rows, cols = np.mgrid[0:5, 0:5]
+    grid = np.full((5, 5), _ZONING_CODES[zone], dtype=np.int8)
+    if zone == "R-1":
+        grid[(rows >= 3) | (cols >= 3)] = _ZONING_CODES["R-A"]
+    grid[(rows <= 1) & (cols <= 1) & ((rows * 5 + cols) % 8 == 0)] = _ZONING_CODES["C"]
+    return grid
+
+_ZONING_TABLE = {zone: _build_zoning_grid(zone) for zone in _ZONING_MAP}
+
+# Column-oriented view of point features for vectorized analysis
+FeatureArrays = namedtuple('FeatureArrays', ['coords', 'ids', 'zonings', 'market_values'])
+
+def build_feature_arrays(features):
+    """Extract read-only coordinate and attribute arrays from point features"""
+    coords = np.full((len(features), 2), np.nan)
+    ids = np.empty(len(features), dtype=object)
+    zonings = np.empty(len(features), dtype=object)
+    market_values = np.zeros(len(features))
+
+    for i, feature in enumerate(features):
+        point = feature.get('geometry', {}).get('coordinates', [])
+        if point and len(point) >= 2:
+            coords[i] = point[:2]
+        props = feature.get('properties', {})
+        ids[i] = props.get('gpin') or props.get('name')
+        zonings[i] = props.get('zoning', '')
+        market_values[i] = props.get('market_value', 0)
+
+    arrays = FeatureArrays(coords, ids, zonings, market_values)
+    for array in arrays:
+        array.setflags(write=False)
+    return arrays
+
 class NassauCountyDataProcessor(SustainableUrbanAnalyzer):
     def __init__(self):
         super().__init__()
@@ -1477,6 +1756,9 @@ class NassauCountyDataProcessor(SustainableUrbanAnalyzer):
             'min_lon': -73.80, 'max_lon': -73.40
         }
     
+    # The sample loaders return fixed reference data, so each is built once
+    # per process; callers share the result and must not mutate it
+    @lru_cache(maxsize=1)
     def create_sample_nassau_data(self):
         """Create realistic sample data for Nassau County with better distribution"""
         sample_data = {
@@ -1502,18 +1784,15 @@ class NassauCountyDataProcessor(SustainableUrbanAnalyzer):
         zoning_types = ["R-1", "R-A", "R-2", "R-3", "C", "M"]
         
         for i, loc in enumerate(locations):
+            # Zoning varies with distance from center (precomputed per zone)
+            zoning_grid = _ZONING_TABLE[loc["zone"]]
+
             # Create 5x5 grid of parcels around each location
             for row in range(5):
                 for col in range(5):
                     parcel_index = row * 5 + col
-                    
-                    # Vary zoning based on distance from center
-                    if row <= 1 and col <= 1:  # Center parcels
-                        zoning = "C" if parcel_index % 8 == 0 else loc["zone"]
-                    elif row >= 3 or col >= 3:  # Edge parcels
-                        zoning = "R-A" if loc["zone"] == "R-1" else loc["zone"]
-                    else:
-                        zoning = loc["zone"]
+                    zone_code = zoning_grid[row, col]
+                    zoning = _ZONING_NAMES[zone_code]
                     
                 sample_data["features"].append({
                     "type": "Feature",
@@ -1522,7 +1801,7 @@ class NassauCountyDataProcessor(SustainableUrbanAnalyzer):
                             "zoning": zoning,
                             "acreage": round(0.15 + (parcel_index * 0.03), 2),
                             "market_value": 350000 + (parcel_index * 35000) + (i * 50000),
-                            "property_class": self.get_property_class(zoning),
+                            "property_class": _PROP_CLASS_ARR[zone_code],
                         "town": loc["name"]
                     },
                     "geometry": {
@@ -1538,16 +1817,9 @@ class NassauCountyDataProcessor(SustainableUrbanAnalyzer):
     
     def get_property_class(self, zoning):
         """Get property class based on zoning"""
-        zoning_map = {
-            "R-1": "Single Family",
-            "R-A": "Large Lot Residential", 
-            "R-2": "Two Family",
-            "R-3": "Multi Family",
-            "C": "Commercial",
-            "M": "Manufacturing"
-        }
-        return zoning_map.get(zoning, "Residential")
+        return _ZONING_MAP.get(zoning, "Residential")
     
+    @lru_cache(maxsize=1)
     def get_lirr_stations(self):
         """Get LIRR station locations in Nassau County"""
         stations = [
@@ -1579,6 +1851,7 @@ class NassauCountyDataProcessor(SustainableUrbanAnalyzer):
             ]
         }
     
+    @lru_cache(maxsize=1)
     def get_flood_zones_nassau(self):
         """Get flood zones for Nassau County - larger, more visible polygons"""
         flood_zones = [
@@ -1643,44 +1916,32 @@ class NassauCountyDataProcessor(SustainableUrbanAnalyzer):
             ]
         }
     
+    @lru_cache(maxsize=1)
+    def get_parcel_arrays(self):
+        """Column arrays for the cached sample parcels"""
+        return build_feature_arrays(self.create_sample_nassau_data()['features'])
+
+    @lru_cache(maxsize=1)
+    def get_station_arrays(self):
+        """Column arrays for the cached LIRR stations"""
+        return build_feature_arrays(self.get_lirr_stations()['features'])
+
     def analyze_housing_near_transit(self, buffer_miles=0.5):
         """Analyze housing opportunities near LIRR stations"""
         try:
-            parcels = self.create_sample_nassau_data()
-            stations = self.get_lirr_stations()
+            parcels = self.get_parcel_arrays()
+            stations = self.get_station_arrays()
             
             # Convert miles to degrees (rough approximation)
             buffer_deg = buffer_miles / 69.0
             
-            transit_adjacent_parcels = []
-            single_family_count = 0
-            multi_family_potential = 0
-            
-            for parcel in parcels.get('features', []):
-                parcel_coords = parcel['geometry']['coordinates']
-                parcel_props = parcel['properties']
-                
-                # Check if parcel is near any station
-                near_station = False
-                for station in stations.get('features', []):
-                    station_coords = station['geometry']['coordinates']
-                    distance = ((parcel_coords[0] - station_coords[0])**2 + 
-                              (parcel_coords[1] - station_coords[1])**2)**0.5
-                    
-                    if distance <= buffer_deg:
-                        near_station = True
-                        break
-                
-                if near_station:
-                    transit_adjacent_parcels.append(parcel)
-                    
-                    # Check zoning for multi-family potential
-                    zoning = parcel_props.get('zoning', '')
-                    if zoning in ['R-1', 'R-A']:  # Single family zones
-                        single_family_count += 1
-                        # Conservative estimate: 25% could be rezoned
-                        if single_family_count % 4 == 0:
-                            multi_family_potential += 1
+            # Parcel x station planar distances in degrees
+            offsets = parcels.coords[:, None, :] - stations.coords[None, :, :]
+            near_station = (np.sqrt((offsets ** 2).sum(axis=2)) <= buffer_deg).any(axis=1)
+
+            # Single family zones; conservative estimate that 25% could be rezoned
+            single_family_count = int(np.count_nonzero(near_station & np.isin(parcels.zonings, ['R-1', 'R-A'])))
+            multi_family_potential = single_family_count // 4
             
             recommendations = []
             if single_family_count > 10:
@@ -1697,8 +1958,8 @@ class NassauCountyDataProcessor(SustainableUrbanAnalyzer):
                 )
             
             return {
-                "stations_analyzed": len(stations.get('features', [])),
-                "parcels_near_transit": len(transit_adjacent_parcels),
+                "stations_analyzed": len(stations.coords),
+                "parcels_near_transit": int(np.count_nonzero(near_station)),
                 "current_single_family": single_family_count,
                 "multi_family_potential": multi_family_potential,
                 "buffer_miles": buffer_miles,
@@ -1711,30 +1972,20 @@ class NassauCountyDataProcessor(SustainableUrbanAnalyzer):
     def analyze_flood_vulnerability(self):
         """Analyze properties in flood zones"""
         try:
-            parcels = self.create_sample_nassau_data()
-            flood_zones = self.get_flood_zones_nassau()
+            parcels = self.get_parcel_arrays()
+            lat = parcels.coords[:, 1]
             
-            vulnerable_properties = 0
-            total_value_at_risk = 0
-            properties_by_zone = {"AE": 0, "VE": 0, "X": 0}
+            # Determine flood zone based on latitude (simplified)
+            in_ve = lat < 0.58
+            in_ae = ~in_ve & (lat < 0.67)  # Less risk than VE
             
-            # Simple spatial analysis based on coordinates
-            for parcel in parcels.get('features', []):
-                parcel_coords = parcel['geometry']['coordinates']
-                parcel_props = parcel['properties']
-                lat = parcel_coords[1]
-                
-                # Determine flood zone based on latitude (simplified)
-                if lat < 0.58:  # VE zone
-                    vulnerable_properties += 1
-                    total_value_at_risk += parcel_props.get('market_value', 0)
-                    properties_by_zone["VE"] += 1
-                elif lat < 0.67:  # AE zone  
-                    vulnerable_properties += 1
-                    total_value_at_risk += parcel_props.get('market_value', 0) * 0.7  # Less risk
-                    properties_by_zone["AE"] += 1
-                else:  # X zone (minimal risk)
-                    properties_by_zone["X"] += 1
+            properties_by_zone = {
+                "AE": int(np.count_nonzero(in_ae)),
+                "VE": int(np.count_nonzero(in_ve)),
+                "X": int(len(lat) - np.count_nonzero(in_ve | in_ae))
+            }
+            vulnerable_properties = properties_by_zone["VE"] + properties_by_zone["AE"]
+            total_value_at_risk = parcels.market_values[in_ve].sum() + parcels.market_values[in_ae].sum() * 0.7
             
             recommendations = []
             if properties_by_zone["VE"] > 0:
@@ -1765,6 +2016,11 @@ class NassauCountyDataProcessor(SustainableUrbanAnalyzer):
 processor = NassauCountyDataProcessor()
 sustainability_analyzer = SustainableUrbanAnalyzer()
 
+# Build the cached reference datasets and their column arrays up front
+processor.get_parcel_arrays()
+processor.get_station_arrays()
+processor.get_flood_zones_nassau()
+
 @app.route('/health', methods=['GET'])
 def health_check():
     try:
@@ -1894,9 +2150,9 @@ def upload_shapefile():
             'LAYER_OPTIONS': ''
         })
         
-        # Read the GeoJSON
-        with open(geojson_path, 'r') as f:
-            geojson_data = json.load(f)
+        # Read the GeoJSON as raw bytes; it is passed through without re-parsing
+        with open(geojson_path, 'rb') as f:
+            geojson_bytes = f.read()
         
         # Clean up temp files
         shutil.rmtree(temp_extract_dir)
@@ -1912,11 +2168,16 @@ def upload_shapefile():
         if QgsWkbTypes:
             layer_info['geometry_type'] = QgsWkbTypes.displayString(layer.wkbType())
         
-        return jsonify({
-            'success': True,
-            'layer_info': layer_info,
-            'geojson': geojson_data
-        })
+        # Splice the converted file into the response body instead of
+        # materializing and re-serializing every feature
+        body = b''.join([
+            b'{"success": true, "layer_info": ',
+            app.json.dumps(layer_info).encode('utf-8'),
+            b', "geojson": ',
+            geojson_bytes,
+            b'}'
+        ])
+        return Response(body, mimetype='application/json')
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -1969,6 +2230,7 @@ def get_real_nassau_zoning():
 # ===== ENHANCED SUSTAINABILITY ANALYSIS ENDPOINTS =====
 
 @app.route('/api/sustainability/urban-compactness', methods=['POST'])
+@cached_analysis
 def analyze_urban_compactness():
     """Calculate urban compactness and sprawl metrics"""
     try:
@@ -1993,6 +2255,7 @@ def analyze_urban_compactness():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/sustainability/green-infrastructure', methods=['POST'])
+@cached_analysis
 def analyze_green_infrastructure():
     """Assess green infrastructure and parks accessibility"""
     try:
@@ -2015,6 +2278,7 @@ def analyze_green_infrastructure():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/sustainability/transportation-accessibility', methods=['POST'])
+@cached_analysis
 def analyze_transportation_accessibility():
     """Score transportation accessibility including walkability and transit access"""
     try:
@@ -2042,6 +2306,7 @@ def analyze_transportation_accessibility():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/sustainability/environmental-justice', methods=['POST'])
+@cached_analysis
 def analyze_environmental_justice():
     """Analyze environmental justice indicators and equity metrics"""
     try:
@@ -2066,6 +2331,7 @@ def analyze_environmental_justice():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/sustainability/climate-resilience', methods=['POST'])
+@cached_analysis
 def analyze_climate_resilience():
     """Calculate climate resilience indicators including heat islands and flood risk"""
     try:
@@ -2094,6 +2360,7 @@ def analyze_climate_resilience():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/sustainability/energy-efficiency', methods=['POST'])
+@cached_analysis
 def analyze_energy_efficiency():
     """Calculate energy efficiency metrics including building orientation and solar potential"""
     try:
@@ -2120,18 +2387,20 @@ def analyze_energy_efficiency():
 # ===== ADVANCED SPATIAL ANALYSIS ENDPOINTS =====
 
 @app.route('/api/spatial/buffer-analysis', methods=['POST'])
+@cached_analysis
 def perform_buffer_analysis():
     """Perform multi-ring buffer analysis for accessibility studies"""
     try:
         data = request.json or {}
         input_data = data.get('input_data')
         buffer_distances = data.get('buffer_distances', [400, 800, 1600])
+        target_data = data.get('target_data')
 
         if not input_data:
             # Use transit stations as default
             input_data = processor.get_lirr_stations()
 
-        analysis = sustainability_analyzer.perform_buffer_analysis(input_data, buffer_distances)
+        analysis = sustainability_analyzer.perform_buffer_analysis(input_data, buffer_distances, target_data)
 
         return jsonify({
             'success': True,
@@ -2275,31 +2544,273 @@ def optimal_site_selection():
 
 # ===== MULTI-STEP PROCESSING WORKFLOWS =====
 
-def run_workflow_async(workflow_id, workflow_config):
+def stream_json_response(envelope, stream_key, payload):
+    """Stream a JSON object of envelope fields plus a large payload, one top-level payload key at a time"""
+    def generate():
+        yield app.json.dumps(envelope)[:-1] + f', {json.dumps(stream_key)}: '
+        if isinstance(payload, dict):
+            yield '{'
+            for i, (key, value) in enumerate(payload.items()):
+                yield (', ' if i else '') + json.dumps(str(key)) + ': ' + app.json.dumps(value)
+            yield '}'
+        else:
+            yield app.json.dumps(payload)
+        yield '}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+# Workflow state expires so abandoned workflows do not accumulate
+WORKFLOW_PROGRESS_TTL = 3600
+WORKFLOW_RESULTS_TTL = 86400
+WORKFLOW_STREAM_KEEPALIVE = 15
+WORKFLOW_TERMINAL_STATUSES = ('completed', 'failed')
+
+class MemoryWorkflowStore:
+    """In-process workflow progress/results store with per-entry expiry"""
+
+    def __init__(self):
+        self._progress = {}
+        self._results = {}
+        self._by_hash = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def _get(self, table, workflow_id):
+        entry = table.get(workflow_id)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            table.pop(workflow_id, None)
+            return None
+        return entry[1]
+
+    def _prune(self):
+        now = time.time()
+        for table in (self._progress, self._results, self._by_hash):
+            for workflow_id in [k for k, (expires, _) in table.items() if expires < now]:
+                del table[workflow_id]
+
+    def set_progress(self, workflow_id, progress):
+        with self._lock:
+            self._prune()
+            self._progress[workflow_id] = (time.time() + WORKFLOW_PROGRESS_TTL, dict(progress))
+            self._changed.notify_all()
+
+    def step_completed(self, workflow_id, progress_pct):
+        with self._lock:
+            progress = self._get(self._progress, workflow_id)
+            if progress is not None:
+                progress['steps_completed'] += 1
+                progress['progress'] = progress_pct
+                self._changed.notify_all()
+
+    def get_progress(self, workflow_id):
+        with self._lock:
+            progress = self._get(self._progress, workflow_id)
+            return dict(progress) if progress is not None else None
+
+    def iter_progress(self, workflow_id):
+        """Yield progress snapshots as they change (None for keepalives) until the workflow finishes"""
+        last = None
+        while True:
+            with self._changed:
+                progress = self._get(self._progress, workflow_id)
+                if progress is not None and progress == last:
+                    self._changed.wait(WORKFLOW_STREAM_KEEPALIVE)
+                    progress = self._get(self._progress, workflow_id)
+                snapshot = dict(progress) if progress is not None else None
+
+            if snapshot is None:
+                return
+            yield snapshot if snapshot != last else None
+            if snapshot.get('status') in WORKFLOW_TERMINAL_STATUSES:
+                return
+            last = snapshot
+
+    def set_result(self, workflow_id, result):
+        with self._lock:
+            self._results[workflow_id] = (time.time() + WORKFLOW_RESULTS_TTL, result)
+
+    def get_result(self, workflow_id):
+        with self._lock:
+            return self._get(self._results, workflow_id)
+
+    def set_workflow_for_hash(self, input_hash, workflow_id):
+        with self._lock:
+            self._by_hash[input_hash] = (time.time() + WORKFLOW_RESULTS_TTL, workflow_id)
+
+    def get_workflow_for_hash(self, input_hash):
+        with self._lock:
+            return self._get(self._by_hash, input_hash)
+
+    def clear_workflow_for_hash(self, input_hash):
+        with self._lock:
+            self._by_hash.pop(input_hash, None)
+
+class RedisWorkflowStore:
+    """Redis-backed workflow store shared across server workers"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def set_progress(self, workflow_id, progress):
+        key = f'wf:prog:{workflow_id}'
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping={field: json.dumps(value) for field, value in progress.items()})
+        pipe.expire(key, WORKFLOW_PROGRESS_TTL)
+        pipe.execute()
+        self._publish(workflow_id)
+
+    def step_completed(self, workflow_id, progress_pct):
+        key = f'wf:prog:{workflow_id}'
+        pipe = self.client.pipeline()
+        pipe.hincrby(key, 'steps_completed', 1)
+        pipe.hset(key, 'progress', json.dumps(progress_pct))
+        pipe.expire(key, WORKFLOW_PROGRESS_TTL)
+        pipe.execute()
+        self._publish(workflow_id)
+
+    def _publish(self, workflow_id):
+        progress = self.get_progress(workflow_id)
+        if progress is not None:
+            self.client.publish(f'wf:{workflow_id}', json.dumps(progress))
+
+    def get_progress(self, workflow_id):
+        progress = self.client.hgetall(f'wf:prog:{workflow_id}')
+        if not progress:
+            return None
+        return {field.decode(): json.loads(value) for field, value in progress.items()}
+
+    def iter_progress(self, workflow_id):
+        """Yield progress published on the workflow channel (None for keepalives) until it finishes"""
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(f'wf:{workflow_id}')
+        try:
+            # Subscribe before reading current state so no update is missed
+            progress = self.get_progress(workflow_id)
+            if progress is None:
+                return
+            yield progress
+            while progress.get('status') not in WORKFLOW_TERMINAL_STATUSES:
+                message = pubsub.get_message(timeout=WORKFLOW_STREAM_KEEPALIVE)
+                if message is None:
+                    yield None
+                    continue
+                progress = json.loads(message['data'])
+                yield progress
+        finally:
+            pubsub.close()
+
+    def set_result(self, workflow_id, result):
+        # Same encoder as the responses, so both stores return identical JSON types
+        self.client.setex(f'wf:res:{workflow_id}', WORKFLOW_RESULTS_TTL, app.json.dumps(result))
+
+    def get_result(self, workflow_id):
+        result = self.client.get(f'wf:res:{workflow_id}')
+        return json.loads(result) if result is not None else None
+
+    def set_workflow_for_hash(self, input_hash, workflow_id):
+        self.client.setex(f'wf:byhash:{input_hash}', WORKFLOW_RESULTS_TTL, workflow_id)
+
+    def get_workflow_for_hash(self, input_hash):
+        workflow_id = self.client.get(f'wf:byhash:{input_hash}')
+        return workflow_id.decode() if workflow_id is not None else None
+
+    def clear_workflow_for_hash(self, input_hash):
+        self.client.delete(f'wf:byhash:{input_hash}')
+
+def create_workflow_store():
+    """Use Redis when REDIS_URL is configured, otherwise keep state in process"""
+    redis_url = os.environ.get('REDIS_URL')
+    if redis_url:
+        try:
+            import redis
+            client = redis.Redis.from_url(redis_url)
+            client.ping()
+            return RedisWorkflowStore(client)
+        except Exception as e:
+            print(f"⚠️ Redis unavailable ({e}), using in-process workflow store")
+    return MemoryWorkflowStore()
+
+workflow_store = create_workflow_store()
+
+def run_workflow_async(workflow_id, workflow_config, input_hash=None):
     """Run a processing workflow asynchronously"""
     try:
-        analysis_progress[workflow_id] = {'status': 'running', 'progress': 0, 'steps_completed': 0}
+        workflow_store.set_progress(workflow_id, {'status': 'running', 'progress': 0, 'steps_completed': 0})
 
         workflow_type = workflow_config.get('type')
         data = workflow_config.get('data', {})
 
         if workflow_type == 'comprehensive_sustainability':
-            result = run_comprehensive_sustainability_workflow(workflow_id, data)
+            result = asyncio.run(run_comprehensive_sustainability_workflow(workflow_id, data))
         elif workflow_type == 'development_impact_assessment':
-            result = run_development_impact_workflow(workflow_id, data)
+            result = asyncio.run(run_development_impact_workflow(workflow_id, data))
         elif workflow_type == 'climate_adaptation_plan':
-            result = run_climate_adaptation_workflow(workflow_id, data)
+            result = asyncio.run(run_climate_adaptation_workflow(workflow_id, data))
         else:
             result = {'error': f'Unknown workflow type: {workflow_type}'}
 
-        analysis_results[workflow_id] = result
-        analysis_progress[workflow_id] = {'status': 'completed', 'progress': 100, 'steps_completed': 'all'}
+        workflow_store.set_result(workflow_id, result)
+        workflow_store.set_progress(workflow_id, {'status': 'completed', 'progress': 100, 'steps_completed': 'all'})
 
     except Exception as e:
-        analysis_progress[workflow_id] = {'status': 'failed', 'error': str(e)}
-        analysis_results[workflow_id] = {'error': str(e)}
+        workflow_store.set_progress(workflow_id, {'status': 'failed', 'error': str(e)})
+        workflow_store.set_result(workflow_id, {'error': str(e)})
+        # Failed runs must not be replayed for identical input
+        if input_hash:
+            workflow_store.clear_workflow_for_hash(input_hash)
+
+    finally:
+        workflow_slots.release()
+
+class WorkflowStep:
+    """A named workflow step that runs once all of its dependencies have completed"""
+
+    def __init__(self, name, fn, deps=(), progress_weight=1):
+        self.name = name
+        self.fn = fn  # Called with a dict of the results completed so far
+        self.deps = tuple(deps)
+        self.progress_weight = progress_weight
+
+async def run_workflow_dag(workflow_id, steps):
+    """Run workflow steps as a dependency graph, dispatching each step as soon as it is ready
+
+    Args:
+        workflow_id: Workflow whose progress entry is updated as steps finish
+        steps: List of WorkflowStep
+
+    Returns:
+        Dict of step name -> step result
+    """
+    loop = asyncio.get_running_loop()
+    pending = {step.name: step for step in steps}
+    total_weight = sum(step.progress_weight for step in steps) or 1
+    completed_weight = 0
+    running = {}
+    results = {}
+
+    while pending or running:
+        for name, step in list(pending.items()):
+            if all(dep in results for dep in step.deps):
+                future = loop.run_in_executor(workflow_step_executor, step.fn, dict(results))
+                running[future] = step
+                del pending[name]
+
+        if not running:
+            raise ValueError(f'Unresolvable workflow dependencies: {sorted(pending)}')
+
+        done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            step = running.pop(future)
+            results[step.name] = future.result()
+            completed_weight += step.progress_weight
+            workflow_store.step_completed(workflow_id, int(completed_weight / total_weight * 100))
+
+    return results
 
-def run_comprehensive_sustainability_workflow(workflow_id, data):
+async def run_comprehensive_sustainability_workflow(workflow_id, data):
     """Run comprehensive sustainability analysis workflow"""
     parcels_data = data.get('parcels_data')
     if not parcels_data:
@@ -2313,49 +2824,27 @@ def run_comprehensive_sustainability_workflow(workflow_id, data):
     if not flood_data:
         flood_data = processor.get_flood_zones_nassau()
 
-    results = {}
-
-    # Step 1: Urban Compactness
-    analysis_progress[workflow_id]['progress'] = 15
-    analysis_progress[workflow_id]['steps_completed'] = 1
-    results['urban_compactness'] = sustainability_analyzer.calculate_urban_compactness(parcels_data)
-
-    # Step 2: Green Infrastructure
-    analysis_progress[workflow_id]['progress'] = 30
-    analysis_progress[workflow_id]['steps_completed'] = 2
-    results['green_infrastructure'] = sustainability_analyzer.analyze_green_infrastructure(parcels_data)
-
-    # Step 3: Transportation Accessibility
-    analysis_progress[workflow_id]['progress'] = 45
-    analysis_progress[workflow_id]['steps_completed'] = 3
-    results['transportation'] = sustainability_analyzer.calculate_transportation_accessibility(
-        parcels_data, transit_data
-    )
-
-    # Step 4: Environmental Justice
-    analysis_progress[workflow_id]['progress'] = 60
-    analysis_progress[workflow_id]['steps_completed'] = 4
-    results['environmental_justice'] = sustainability_analyzer.analyze_environmental_justice(parcels_data)
-
-    # Step 5: Climate Resilience
-    analysis_progress[workflow_id]['progress'] = 75
-    analysis_progress[workflow_id]['steps_completed'] = 5
-    results['climate_resilience'] = sustainability_analyzer.assess_climate_resilience(
-        parcels_data, flood_data
-    )
-
-    # Step 6: Energy Efficiency
-    analysis_progress[workflow_id]['progress'] = 90
-    analysis_progress[workflow_id]['steps_completed'] = 6
-    results['energy_efficiency'] = sustainability_analyzer.calculate_energy_efficiency_metrics(parcels_data)
-
-    # Generate summary recommendations
-    analysis_progress[workflow_id]['progress'] = 100
-    results['summary'] = generate_comprehensive_recommendations(results)
-
-    return results
-
-def run_development_impact_workflow(workflow_id, data):
+    analyses = ('urban_compactness', 'green_infrastructure', 'transportation',
+                'environmental_justice', 'climate_resilience', 'energy_efficiency')
+
+    return await run_workflow_dag(workflow_id, [
+        WorkflowStep('urban_compactness',
+                     lambda r: sustainability_analyzer.calculate_urban_compactness(parcels_data)),
+        WorkflowStep('green_infrastructure',
+                     lambda r: sustainability_analyzer.analyze_green_infrastructure(parcels_data)),
+        WorkflowStep('transportation',
+                     lambda r: sustainability_analyzer.calculate_transportation_accessibility(parcels_data, transit_data)),
+        WorkflowStep('environmental_justice',
+                     lambda r: sustainability_analyzer.analyze_environmental_justice(parcels_data)),
+        WorkflowStep('climate_resilience',
+                     lambda r: sustainability_analyzer.assess_climate_resilience(parcels_data, flood_data)),
+        WorkflowStep('energy_efficiency',
+                     lambda r: sustainability_analyzer.calculate_energy_efficiency_metrics(parcels_data)),
+        # Generate summary recommendations
+        WorkflowStep('summary', generate_comprehensive_recommendations, deps=analyses)
+    ])
+
+async def run_development_impact_workflow(workflow_id, data):
     """Run development impact assessment workflow"""
     parcels_data = data.get('parcels_data')
     development_sites = data.get('development_sites')
@@ -2366,39 +2855,36 @@ def run_development_impact_workflow(workflow_id, data):
     if not development_sites:
         return {'error': 'Development sites required for impact assessment'}
 
-    results = {}
-
-    # Step 1: Baseline Analysis
-    analysis_progress[workflow_id]['progress'] = 20
-    results['baseline'] = {
-        'compactness': sustainability_analyzer.calculate_urban_compactness(parcels_data),
-        'transportation': sustainability_analyzer.calculate_transportation_accessibility(
-            parcels_data, processor.get_lirr_stations()
-        )
-    }
-
-    # Step 2: Site Suitability Analysis
-    analysis_progress[workflow_id]['progress'] = 50
+    transit_data = processor.get_lirr_stations()
     criteria_layers = {
         'parcels': parcels_data.get('features', []),
-        'transit_stations': processor.get_lirr_stations().get('features', []),
+        'transit_stations': transit_data.get('features', []),
         'flood_zones': processor.get_flood_zones_nassau().get('features', [])
     }
-    results['site_analysis'] = sustainability_analyzer.optimal_site_selection(
-        development_sites, criteria_layers
-    )
-
-    # Step 3: Impact Assessment
-    analysis_progress[workflow_id]['progress'] = 80
-    results['land_use_conflicts'] = sustainability_analyzer.detect_land_use_conflicts(parcels_data)
 
-    # Step 4: Recommendations
-    analysis_progress[workflow_id]['progress'] = 100
-    results['recommendations'] = generate_development_recommendations(results)
-
-    return results
-
-def run_climate_adaptation_workflow(workflow_id, data):
+    results = await run_workflow_dag(workflow_id, [
+        # Baseline Analysis
+        WorkflowStep('compactness',
+                     lambda r: sustainability_analyzer.calculate_urban_compactness(parcels_data)),
+        WorkflowStep('transportation',
+                     lambda r: sustainability_analyzer.calculate_transportation_accessibility(parcels_data, transit_data)),
+        WorkflowStep('baseline',
+                     lambda r: {'compactness': r['compactness'], 'transportation': r['transportation']},
+                     deps=('compactness', 'transportation'), progress_weight=0),
+        # Site Suitability Analysis
+        WorkflowStep('site_analysis',
+                     lambda r: sustainability_analyzer.optimal_site_selection(development_sites, criteria_layers)),
+        # Impact Assessment
+        WorkflowStep('land_use_conflicts',
+                     lambda r: sustainability_analyzer.detect_land_use_conflicts(parcels_data)),
+        # Recommendations
+        WorkflowStep('recommendations', generate_development_recommendations,
+                     deps=('site_analysis', 'land_use_conflicts'))
+    ])
+
+    return {key: results[key] for key in ('baseline', 'site_analysis', 'land_use_conflicts', 'recommendations')}
+
+async def run_climate_adaptation_workflow(workflow_id, data):
     """Run climate adaptation planning workflow"""
     parcels_data = data.get('parcels_data')
     if not parcels_data:
@@ -2406,27 +2892,56 @@ def run_climate_adaptation_workflow(workflow_id, data):
 
     flood_data = processor.get_flood_zones_nassau()
 
-    results = {}
-
-    # Step 1: Climate Risk Assessment
-    analysis_progress[workflow_id]['progress'] = 25
-    results['climate_risks'] = sustainability_analyzer.assess_climate_resilience(
-        parcels_data, flood_data
-    )
-
-    # Step 2: Vulnerability Analysis
-    analysis_progress[workflow_id]['progress'] = 50
-    results['environmental_justice'] = sustainability_analyzer.analyze_environmental_justice(parcels_data)
-
-    # Step 3: Green Infrastructure Assessment
-    analysis_progress[workflow_id]['progress'] = 75
-    results['green_infrastructure'] = sustainability_analyzer.analyze_green_infrastructure(parcels_data)
-
-    # Step 4: Adaptation Recommendations
-    analysis_progress[workflow_id]['progress'] = 100
-    results['adaptation_plan'] = generate_climate_adaptation_recommendations(results)
-
-    return results
+    return await run_workflow_dag(workflow_id, [
+        # Climate Risk Assessment
+        WorkflowStep('climate_risks',
+                     lambda r: sustainability_analyzer.assess_climate_resilience(parcels_data, flood_data)),
+        # Vulnerability Analysis
+        WorkflowStep('environmental_justice',
+                     lambda r: sustainability_analyzer.analyze_environmental_justice(parcels_data)),
+        # Green Infrastructure Assessment
+        WorkflowStep('green_infrastructure',
+                     lambda r: sustainability_analyzer.analyze_green_infrastructure(parcels_data)),
+        # Adaptation Recommendations
+        WorkflowStep('adaptation_plan', generate_climate_adaptation_recommendations,
+                     deps=('climate_risks', 'environmental_justice', 'green_infrastructure'))
+    ])
+
+# Recommendation rules: (analysis_key, condition, message, priority/bucket).
+# A message may be a callable that formats the analysis result.
+COMPREHENSIVE_RULES = (
+    ('urban_compactness', lambda r: r.get('compactness_score', 0) < 40,
+     "Promote compact development to reduce sprawl", 'high'),
+    ('green_infrastructure', lambda r: not r.get('who_standard_met', False),
+     "Increase green space provision to meet WHO standards", 'high'),
+    ('transportation', lambda r: r.get('mean_accessibility_score', 0) < 50,
+     "Improve transportation accessibility", 'medium'),
+)
+
+DEVELOPMENT_RULES = (
+    ('site_analysis', lambda r: bool(r.get('ranked_sites', [])),
+     lambda r: f"Prioritize development at site {r['ranked_sites'][0].get('site_id')} (score: {r['ranked_sites'][0].get('composite_score')})",
+     None),
+    ('land_use_conflicts', lambda r: r.get('conflict_summary', {}).get('high_conflict', 0) > 0,
+     "Address high-priority land use conflicts before development", None),
+)
+
+CLIMATE_ADAPTATION_RULES = (
+    ('climate_risks', lambda r: r.get('high_risk_parcels', 0) > 0,
+     "Develop evacuation plans for high-risk areas", 'immediate_actions'),
+    ('climate_risks', lambda r: r.get('high_risk_parcels', 0) > 0,
+     "Implement flood-proofing measures", 'medium_term_strategies'),
+    ('green_infrastructure', lambda r: r.get('accessibility_rate', 0) < 80,
+     "Expand green infrastructure network", 'long_term_planning'),
+)
+
+def apply_recommendation_rules(rules, analysis_results):
+    """Yield (message, priority/bucket) for each rule whose analysis is present and whose condition holds"""
+    for analysis_key, condition, message, tag in rules:
+        if analysis_key in analysis_results:
+            result = analysis_results[analysis_key]
+            if condition(result):
+                yield (message(result) if callable(message) else message), tag
 
 def generate_comprehensive_recommendations(analysis_results):
     """Generate comprehensive sustainability recommendations"""
@@ -2434,23 +2949,9 @@ def generate_comprehensive_recommendations(analysis_results):
     priorities = []
 
     # Analyze results and generate recommendations
-    if 'urban_compactness' in analysis_results:
-        compactness = analysis_results['urban_compactness']
-        if compactness.get('compactness_score', 0) < 40:
-            recommendations.append("Promote compact development to reduce sprawl")
-            priorities.append('high')
-
-    if 'green_infrastructure' in analysis_results:
-        green = analysis_results['green_infrastructure']
-        if not green.get('who_standard_met', False):
-            recommendations.append("Increase green space provision to meet WHO standards")
-            priorities.append('high')
-
-    if 'transportation' in analysis_results:
-        transport = analysis_results['transportation']
-        if transport.get('mean_accessibility_score', 0) < 50:
-            recommendations.append("Improve transportation accessibility")
-            priorities.append('medium')
+    for message, priority in apply_recommendation_rules(COMPREHENSIVE_RULES, analysis_results):
+        recommendations.append(message)
+        priorities.append(priority)
 
     return {
         'recommendations': recommendations,
@@ -2460,20 +2961,7 @@ def generate_comprehensive_recommendations(analysis_results):
 
 def generate_development_recommendations(analysis_results):
     """Generate development-specific recommendations"""
-    recommendations = []
-
-    if 'site_analysis' in analysis_results:
-        sites = analysis_results['site_analysis'].get('ranked_sites', [])
-        if sites:
-            top_site = sites[0]
-            recommendations.append(f"Prioritize development at site {top_site.get('site_id')} (score: {top_site.get('composite_score')})")
-
-    if 'land_use_conflicts' in analysis_results:
-        conflicts = analysis_results['land_use_conflicts'].get('conflict_summary', {})
-        if conflicts.get('high_conflict', 0) > 0:
-            recommendations.append("Address high-priority land use conflicts before development")
-
-    return recommendations
+    return [message for message, _ in apply_recommendation_rules(DEVELOPMENT_RULES, analysis_results)]
 
 def generate_climate_adaptation_recommendations(analysis_results):
     """Generate climate adaptation recommendations"""
@@ -2483,16 +2971,8 @@ def generate_climate_adaptation_recommendations(analysis_results):
         'long_term_planning': []
     }
 
-    if 'climate_risks' in analysis_results:
-        risks = analysis_results['climate_risks']
-        if risks.get('high_risk_parcels', 0) > 0:
-            recommendations['immediate_actions'].append("Develop evacuation plans for high-risk areas")
-            recommendations['medium_term_strategies'].append("Implement flood-proofing measures")
-
-    if 'green_infrastructure' in analysis_results:
-        green = analysis_results['green_infrastructure']
-        if green.get('accessibility_rate', 0) < 80:
-            recommendations['long_term_planning'].append("Expand green infrastructure network")
+    for message, bucket in apply_recommendation_rules(CLIMATE_ADAPTATION_RULES, analysis_results):
+        recommendations[bucket].append(message)
 
     return recommendations
 
@@ -2512,7 +2992,7 @@ def calculate_overall_score(analysis_results):
     if 'energy_efficiency' in analysis_results:
         scores.append(analysis_results['energy_efficiency'].get('mean_solar_potential', 0))
 
-    return round(np.mean(scores), 2) if scores else 0
+    return round(sum(scores) / len(scores), 2) if scores else 0
 
 @app.route('/api/workflows/start', methods=['POST'])
 def start_workflow():
@@ -2520,32 +3000,84 @@ def start_workflow():
     try:
         data = request.json or {}
         workflow_type = data.get('type')
-        workflow_id = str(uuid.uuid4())
 
         if not workflow_type:
             return jsonify({'success': False, 'error': 'Workflow type required'})
 
+        # Identical input reuses the workflow already started for it
+        input_hash = _payload_key(data).hex()
+        existing_id = workflow_store.get_workflow_for_hash(input_hash)
+        existing = workflow_store.get_progress(existing_id) if existing_id else None
+        if existing is not None and existing.get('status') != 'failed':
+            if existing.get('status') == 'completed' and input_hash in request.if_none_match:
+                response = Response(status=304)
+            else:
+                response = jsonify({
+                    'success': True,
+                    'workflow_id': existing_id,
+                    'workflow_type': workflow_type,
+                    'status': existing.get('status'),
+                    'reused': True,
+                    'status_url': f'/api/workflows/status/{existing_id}',
+                    'stream_url': f'/api/workflows/stream/{existing_id}'
+                })
+            response.set_etag(input_hash)
+            return response
+
+        workflow_id = str(uuid.uuid4())
+
+        if not workflow_slots.acquire(blocking=False):
+            return jsonify({'success': False, 'error': 'Too many workflows in progress, retry later'}), 429, {'Retry-After': '30'}
+
+        # Register the workflow before it is picked up so status/stream see it
+        workflow_store.set_progress(workflow_id, {'status': 'queued', 'progress': 0, 'steps_completed': 0})
+        workflow_store.set_workflow_for_hash(input_hash, workflow_id)
+
         # Start workflow in background
-        future = executor.submit(run_workflow_async, workflow_id, data)
+        try:
+            future = executor.submit(run_workflow_async, workflow_id, data, input_hash)
+        except Exception:
+            workflow_slots.release()
+            workflow_store.clear_workflow_for_hash(input_hash)
+            raise
 
+        status_url = f'/api/workflows/status/{workflow_id}'
         return jsonify({
             'success': True,
             'workflow_id': workflow_id,
             'workflow_type': workflow_type,
-            'status': 'started'
-        })
+            'status': 'started',
+            'status_url': status_url,
+            'stream_url': f'/api/workflows/stream/{workflow_id}'
+        }), 202, {'Location': status_url, 'ETag': f'"{input_hash}"'}
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/workflows/stream/<workflow_id>', methods=['GET'])
+def stream_workflow_progress(workflow_id):
+    """Stream workflow progress as Server-Sent Events until the workflow finishes"""
+    if workflow_store.get_progress(workflow_id) is None:
+        return jsonify({'success': False, 'error': 'Workflow not found'}), 404
+
+    def generate():
+        for progress in workflow_store.iter_progress(workflow_id):
+            if progress is None:
+                yield ': keepalive\n\n'
+            else:
+                yield f'data: {json.dumps(progress)}\n\n'
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
 @app.route('/api/workflows/status/<workflow_id>', methods=['GET'])
 def get_workflow_status(workflow_id):
     """Get workflow processing status"""
     try:
-        if workflow_id not in analysis_progress:
+        status = workflow_store.get_progress(workflow_id)
+        if status is None:
             return jsonify({'success': False, 'error': 'Workflow not found'})
 
-        status = analysis_progress[workflow_id]
         response = {
             'success': True,
             'workflow_id': workflow_id,
@@ -2553,8 +3085,10 @@ def get_workflow_status(workflow_id):
         }
 
         # Include results if completed
-        if workflow_id in analysis_results and status.get('status') == 'completed':
-            response['results'] = analysis_results[workflow_id]
+        if status.get('status') == 'completed':
+            results = workflow_store.get_result(workflow_id)
+            if results is not None:
+                return stream_json_response(response, 'results', results)
 
         return jsonify(response)
 
@@ -2565,14 +3099,11 @@ def get_workflow_status(workflow_id):
 def get_workflow_results(workflow_id):
     """Get completed workflow results"""
     try:
-        if workflow_id not in analysis_results:
+        results = workflow_store.get_result(workflow_id)
+        if results is None:
             return jsonify({'success': False, 'error': 'Results not found'})
 
-        return jsonify({
-            'success': True,
-            'workflow_id': workflow_id,
-            'results': analysis_results[workflow_id]
-        })
+        return stream_json_response({'success': True, 'workflow_id': workflow_id}, 'results', results)
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -2635,44 +3166,59 @@ def perform_geometry_validation(geojson_data):
         'topology_errors': []
     }
 
-    for i, feature in enumerate(features):
-        geometry = feature.get('geometry', {})
-        coords = geometry.get('coordinates', [])
-
-        if not coords:
-            validation_results['missing_coordinates'] += 1
-            validation_results['invalid_geometries'].append({
-                'feature_index': i,
-                'error': 'Missing coordinates'
-            })
-            continue
-
-        # Basic coordinate validation
-        if geometry.get('type') == 'Point':
-            if len(coords) >= 2 and all(isinstance(c, (int, float)) for c in coords[:2]):
-                validation_results['valid_geometries'] += 1
-            else:
-                validation_results['invalid_geometries'].append({
-                    'feature_index': i,
-                    'error': 'Invalid point coordinates'
-                })
-
-        elif geometry.get('type') == 'Polygon':
-            if coords and len(coords[0]) >= 4:  # Minimum for closed polygon
-                validation_results['valid_geometries'] += 1
-            else:
-                validation_results['invalid_geometries'].append({
-                    'feature_index': i,
-                    'error': 'Invalid polygon coordinates'
-                })
+    # Large collections are validated in chunks across worker processes
+    if Parallel is not None and len(features) >= PARALLEL_VALIDATION_MIN_FEATURES:
+        n_chunks = os.cpu_count() or 1
+        bounds = np.linspace(0, len(features), n_chunks + 1, dtype=int)
+        partials = Parallel(n_jobs=-1, backend='loky')(
+            delayed(validate_geometry_chunk)(features[start:stop], int(start))
+            for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+        )
+    else:
+        partials = [validate_geometry_chunk(features)]
 
-        else:
-            validation_results['valid_geometries'] += 1
+    for partial in partials:
+        validation_results['valid_geometries'] += partial['valid_geometries']
+        validation_results['missing_coordinates'] += partial['missing_coordinates']
+        validation_results['invalid_geometries'].extend(partial['invalid_geometries'])
 
     validation_results['validity_rate'] = (validation_results['valid_geometries'] / validation_results['total_features'] * 100) if validation_results['total_features'] > 0 else 0
 
     return validation_results
 
+# Above this size duplicate ids are screened with a Bloom filter instead of a set
+BLOOM_DEDUP_MIN_FEATURES = 100_000
+BLOOM_ERROR_RATE = 0.001
+
+class IdBloomFilter:
+    """Fixed-size Bloom filter over string ids using double hashing on blake2b"""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(int(capacity), 1)
+        self.num_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def add(self, key):
+        """Add key; return True if it was possibly seen before"""
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        bits = self.bits
+        num_bits = self.num_bits
+        seen = True
+        for i in range(self.num_hashes):
+            idx = (h1 + i * h2) % num_bits
+            mask = 1 << (idx & 7)
+            if not bits[idx >> 3] & mask:
+                bits[idx >> 3] |= mask
+                seen = False
+        return seen
+
+def _feature_dedup_key(props):
+    """Duplicate key: gpin, then id, then the full properties of the record"""
+    return props.get('gpin') or props.get('id') or str(props)
+
 def perform_attribute_validation(dataset, required_fields):
     """Perform attribute data validation"""
     features = dataset.get('features', [])
@@ -2685,27 +3231,52 @@ def perform_attribute_validation(dataset, required_fields):
         'duplicate_records': 0
     }
 
-    # Check field completeness
-    for field in required_fields:
-        missing_count = 0
+    if not features:
+        for field in required_fields:
+            validation_results['completeness_check'][field] = {'missing_values': 0, 'completeness_rate': 0}
+        return validation_results
+
+    # Single pass: per-field missing counts and duplicate detection together.
+    # Large datasets use a Bloom filter and only keep ids it flags as repeats.
+    missing = [0] * len(required_fields)
+    use_bloom = len(features) > BLOOM_DEDUP_MIN_FEATURES
+    seen_ids = IdBloomFilter(len(features)) if use_bloom else set()
+    candidates = set()
+    duplicates = 0
+
+    for feature in features:
+        props = feature.get('properties') or {}
+
+        for i, field in enumerate(required_fields):
+            value = props.get(field)
+            if value is None or value == '':
+                missing[i] += 1
+
+        feature_id = _feature_dedup_key(props)
+        if use_bloom:
+            if seen_ids.add(feature_id):
+                candidates.add(feature_id)
+        elif feature_id in seen_ids:
+            duplicates += 1
+        else:
+            seen_ids.add(feature_id)
+
+    if candidates:
+        # Exact confirmation restricted to flagged ids drops false positives
+        occurrences = dict.fromkeys(candidates, 0)
         for feature in features:
-            props = feature.get('properties', {})
-            if field not in props or props[field] is None or props[field] == '':
-                missing_count += 1
+            feature_id = _feature_dedup_key(feature.get('properties') or {})
+            if feature_id in occurrences:
+                occurrences[feature_id] += 1
+        duplicates = sum(count - 1 for count in occurrences.values())
 
+    for field, missing_count in zip(required_fields, missing):
         validation_results['completeness_check'][field] = {
             'missing_values': missing_count,
-            'completeness_rate': ((len(features) - missing_count) / len(features) * 100) if features else 0
+            'completeness_rate': (len(features) - missing_count) / len(features) * 100
         }
 
-    # Check for duplicates (based on a unique identifier if present)
-    unique_ids = set()
-    for feature in features:
-        props = feature.get('properties', {})
-        feature_id = props.get('gpin') or props.get('id') or str(props)
-        if feature_id in unique_ids:
-            validation_results['duplicate_records'] += 1
-        unique_ids.add(feature_id)
+    validation_results['duplicate_records'] = duplicates
 
     return validation_results
 
@@ -2782,17 +3353,122 @@ def get_report_templates():
         'templates': templates
     })
 
+# Recommendation keyword patterns, matched case-insensitively in one scan
+_HIGH_PRIORITY_RE = re.compile(r"urgent|critical|immediate|emergency|evacuate", re.I)
+_MEDIUM_PRIORITY_RE = re.compile(r"improve|enhance|develop|implement", re.I)
+_IMMEDIATE_RE = re.compile(r"immediate|urgent", re.I)
+_DEVELOPMENT_RE = re.compile(r"develop|implement|create", re.I)
+_METRIC_RE = re.compile(r"score|rate|count|ratio|index", re.I)
+
+_INTERPRETATIONS = MappingProxyType({
+    'urban_compactness': 'Higher compactness scores indicate more sustainable development patterns',
+    'green_infrastructure': 'Accessibility rates above 80% indicate good green space distribution',
+    'transportation': 'Accessibility scores above 70 indicate good transit connectivity',
+    'climate_resilience': 'Resilience scores above 70 indicate good climate preparedness',
+    'energy_efficiency': 'Solar potential scores above 70 indicate good renewable energy opportunity'
+})
+_DEFAULT_INTERPRETATION = 'Analysis provides insights into urban sustainability metrics'
+
+# Static report sections shared read-only by every report
+_APPENDICES = MappingProxyType({
+    'methodology': 'Spatial analysis conducted using QGIS and custom algorithms',
+    'data_sources': 'Nassau County parcel data, LIRR station locations, FEMA flood zones',
+    'assumptions': (
+        'Property values used as proxy for income levels',
+        'Network circuity factor of 1.3 applied to straight-line distances',
+        'Walking speed assumed at 5 km/h for accessibility calculations'
+    ),
+    'technical_notes': 'All spatial calculations use WGS84 coordinate system (EPSG:4326)'
+})
+
+_PROJECT_OVERVIEW = MappingProxyType({
+    'project_type': 'Development Impact Assessment',
+    'study_area': 'Nassau County, NY'
+})
+
+_MONITORING_PLAN = MappingProxyType({
+    'frequency': 'Annual',
+    'key_indicators': ('Urban compactness', 'Green space provision', 'Transit accessibility'),
+    'reporting_schedule': 'Quarterly progress reports, annual comprehensive review'
+})
+
+_IMPLEMENTATION_TIMELINE = MappingProxyType({
+    'phase_1': '0-2 years: Emergency preparedness and immediate risk reduction',
+    'phase_2': '2-5 years: Infrastructure improvements and green infrastructure expansion',
+    'phase_3': '5-10 years: Long-term resilience building and monitoring'
+})
+
+_COSTS_BENEFITS = MappingProxyType({
+    'estimated_costs': 'To be determined through detailed design',
+    'expected_benefits': (
+        'Reduced flood damage',
+        'Improved public health',
+        'Enhanced property values',
+        'Increased community resilience'
+    ),
+    'cost_benefit_ratio': 'Positive - benefits expected to exceed costs over 20-year period'
+})
+
+_METHODOLOGY = MappingProxyType({
+    'approach': 'Multi-criteria decision analysis',
+    'criteria_weighting': 'Equal weighting unless specified',
+    'spatial_analysis': 'GIS-based proximity and accessibility analysis',
+    'validation': 'Cross-validation with local expertise and standards'
+})
+
+# Criterion weight -> importance label, checked from the highest band down
+_IMPORTANCE_BANDS = ((0.2, 'High'), (0.1, 'Medium'))
+
+_SENSITIVITY_ANALYSIS = MappingProxyType({
+    'method': 'Weight variation analysis',
+    'findings': 'Top-ranked sites remain stable with ±10% weight variations',
+    'uncertainty': 'Low - consistent rankings across scenarios'
+})
+
+@dataclass(slots=True)
+class Recommendation:
+    """Compiled report recommendation; slots keep large lists compact"""
+    source_analysis: str = ''
+    recommendation: str = ''
+    priority: str = 'low'
+    implementation_timeframe: str = 'TBD'
+
 class AnalysisReportGenerator:
     """Generate analysis reports in various formats"""
 
     def __init__(self):
         self.report_timestamp = datetime.now()
+        self._timestamp_iso = self.report_timestamp.isoformat()
+        self._report_sections = None
+
+        # analysis_type -> KPI extractor, so indicators only visit analyses present
+        self._kpi_extractors = {
+            'urban_compactness': lambda r: {
+                'compactness_index': r.get('compactness_score', 0),
+                'sprawl_index': r.get('sprawl_index', 0)
+            },
+            'green_infrastructure': lambda r: {
+                'green_space_per_capita': r.get('green_space_per_capita', 0),
+                'green_accessibility_rate': r.get('accessibility_rate', 0)
+            },
+            'transportation': lambda r: {
+                'transit_accessibility': r.get('mean_accessibility_score', 0),
+                'walkability_coverage': r.get('walkability_coverage_percent', 0)
+            },
+            'climate_resilience': lambda r: {
+                'climate_resilience_score': r.get('resilience_score', 0)
+            },
+            'energy_efficiency': lambda r: {
+                'solar_potential_score': r.get('mean_solar_potential', 0),
+                'energy_efficiency_score': r.get('mean_energy_efficiency', 0)
+            }
+        }
 
     def generate_sustainability_report(self, analysis_results, format_type='json'):
         """Generate comprehensive sustainability report"""
         report_data = {
             'report_title': 'Urban Sustainability Analysis Report',
-            'generated_at': self.report_timestamp.isoformat(),
+            'generated_at': self._timestamp_iso,
             'executive_summary': self._generate_executive_summary(analysis_results),
             'detailed_findings': self._extract_detailed_findings(analysis_results),
             'recommendations': self._compile_recommendations(analysis_results),
@@ -2811,7 +3487,7 @@ class AnalysisReportGenerator:
         """Generate development impact assessment report"""
         report_data = {
             'report_title': 'Development Impact Assessment Report',
-            'generated_at': self.report_timestamp.isoformat(),
+            'generated_at': self._timestamp_iso,
             'project_overview': self._extract_project_overview(analysis_results),
             'baseline_conditions': analysis_results.get('baseline', {}),
             'impact_assessment': self._analyze_impacts(analysis_results),
@@ -2830,7 +3506,7 @@ class AnalysisReportGenerator:
         """Generate climate adaptation report"""
         report_data = {
             'report_title': 'Climate Adaptation Plan Report',
-            'generated_at': self.report_timestamp.isoformat(),
+            'generated_at': self._timestamp_iso,
             'climate_risk_assessment': analysis_results.get('climate_risks', {}),
             'vulnerability_analysis': analysis_results.get('environmental_justice', {}),
             'adaptation_strategies': self._develop_adaptation_strategies(analysis_results),
@@ -2849,7 +3525,7 @@ class AnalysisReportGenerator:
         """Generate site analysis report"""
         report_data = {
             'report_title': 'Site Suitability Analysis Report',
-            'generated_at': self.report_timestamp.isoformat(),
+            'generated_at': self._timestamp_iso,
             'methodology': self._describe_methodology(analysis_results),
             'site_rankings': analysis_results.get('ranked_sites', []),
             'criteria_analysis': self._analyze_criteria(analysis_results),
@@ -2926,354 +3602,222 @@ class AnalysisReportGenerator:
 
     def _compile_recommendations(self, analysis_results):
         """Compile all recommendations from analysis results"""
-        all_recommendations = []
+        priority_order = {'high': 1, 'medium': 2, 'low': 3}
+        items = []
 
+        # Rank and arrival index lead each tuple so the sort compares ints
+        # only and stays stable for equal priorities
         for analysis_type, results in analysis_results.items():
             if isinstance(results, dict):
-                recommendations = results.get('recommendations', [])
-                if recommendations:
-                    for rec in recommendations:
-                        all_recommendations.append({
-                            'source_analysis': analysis_type,
-                            'recommendation': rec,
-                            'priority': self._assess_priority(rec),
-                            'implementation_timeframe': self._estimate_timeframe(rec)
-                        })
+                for rec in results.get('recommendations', []) or []:
+                    priority = self._assess_priority(rec)
+                    items.append((priority_order.get(priority, 3), len(items), analysis_type, rec, priority))
 
-        # Sort by priority
-        priority_order = {'high': 1, 'medium': 2, 'low': 3}
-        all_recommendations.sort(key=lambda x: priority_order.get(x['priority'], 3))
+        items.sort()
 
-        return all_recommendations
+        return [
+            Recommendation(analysis_type, rec, priority, self._estimate_timeframe(rec))
+            for _, _, analysis_type, rec, priority in items
+        ]
 
     def _calculate_performance_indicators(self, analysis_results):
         """Calculate key performance indicators"""
-        indicators = {}
-
-        if 'urban_compactness' in analysis_results:
-            compactness = analysis_results['urban_compactness']
-            indicators['compactness_index'] = compactness.get('compactness_score', 0)
-            indicators['sprawl_index'] = compactness.get('sprawl_index', 0)
-
-        if 'green_infrastructure' in analysis_results:
-            green = analysis_results['green_infrastructure']
-            indicators['green_space_per_capita'] = green.get('green_space_per_capita', 0)
-            indicators['green_accessibility_rate'] = green.get('accessibility_rate', 0)
-
-        if 'transportation' in analysis_results:
-            transport = analysis_results['transportation']
-            indicators['transit_accessibility'] = transport.get('mean_accessibility_score', 0)
-            indicators['walkability_coverage'] = transport.get('walkability_coverage_percent', 0)
-
-        if 'climate_resilience' in analysis_results:
-            climate = analysis_results['climate_resilience']
-            indicators['climate_resilience_score'] = climate.get('resilience_score', 0)
-
-        if 'energy_efficiency' in analysis_results:
-            energy = analysis_results['energy_efficiency']
-            indicators['solar_potential_score'] = energy.get('mean_solar_potential', 0)
-            indicators['energy_efficiency_score'] = energy.get('mean_energy_efficiency', 0)
-
-        return indicators
+        return {
+            indicator: value
+            for analysis_type, results in analysis_results.items()
+            if analysis_type in self._kpi_extractors
+            for indicator, value in self._kpi_extractors[analysis_type](results).items()
+        }
 
     def _generate_appendices(self, analysis_results):
         """Generate appendices with technical details"""
-        appendices = {
-            'methodology': 'Spatial analysis conducted using QGIS and custom algorithms',
-            'data_sources': 'Nassau County parcel data, LIRR station locations, FEMA flood zones',
-            'assumptions': [
-                'Property values used as proxy for income levels',
-                'Network circuity factor of 1.3 applied to straight-line distances',
-                'Walking speed assumed at 5 km/h for accessibility calculations'
-            ],
-            'technical_notes': 'All spatial calculations use WGS84 coordinate system (EPSG:4326)'
-        }
-        return appendices
+        return _APPENDICES
 
     def _extract_key_metrics(self, results):
         """Extract key metrics from analysis results"""
-        metrics = {}
-
-        # Common metric patterns
-        for key, value in results.items():
-            if any(keyword in key.lower() for keyword in ['score', 'rate', 'count', 'ratio', 'index']):
-                if isinstance(value, (int, float)):
-                    metrics[key] = value
-
-        return metrics
+        # Common metric patterns; float first since most metrics are ratios or scores.
+        # bool subclasses int, so flags like 'rate_limited' are excluded explicitly.
+        return {
+            key: value for key, value in results.items()
+            if isinstance(value, (float, int)) and not isinstance(value, bool) and _METRIC_RE.search(key)
+        }
 
     def _interpret_results(self, analysis_type, results):
         """Provide interpretation of results"""
-        interpretations = {
-            'urban_compactness': 'Higher compactness scores indicate more sustainable development patterns',
-            'green_infrastructure': 'Accessibility rates above 80% indicate good green space distribution',
-            'transportation': 'Accessibility scores above 70 indicate good transit connectivity',
-            'climate_resilience': 'Resilience scores above 70 indicate good climate preparedness',
-            'energy_efficiency': 'Solar potential scores above 70 indicate good renewable energy opportunity'
-        }
-
-        return interpretations.get(analysis_type, 'Analysis provides insights into urban sustainability metrics')
+        return _INTERPRETATIONS.get(analysis_type, _DEFAULT_INTERPRETATION)
 
     def _assess_priority(self, recommendation):
         """Assess priority level of recommendation"""
-        high_priority_keywords = ['urgent', 'critical', 'immediate', 'emergency', 'evacuate']
-        medium_priority_keywords = ['improve', 'enhance', 'develop', 'implement']
-
-        rec_lower = recommendation.lower()
-
-        if any(keyword in rec_lower for keyword in high_priority_keywords):
+        if _HIGH_PRIORITY_RE.search(recommendation):
             return 'high'
-        elif any(keyword in rec_lower for keyword in medium_priority_keywords):
+        elif _MEDIUM_PRIORITY_RE.search(recommendation):
             return 'medium'
         else:
             return 'low'
 
     def _estimate_timeframe(self, recommendation):
         """Estimate implementation timeframe"""
-        if 'immediate' in recommendation.lower() or 'urgent' in recommendation.lower():
+        if _IMMEDIATE_RE.search(recommendation):
             return '0-6 months'
-        elif any(word in recommendation.lower() for word in ['develop', 'implement', 'create']):
+        elif _DEVELOPMENT_RE.search(recommendation):
             return '1-3 years'
         else:
             return '6-12 months'
 
-    def _generate_html_report(self, report_data):
-        """Generate HTML format report"""
-        html_template = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>{report_data.get('report_title', 'Analysis Report')}</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                h1 {{ color: #2e7d32; }}
-                h2 {{ color: #1976d2; }}
-                .summary {{ background: #f5f5f5; padding: 20px; border-radius: 8px; }}
-                .metrics {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; }}
-                .metric {{ background: white; padding: 15px; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-                .recommendations {{ list-style-type: none; padding: 0; }}
-                .recommendation {{ background: #fff3e0; padding: 10px; margin: 5px 0; border-radius: 5px; border-left: 4px solid #ff9800; }}
-                .high-priority {{ border-left-color: #f44336; background: #ffebee; }}
-                .medium-priority {{ border-left-color: #ff9800; background: #fff3e0; }}
-                .low-priority {{ border-left-color: #4caf50; background: #e8f5e8; }}
-            </style>
-        </head>
-        <body>
-            <h1>{report_data.get('report_title', 'Analysis Report')}</h1>
-            <p><strong>Generated:</strong> {report_data.get('generated_at', 'N/A')}</p>
-        """
+    def _generate_html_report(self, report_data, template_name=DEFAULT_REPORT_TEMPLATE, output=None):
+        """Generate HTML format report from a pre-compiled template
 
-        # Add executive summary if available
-        if 'executive_summary' in report_data:
-            summary = report_data['executive_summary']
-            html_template += f"""
-            <div class="summary">
-                <h2>Executive Summary</h2>
-                <p><strong>Overall Assessment:</strong> {summary.get('overall_assessment', 'N/A')}</p>
-                <h3>Key Findings:</h3>
-                <ul>{''.join(f'<li>{finding}</li>' for finding in summary.get('key_findings', []))}</ul>
-                <h3>Critical Issues:</h3>
-                <ul>{''.join(f'<li>{issue}</li>' for issue in summary.get('critical_issues', []))}</ul>
-            </div>
-            """
-
-        # Add performance indicators if available
-        if 'performance_indicators' in report_data:
-            indicators = report_data['performance_indicators']
-            html_template += """
-            <h2>Performance Indicators</h2>
-            <div class="metrics">
-            """
-            for metric, value in indicators.items():
-                html_template += f"""
-                <div class="metric">
-                    <h4>{metric.replace('_', ' ').title()}</h4>
-                    <p style="font-size: 24px; font-weight: bold; color: #1976d2;">{value}</p>
-                </div>
-                """
-            html_template += "</div>"
-
-        # Add recommendations if available
-        if 'recommendations' in report_data:
-            html_template += """
-            <h2>Recommendations</h2>
-            <ul class="recommendations">
-            """
-            for rec in report_data['recommendations']:
-                priority_class = f"{rec.get('priority', 'low')}-priority"
-                html_template += f"""
-                <li class="recommendation {priority_class}">
-                    <strong>{rec.get('priority', 'Low').upper()} PRIORITY:</strong> {rec.get('recommendation', '')}
-                    <br><small>Implementation timeframe: {rec.get('implementation_timeframe', 'TBD')}</small>
-                </li>
-                """
-            html_template += "</ul>"
-
-        html_template += """
-        </body>
-        </html>
+        When output is a file object the report is streamed into it instead
+        of being built as one string.
         """
+        if template_name == DEFAULT_REPORT_TEMPLATE:
+            tpl = _REPORT_TMPL
+        else:
+            tpl = report_env.get_template(template_name)
 
-        return html_template
+        if output is not None:
+            tpl.stream(**report_data).dump(output)
+            return output
+        return tpl.render(**report_data)
 
     def _generate_csv_report(self, report_data):
-        """Generate CSV format report data"""
-        csv_data = []
+        """Generate CSV format report text"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
 
         # Add performance indicators
         if 'performance_indicators' in report_data:
-            csv_data.append(['Performance Indicators'])
-            csv_data.append(['Metric', 'Value'])
-            for metric, value in report_data['performance_indicators'].items():
-                csv_data.append([metric.replace('_', ' ').title(), value])
-            csv_data.append([])  # Empty row
+            writer.writerow(['Performance Indicators'])
+            writer.writerow(['Metric', 'Value'])
+            writer.writerows(
+                (_pretty(metric), value)
+                for metric, value in report_data['performance_indicators'].items()
+            )
+            writer.writerow([])  # Empty row
 
         # Add recommendations
         if 'recommendations' in report_data:
-            csv_data.append(['Recommendations'])
-            csv_data.append(['Priority', 'Recommendation', 'Source Analysis', 'Timeframe'])
-            for rec in report_data['recommendations']:
-                csv_data.append([
-                    rec.get('priority', ''),
-                    rec.get('recommendation', ''),
-                    rec.get('source_analysis', ''),
-                    rec.get('implementation_timeframe', '')
-                ])
-
-        return csv_data
+            writer.writerow(['Recommendations'])
+            writer.writerow(['Priority', 'Recommendation', 'Source Analysis', 'Timeframe'])
+            writer.writerows(
+                (rec.priority, rec.recommendation, rec.source_analysis, rec.implementation_timeframe)
+                for rec in report_data['recommendations']
+            )
+
+        return buffer.getvalue()
 
     # Additional helper methods for specialized reports
     def _extract_project_overview(self, analysis_results):
         """Extract project overview from development analysis"""
-        return {
-            'project_type': 'Development Impact Assessment',
-            'study_area': 'Nassau County, NY',
-            'analysis_date': self.report_timestamp.isoformat()
-        }
+        return {**_PROJECT_OVERVIEW, 'analysis_date': self._timestamp_iso}
+
+    def _build_report_sections(self, analysis_results):
+        """Build impacts, mitigation measures and adaptation strategies in one pass"""
+        cached = self._report_sections
+        if cached is not None and cached[0] is analysis_results:
+            return cached[1]
 
-    def _analyze_impacts(self, analysis_results):
-        """Analyze development impacts"""
         impacts = {
             'environmental': [],
             'social': [],
             'economic': []
         }
+        strategies = {
+            'flood_management': [],
+            'heat_mitigation': [],
+            'green_infrastructure': []
+        }
 
-        if 'land_use_conflicts' in analysis_results:
-            conflicts = analysis_results['land_use_conflicts']
+        conflicts = analysis_results.get('land_use_conflicts')
+        if conflicts is not None:
             high_conflicts = conflicts.get('conflict_summary', {}).get('high_conflict', 0)
             if high_conflicts > 0:
                 impacts['environmental'].append(f'{high_conflicts} high-priority land use conflicts identified')
 
-        return impacts
+        measures = [
+            {
+                'measure': rec,
+                'effectiveness': 'Medium',
+                'cost': 'To be determined',
+                'timeline': '1-2 years'
+            }
+            for rec in analysis_results.get('recommendations', ())
+        ]
+
+        climate_risks = analysis_results.get('climate_risks')
+        if climate_risks is not None:
+            flood_analysis = climate_risks.get('flood_risk_analysis', {})
+            if flood_analysis.get('high', 0) > 0:
+                strategies['flood_management'].extend((
+                    'Implement flood barriers and drainage improvements',
+                    'Develop evacuation plans for high-risk areas'
+                ))
+
+        sections = (impacts, measures, strategies)
+        self._report_sections = (analysis_results, sections)
+        return sections
+
+    def _analyze_impacts(self, analysis_results):
+        """Analyze development impacts"""
+        return self._build_report_sections(analysis_results)[0]
 
     def _generate_mitigation_measures(self, analysis_results):
         """Generate mitigation measures"""
-        measures = []
-
-        if 'recommendations' in analysis_results:
-            for rec in analysis_results['recommendations']:
-                measures.append({
-                    'measure': rec,
-                    'effectiveness': 'Medium',
-                    'cost': 'To be determined',
-                    'timeline': '1-2 years'
-                })
-
-        return measures
+        return self._build_report_sections(analysis_results)[1]
 
     def _create_monitoring_plan(self, analysis_results):
         """Create monitoring plan"""
-        return {
-            'frequency': 'Annual',
-            'key_indicators': ['Urban compactness', 'Green space provision', 'Transit accessibility'],
-            'reporting_schedule': 'Quarterly progress reports, annual comprehensive review'
-        }
+        return _MONITORING_PLAN
 
     def _develop_adaptation_strategies(self, analysis_results):
         """Develop climate adaptation strategies"""
-        strategies = {
-            'flood_management': [],
-            'heat_mitigation': [],
-            'green_infrastructure': []
-        }
-
-        if 'climate_risks' in analysis_results:
-            flood_analysis = analysis_results['climate_risks'].get('flood_risk_analysis', {})
-            if flood_analysis.get('high', 0) > 0:
-                strategies['flood_management'].append('Implement flood barriers and drainage improvements')
-                strategies['flood_management'].append('Develop evacuation plans for high-risk areas')
-
-        return strategies
+        return self._build_report_sections(analysis_results)[2]
 
     def _create_implementation_timeline(self, analysis_results):
         """Create implementation timeline"""
-        return {
-            'phase_1': '0-2 years: Emergency preparedness and immediate risk reduction',
-            'phase_2': '2-5 years: Infrastructure improvements and green infrastructure expansion',
-            'phase_3': '5-10 years: Long-term resilience building and monitoring'
-        }
+        return _IMPLEMENTATION_TIMELINE
 
     def _estimate_costs_benefits(self, analysis_results):
         """Estimate costs and benefits"""
-        return {
-            'estimated_costs': 'To be determined through detailed design',
-            'expected_benefits': [
-                'Reduced flood damage',
-                'Improved public health',
-                'Enhanced property values',
-                'Increased community resilience'
-            ],
-            'cost_benefit_ratio': 'Positive - benefits expected to exceed costs over 20-year period'
-        }
+        return _COSTS_BENEFITS
 
     def _describe_methodology(self, analysis_results):
         """Describe analysis methodology"""
-        return {
-            'approach': 'Multi-criteria decision analysis',
-            'criteria_weighting': 'Equal weighting unless specified',
-            'spatial_analysis': 'GIS-based proximity and accessibility analysis',
-            'validation': 'Cross-validation with local expertise and standards'
-        }
+        return _METHODOLOGY
 
     def _analyze_criteria(self, analysis_results):
         """Analyze site selection criteria"""
-        criteria_analysis = {}
+        if 'analysis_criteria' not in analysis_results:
+            return {}
 
-        if 'analysis_criteria' in analysis_results:
-            criteria = analysis_results['analysis_criteria']
-            weights = criteria.get('weights_used', {})
+        weights = analysis_results['analysis_criteria'].get('weights_used', {})
 
-            for criterion, weight in weights.items():
-                criteria_analysis[criterion] = {
-                    'weight': weight,
-                    'importance': 'High' if weight > 0.2 else 'Medium' if weight > 0.1 else 'Low',
-                    'rationale': f'Weight of {weight} reflects relative importance in site selection'
-                }
-
-        return criteria_analysis
+        return {
+            criterion: {
+                'weight': weight,
+                'importance': next((label for threshold, label in _IMPORTANCE_BANDS if weight > threshold), 'Low'),
+                'rationale': f'Weight of {weight} reflects relative importance in site selection'
+            }
+            for criterion, weight in weights.items()
+        }
 
     def _perform_sensitivity_analysis(self, analysis_results):
         """Perform sensitivity analysis"""
-        return {
-            'method': 'Weight variation analysis',
-            'findings': 'Top-ranked sites remain stable with ±10% weight variations',
-            'uncertainty': 'Low - consistent rankings across scenarios'
-        }
+        return _SENSITIVITY_ANALYSIS
 
     def _generate_site_recommendations(self, analysis_results):
         """Generate site-specific recommendations"""
         recommendations = []
 
-        if 'ranked_sites' in analysis_results:
-            sites = analysis_results['ranked_sites'][:3]  # Top 3 sites
-            for i, site in enumerate(sites, 1):
-                recommendations.append({
-                    'rank': i,
-                    'site_id': site.get('site_id', 'Unknown'),
-                    'score': site.get('composite_score', 0),
-                    'recommendation': f"Recommended for development - Score: {site.get('composite_score', 0)}"
-                })
+        # Top 3 sites, read lazily so the ranked list is never copied
+        for i, site in enumerate(islice(analysis_results.get('ranked_sites', ()), 3), 1):
+            score = site.get('composite_score', 0)
+            recommendations.append({
+                'rank': i,
+                'site_id': site.get('site_id', 'Unknown'),
+                'score': score,
+                'recommendation': f"Recommended for development - Score: {score}"
+            })
 
         return recommendations
 
@@ -3310,6 +3854,7 @@ if __name__ == '__main__':
     print("\n⚙️  PROCESSING WORKFLOWS:")
     print("  POST /api/workflows/start")
     print("  GET  /api/workflows/status/<workflow_id>")
+    print("  GET  /api/workflows/stream/<workflow_id>")
     print("  GET  /api/workflows/results/<workflow_id>")
     print("  Supported workflows:")
     print("    - comprehensive_sustainability")
@@ -3363,4 +3908,12 @@ if __name__ == '__main__':
     print(f"\n🌐 Server starting on port 5000...")
     print("=" * 70)
 
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    if os.environ.get('FLASK_ENV') == 'development':
+        app.run(host='0.0.0.0', port=5000, debug=True)
+    else:
+        # Single process keeps one QGIS instance and the in-memory stores shared
+        try:
+            from waitress import serve
+            serve(app, host='0.0.0.0', port=5000, threads=8, connection_limit=1000, channel_timeout=120)
+        except ImportError:
+            app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
\ No newline at end of file
@@ -7,7 +7,12 @@ Downloads Landsat imagery, tree cover, and impervious surface data
 import os
 import sys
 import json
+import gzip
+import shutil
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
@@ -22,6 +27,25 @@ logging.basicConfig(
     ]
 )
 
+# C JSON encoder when available; both paths produce indented UTF-8 bytes
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    orjson = None
+
+    def _dumps(obj):
+        return json.dumps(obj, indent=2).encode('utf-8')
+
+# Large rasters are streamed to disk in 1 MiB chunks
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_TIMEOUT = (5, 60)
+
+# Text outputs (JSON/GeoJSON) are stored gzipped; level 1 is near I/O speed
+GZIP_LEVEL = 1
+
 class UrbanHeatDataAcquisition:
     def __init__(self, city_bounds, data_dir='/app/data'):
         """
@@ -40,8 +64,34 @@ class UrbanHeatDataAcquisition:
         self.raw_dir.mkdir(parents=True, exist_ok=True)
         self.processed_dir.mkdir(parents=True, exist_ok=True)
 
+        # Shared keep-alive session so concurrent downloads reuse connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
         logging.info(f"Initialized data acquisition for bounds: {city_bounds}")
 
+    def _download_file(self, url, output_file, compress=False):
+        """
+        Stream a remote file to disk through the shared session
+        Text formats can be re-compressed on the fly with compress=True
+        """
+        with self.session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+            if compress:
+                f = gzip.open(output_file, 'wb', compresslevel=GZIP_LEVEL)
+            else:
+                f = open(output_file, 'wb')
+            with f:
+                shutil.copyfileobj(r.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+        return str(output_file)
+
     def download_landsat_scene(self, scene_id=None, date_range=None):
         """
         Download Landsat 8/9 imagery via USGS Earth Explorer API
@@ -58,6 +108,7 @@ class UrbanHeatDataAcquisition:
         # 2. Search for scenes using city bounds
         # 3. Download Band 10 (thermal) and Band 11 for LST calculation
         # 4. Download Band 4 (red) and Band 5 (NIR) for NDVI
+        #    Each band via self._download_file(band_url, band_path)
 
         demo_scene = {
             'scene_id': scene_id or 'LC08_L1TP_014032_20240101_DEMO',
@@ -72,14 +123,13 @@ class UrbanHeatDataAcquisition:
         }
 
         # Save metadata
-        with open(demo_scene['metadata'], 'w') as f:
-            json.dump({
-                'scene_id': demo_scene['scene_id'],
-                'acquisition_date': demo_scene['date'],
-                'bounds': self.city_bounds,
-                'sensor': 'Landsat 8 OLI/TIRS',
-                'processing_level': 'L1TP'
-            }, f, indent=2)
+        Path(demo_scene['metadata']).write_bytes(_dumps({
+            'scene_id': demo_scene['scene_id'],
+            'acquisition_date': demo_scene['date'],
+            'bounds': self.city_bounds,
+            'sensor': 'Landsat 8 OLI/TIRS',
+            'processing_level': 'L1TP'
+        }))
 
         logging.info(f"Landsat scene data prepared: {demo_scene['scene_id']}")
         return demo_scene
@@ -101,6 +151,7 @@ class UrbanHeatDataAcquisition:
 
             # In production, download from MRLC:
             # url = f"https://www.mrlc.gov/geoserver/mrlc_download/wcs?..."
+            # self._download_file(url, output_file)
 
             logging.info(f"Tree canopy data prepared: {output_file}")
             return str(output_file)
@@ -133,6 +184,7 @@ class UrbanHeatDataAcquisition:
             # In production:
             # url = "https://www.mrlc.gov/geoserver/mrlc_download/wcs?..."
             # Download impervious surface percentage raster
+            # self._download_file(url, output_file)
 
             logging.info(f"Impervious surface data prepared: {output_file}")
             return str(output_file)
@@ -154,6 +206,7 @@ class UrbanHeatDataAcquisition:
         # state_fips = "36"  # NY
         # county_fips = "061"  # Nassau
         # url = f"https://www2.census.gov/geo/tiger/TIGER2023/TRACT/tl_2023_{state_fips}_tract.zip"
+        # self._download_file(url, census_dir / 'census_tracts.zip')
 
         logging.info(f"Census boundaries prepared: {output_file}")
         return str(output_file)
@@ -166,29 +219,38 @@ class UrbanHeatDataAcquisition:
         logging.info("Starting full urban heat island data acquisition")
         logging.info("=" * 60)
 
+        # Downloads are independent and I/O-bound, so fetch them concurrently.
+        # Keys are pre-seeded so the report keeps a stable order.
+        downloads = {
+            'landsat': (self.download_landsat_scene,),
+            'tree_canopy': (self.download_tree_canopy, 'nlcd'),
+            'impervious': (self.download_impervious_surfaces, 'nlcd'),
+            'census': (self.download_census_boundaries,)
+        }
+
         results = {
             'timestamp': datetime.now().isoformat(),
             'bounds': self.city_bounds,
-            'data': {}
+            'data': dict.fromkeys(downloads)
         }
 
         try:
-            # 1. Download Landsat imagery
-            results['data']['landsat'] = self.download_landsat_scene()
-
-            # 2. Download tree canopy
-            results['data']['tree_canopy'] = self.download_tree_canopy('nlcd')
-
-            # 3. Download impervious surfaces
-            results['data']['impervious'] = self.download_impervious_surfaces('nlcd')
-
-            # 4. Download census boundaries
-            results['data']['census'] = self.download_census_boundaries()
+            with ThreadPoolExecutor(max_workers=len(downloads)) as pool:
+                futures = {
+                    pool.submit(fn, *args): name
+                    for name, (fn, *args) in downloads.items()
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        results['data'][name] = future.result()
+                    except Exception as e:
+                        logging.error(f"❌ {name} download failed: {str(e)}")
+                        results.setdefault('errors', {})[name] = str(e)
 
             # Save acquisition report
-            report_file = self.data_dir / 'acquisition_report.json'
-            with open(report_file, 'w') as f:
-                json.dump(results, f, indent=2)
+            report_file = self.data_dir / 'acquisition_report.json.gz'
+            report_file.write_bytes(gzip.compress(_dumps(results), compresslevel=GZIP_LEVEL))
 
             logging.info(f"✅ Data acquisition complete! Report: {report_file}")
             return results
@@ -197,17 +259,24 @@ class UrbanHeatDataAcquisition:
             logging.error(f"❌ Data acquisition failed: {str(e)}")
             raise
 
+# Example: Nassau County, NY bounds
+DEFAULT_CITY_BOUNDS = {
+    'north': 40.85,
+    'south': 40.60,
+    'east': -73.40,
+    'west': -73.75
+}
+
+def run(config=None):
+    """Pipeline stage entry point; config may set city_bounds and data_dir"""
+    config = config or {}
+    acquisition = UrbanHeatDataAcquisition(
+        config.get('city_bounds', DEFAULT_CITY_BOUNDS),
+        config.get('data_dir', '/app/data')
+    )
+    return acquisition.run_full_acquisition()
+
 if __name__ == "__main__":
-    # Example: Nassau County, NY bounds
-    city_bounds = {
-        'north': 40.85,
-        'south': 40.60,
-        'east': -73.40,
-        'west': -73.75
-    }
-
-    # Initialize and run
-    acquisition = UrbanHeatDataAcquisition(city_bounds)
-    results = acquisition.run_full_acquisition()
+    results = run()
 
     print(json.dumps(results, indent=2))
@@ -9,9 +9,21 @@ import numpy as np
 from pathlib import Path
 import logging
 import json
-from osgeo import gdal, osr
+from osgeo import gdal, gdal_array, osr
 import math
 
+# Optional fused/threaded expression evaluator
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+from gdal_env import configure_gdal
+from handoff import write_lst
+from kernels import EMISSIVITY_LUT, NDVI_EMISSIVITY_BINS, compute_lst_ndvi, dn_to_lst
+
+configure_gdal()
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -21,6 +33,22 @@ logging.basicConfig(
     ]
 )
 
+# LST is stored as int16 hundredths of a degree (±327 °C range) with the
+# scale recorded on the band, written as a Cloud-Optimized GeoTIFF: ZSTD with
+# the horizontal integer predictor, 256px tiles and internal overviews
+LST_SCALE = 0.01
+LST_NODATA = -32768
+COG_CREATE_OPTIONS = [
+    'COMPRESS=ZSTD',
+    'LEVEL=1',
+    'PREDICTOR=YES',
+    'BLOCKSIZE=256',
+    'OVERVIEWS=AUTO',
+    'OVERVIEW_RESAMPLING=AVERAGE',
+    'NUM_THREADS=ALL_CPUS',
+    'BIGTIFF=IF_SAFER'
+]
+
 class LandSurfaceTemperatureProcessor:
     """
     Process Landsat 8/9 thermal bands to Land Surface Temperature
@@ -30,8 +58,9 @@ class LandSurfaceTemperatureProcessor:
     K1_CONSTANT = 774.8853  # W/(m2·sr·μm)
     K2_CONSTANT = 1321.0789  # Kelvin
 
-    def __init__(self, data_dir='/app/data'):
+    def __init__(self, data_dir='/app/data', handoff_dir=None):
         self.data_dir = Path(data_dir)
+        self.handoff_dir = handoff_dir
         self.raw_dir = self.data_dir / 'raw' / 'landsat'
         self.processed_dir = self.data_dir / 'processed'
         self.processed_dir.mkdir(parents=True, exist_ok=True)
@@ -65,42 +94,43 @@ class LandSurfaceTemperatureProcessor:
 
         return brightness_temp_celsius
 
-    def calculate_ndvi(self, red_band, nir_band):
+    def calculate_ndvi(self, red_band, nir_band, out=None):
         """
         Calculate Normalized Difference Vegetation Index
         Used for emissivity correction
         """
         logging.info("Calculating NDVI...")
 
-        # Avoid division by zero
-        denominator = nir_band + red_band
-        denominator[denominator == 0] = 0.0001
+        # Two float32 buffers; zero-sum pixels are left at 0 instead of patched
+        numerator = np.subtract(nir_band, red_band, dtype=np.float32)
+        denominator = np.add(nir_band, red_band, dtype=np.float32)
 
-        ndvi = (nir_band - red_band) / denominator
+        ndvi = numerator if out is None else out
+        np.divide(numerator, denominator, out=ndvi, where=denominator != 0)
+        ndvi[denominator == 0] = 0.0
 
         return ndvi
 
-    def calculate_emissivity(self, ndvi):
+    def calculate_emissivity(self, ndvi, out=None):
         """
         Calculate land surface emissivity from NDVI
         """
         logging.info("Calculating surface emissivity...")
 
-        # Initialize emissivity array
-        emissivity = np.zeros_like(ndvi)
-
         # Emissivity values based on land cover (from NDVI)
         # Water (NDVI < 0): ε = 0.991
         # Soil (0 < NDVI < 0.2): ε = 0.966
         # Mixed (0.2 < NDVI < 0.5): ε = 0.973
         # Vegetation (NDVI > 0.5): ε = 0.986
 
-        emissivity[ndvi < 0] = 0.991
-        emissivity[(ndvi >= 0) & (ndvi < 0.2)] = 0.966
-        emissivity[(ndvi >= 0.2) & (ndvi < 0.5)] = 0.973
-        emissivity[ndvi >= 0.5] = 0.986
+        # One binning pass and a LUT gather instead of four masked stores;
+        # the gather writes into uninitialised (or caller-provided) memory
+        ndvi = np.asarray(ndvi, dtype=np.float32)
+        if out is None:
+            out = np.empty(ndvi.shape, dtype=np.float32)
+        np.take(EMISSIVITY_LUT, np.digitize(ndvi, NDVI_EMISSIVITY_BINS), out=out)
 
-        return emissivity
+        return out
 
     def apply_emissivity_correction(self, brightness_temp, emissivity):
         """
@@ -130,6 +160,52 @@ class LandSurfaceTemperatureProcessor:
 
         return lst_celsius
 
+    def digital_number_to_lst(self, dn_array, emissivity, metadata):
+        """
+        DN to emissivity-corrected LST (°C) in one fused float32 pass
+        Replaces digital_number_to_radiance -> radiance_to_brightness_temperature
+        -> apply_emissivity_correction without the intermediate rasters
+        """
+        logging.info("Converting DN to LST (fused kernel)...")
+
+        wavelength = 10.9
+        rho = (6.626e-34 * 3.0e8) / (1.38e-23 * wavelength * 1e-6)
+
+        dn = np.ascontiguousarray(dn_array, dtype=np.float32)
+        emissivity = np.ascontiguousarray(emissivity, dtype=np.float32)
+        lst = np.empty_like(dn)
+
+        dn_to_lst(
+            dn, emissivity,
+            np.float32(metadata.get('RADIANCE_MULT_BAND_10', 0.0003342)),
+            np.float32(metadata.get('RADIANCE_ADD_BAND_10', 0.1)),
+            np.float32(self.K1_CONSTANT), np.float32(self.K2_CONSTANT),
+            np.float32(wavelength), np.float32(rho),
+            lst
+        )
+
+        return lst
+
+    def calculate_lst_and_ndvi(self, brightness_temp, red_band, nir_band):
+        """
+        NDVI, emissivity and emissivity-corrected LST in a single fused pass
+        Same thresholds and formula as the step-wise methods
+        """
+        logging.info("Calculating NDVI and LST (fused kernel)...")
+
+        wavelength = 10.9
+        rho = (6.626e-34 * 3.0e8) / (1.38e-23 * wavelength * 1e-6)
+
+        brightness_temp_kelvin = np.ascontiguousarray(brightness_temp + 273.15, dtype=np.float64)
+        red = np.ascontiguousarray(red_band, dtype=np.float64)
+        nir = np.ascontiguousarray(nir_band, dtype=np.float64)
+
+        lst = np.empty_like(brightness_temp_kelvin)
+        ndvi = np.empty_like(brightness_temp_kelvin)
+        compute_lst_ndvi(brightness_temp_kelvin, red, nir, lst, ndvi, wavelength, rho)
+
+        return lst, ndvi
+
     def create_synthetic_thermal_data(self, bounds, output_path):
         """
         Create synthetic thermal data for demonstration
@@ -140,18 +216,19 @@ class LandSurfaceTemperatureProcessor:
         # Create a synthetic temperature grid
         width, height = 1000, 1000
 
-        # Generate realistic urban heat pattern
-        x = np.linspace(0, 10, width)
-        y = np.linspace(0, 10, height)
-        X, Y = np.meshgrid(x, y)
-
-        # Urban core (hot)
-        urban_core = 35 + 5 * np.exp(-((X-5)**2 + (Y-5)**2) / 3)
+        # Generate realistic urban heat pattern on broadcast 1-D axes
+        # (no meshgrid): urban core (hot) plus variation
+        x = np.linspace(0, 10, width, dtype=np.float32)[None, :]
+        y = np.linspace(0, 10, height, dtype=np.float32)[:, None]
 
-        # Add variation
-        variation = 3 * np.sin(X * 0.5) * np.cos(Y * 0.3)
-
-        lst_data = urban_core + variation
+        if ne is not None:
+            lst_data = ne.evaluate(
+                "35 + 5 * exp(-((x - 5)**2 + (y - 5)**2) / 3) + 3 * sin(x * 0.5) * cos(y * 0.3)"
+            )
+        else:
+            lst_data = 5 * np.exp(-((x - 5) ** 2 + (y - 5) ** 2) / 3)
+            lst_data += 35
+            lst_data += 3 * np.sin(x * 0.5) * np.cos(y * 0.3)
 
         # Save as GeoTIFF
         self.save_geotiff(lst_data, output_path, bounds)
@@ -162,17 +239,15 @@ class LandSurfaceTemperatureProcessor:
         """
         Save numpy array as GeoTIFF with proper georeferencing
         """
-        driver = gdal.GetDriverByName('GTiff')
+        # Quantize °C to scaled int16; NaN pixels become nodata
+        scaled = np.rint(np.asarray(data, dtype=np.float32) / LST_SCALE)
+        np.clip(scaled, LST_NODATA + 1, 32767, out=scaled)
+        scaled[np.isnan(scaled)] = LST_NODATA
+        data = scaled.astype(np.int16)
 
+        # Wrap the array as an in-memory dataset without copying it
         height, width = data.shape
-        dataset = driver.Create(
-            str(output_path),
-            width,
-            height,
-            1,
-            gdal.GDT_Float32,
-            options=['COMPRESS=LZW', 'TILED=YES']
-        )
+        dataset = gdal_array.OpenArray(data)
 
         # Set georeferencing
         west, east = bounds['west'], bounds['east']
@@ -194,19 +269,34 @@ class LandSurfaceTemperatureProcessor:
         srs.ImportFromEPSG(4326)
         dataset.SetProjection(srs.ExportToWkt())
 
-        # Write data
         band = dataset.GetRasterBand(1)
-        band.WriteArray(data)
-        band.SetNoDataValue(-9999)
+        band.SetScale(LST_SCALE)
+        band.SetOffset(0.0)
+        band.SetNoDataValue(LST_NODATA)
         band.SetDescription('Land Surface Temperature (°C)')
 
-        # Calculate statistics
-        band.ComputeStatistics(False)
-
-        # Build overviews for faster rendering
-        dataset.BuildOverviews('AVERAGE', [2, 4, 8, 16])
-
-        dataset.FlushCache()
+        # Statistics from the array already in memory (raw stored values,
+        # as GDAL reports them) instead of re-reading the written raster
+        valid = data[data != LST_NODATA]
+        if valid.size:
+            band.SetStatistics(
+                float(valid.min()), float(valid.max()),
+                float(valid.mean()), float(valid.std())
+            )
+
+        # Hand the stored values to stage 03 through tmpfs; it falls back
+        # to decoding the GeoTIFF if this is missing
+        if self.handoff_dir:
+            try:
+                write_lst(self.handoff_dir, data, geotransform, srs.ExportToWkt(), LST_SCALE, LST_NODATA)
+            except OSError as e:
+                logging.warning(f"LST handoff skipped: {str(e)}")
+
+        # The COG driver tiles, compresses and builds overviews in one write
+        output = gdal.GetDriverByName('COG').CreateCopy(
+            str(output_path), dataset, options=COG_CREATE_OPTIONS
+        )
+        output = None
         dataset = None
 
         logging.info(f"✅ GeoTIFF saved: {output_path}")
@@ -243,14 +333,24 @@ class LandSurfaceTemperatureProcessor:
             'bounds': bounds
         }
 
-if __name__ == "__main__":
-    processor = LandSurfaceTemperatureProcessor()
+def run(config=None):
+    """Pipeline stage entry point; config may set data_dir and handoff_dir"""
+    config = config or {}
+    processor = LandSurfaceTemperatureProcessor(
+        config.get('data_dir', '/app/data'),
+        config.get('handoff_dir')
+    )
 
     # Demo: process synthetic data
-    metadata_path = '/app/data/raw/landsat/metadata.json'
+    metadata_path = processor.raw_dir / 'metadata.json'
 
-    if Path(metadata_path).exists():
-        result = processor.process_landsat_to_lst(metadata_path)
+    if metadata_path.exists():
+        return processor.process_landsat_to_lst(metadata_path)
+
+    logging.warning("No metadata found. Run data acquisition first.")
+    return {}
+
+if __name__ == "__main__":
+    result = run()
+    if result:
         print(json.dumps(result, indent=2))
-    else:
-        logging.warning("No metadata found. Run data acquisition first.")
@@ -13,8 +13,14 @@ import logging
 from osgeo import gdal, ogr, osr
 import geopandas as gpd
 from shapely.geometry import Point, Polygon, mapping
+from scipy import ndimage
 from scipy.ndimage import label, generate_binary_structure
 
+from gdal_env import configure_gdal
+import handoff
+
+configure_gdal()
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -30,51 +36,138 @@ class UrbanHeatIslandAnalysis:
         self.processed_dir = self.data_dir / 'processed'
         self.processed_dir.mkdir(parents=True, exist_ok=True)
 
+    @staticmethod
+    def _to_celsius(band, raw):
+        """
+        LST is stored as scaled int16; apply the band scale and mask nodata
+        """
+        return UrbanHeatIslandAnalysis._scaled_to_celsius(
+            raw, band.GetScale(), band.GetOffset(), band.GetNoDataValue()
+        )
+
+    @staticmethod
+    def _scaled_to_celsius(raw, scale, offset, nodata):
+        lst_array = raw.astype(np.float32)
+        scale = scale or 1.0
+        offset = offset or 0.0
+        if scale != 1.0 or offset != 0.0:
+            lst_array *= scale
+            lst_array += offset
+        if nodata is not None:
+            lst_array[raw == nodata] = np.nan
+        return lst_array
+
+    def read_lst(self, lst_raster):
+        """
+        Read the LST band once as float32 with its georeferencing
+        """
+        ds = gdal.Open(str(lst_raster))
+        band = ds.GetRasterBand(1)
+        lst_array = self._to_celsius(band, band.ReadAsArray())
+        return lst_array, ds.GetGeoTransform(), ds.GetProjection()
+
+    def read_lst_handoff(self, handoff_dir):
+        """
+        LST left in memory by stage 02, as read_lst returns it, or None
+        """
+        stored = handoff.read_lst(handoff_dir)
+        if stored is None:
+            return None
+        raw, meta = stored
+        lst_array = self._scaled_to_celsius(raw, meta['scale'], 0.0, meta['nodata'])
+        return lst_array, tuple(meta['geotransform']), meta['projection']
+
+    def iter_lst_blocks(self, band):
+        """
+        Yield (xoff, yoff, tile) windows aligned to the band's block size
+        """
+        block_x, block_y = band.GetBlockSize()
+        width, height = band.XSize, band.YSize
+        for yoff in range(0, height, block_y):
+            ysize = min(block_y, height - yoff)
+            for xoff in range(0, width, block_x):
+                xsize = min(block_x, width - xoff)
+                yield xoff, yoff, self._to_celsius(band, band.ReadAsArray(xoff, yoff, xsize, ysize))
+
     def calculate_zonal_statistics(self, lst_raster, zones_vector, output_path):
         """
         Calculate temperature statistics by zone (e.g., census tracts)
         """
         logging.info("Calculating zonal statistics...")
 
-        # Open raster
+        # Open raster; pixels are streamed block by block below
         raster_ds = gdal.Open(str(lst_raster))
         raster_band = raster_ds.GetRasterBand(1)
-        raster_array = raster_band.ReadAsArray()
         geotransform = raster_ds.GetGeoTransform()
 
         # Open vector zones
         zones_ds = ogr.Open(str(zones_vector))
         zones_layer = zones_ds.GetLayer()
 
-        results = []
-
-        for feature in zones_layer:
-            geom = feature.GetGeometryRef()
-            zone_id = feature.GetField(0)
-
-            # Create in-memory raster for this zone
-            driver = gdal.GetDriverByName('MEM')
-            zone_raster = driver.Create('', raster_ds.RasterXSize, raster_ds.RasterYSize, 1, gdal.GDT_Byte)
-            zone_raster.SetGeoTransform(geotransform)
-            zone_raster.SetProjection(raster_ds.GetProjection())
-
-            # Rasterize zone
-            gdal.RasterizeLayer(zone_raster, [1], zones_layer, burn_values=[1])
-            zone_array = zone_raster.GetRasterBand(1).ReadAsArray()
-
-            # Calculate statistics for this zone
-            zone_temps = raster_array[zone_array == 1]
-
-            if len(zone_temps) > 0:
-                stats = {
-                    'zone_id': zone_id,
-                    'mean_temp': float(np.mean(zone_temps)),
-                    'min_temp': float(np.min(zone_temps)),
-                    'max_temp': float(np.max(zone_temps)),
-                    'std_temp': float(np.std(zone_temps)),
-                    'pixel_count': int(len(zone_temps))
-                }
-                results.append(stats)
+        # Copy zones into a memory layer with a 1-based index attribute so
+        # every zone can be burned into a single label raster in one call
+        mem_ds = ogr.GetDriverByName('Memory').CreateDataSource('zones')
+        mem_layer = mem_ds.CreateLayer('zones', zones_layer.GetSpatialRef(), ogr.wkbUnknown)
+        mem_layer.CreateField(ogr.FieldDefn('zone_idx', ogr.OFTInteger))
+
+        zone_ids = []
+        for idx, feature in enumerate(zones_layer, 1):
+            zone_ids.append(feature.GetField(0))
+            mem_feature = ogr.Feature(mem_layer.GetLayerDefn())
+            mem_feature.SetField('zone_idx', idx)
+            mem_feature.SetGeometry(feature.GetGeometryRef())
+            mem_layer.CreateFeature(mem_feature)
+
+        zone_raster = gdal.GetDriverByName('MEM').Create(
+            '', raster_ds.RasterXSize, raster_ds.RasterYSize, 1, gdal.GDT_Int32
+        )
+        zone_raster.SetGeoTransform(geotransform)
+        zone_raster.SetProjection(raster_ds.GetProjection())
+        gdal.RasterizeLayer(zone_raster, [1], mem_layer, options=['ATTRIBUTE=zone_idx'])
+        zone_band = zone_raster.GetRasterBand(1)
+
+        # Running per-zone reductions over LST blocks; only one tile of the
+        # raster is resident at a time
+        size = len(zone_ids) + 1
+        counts = np.zeros(size, dtype=np.int64)
+        sums = np.zeros(size)
+        sq_sums = np.zeros(size)
+        mins = np.full(size, np.inf)
+        maxs = np.full(size, -np.inf)
+
+        for xoff, yoff, tile in self.iter_lst_blocks(raster_band):
+            ysize, xsize = tile.shape
+            labels = zone_band.ReadAsArray(xoff, yoff, xsize, ysize).ravel()
+            temps = tile.ravel().astype(np.float64)
+
+            # Nodata pixels belong to no zone
+            valid = ~np.isnan(temps)
+            labels = labels[valid]
+            temps = temps[valid]
+
+            counts += np.bincount(labels, minlength=size)
+            sums += np.bincount(labels, weights=temps, minlength=size)
+            sq_sums += np.bincount(labels, weights=temps * temps, minlength=size)
+            np.minimum.at(mins, labels, temps)
+            np.maximum.at(maxs, labels, temps)
+
+        index = np.flatnonzero(counts[1:]) + 1
+        means = sums[index] / counts[index]
+        stds = np.sqrt(np.maximum(sq_sums[index] / counts[index] - means ** 2, 0.0))
+        mins = mins[index]
+        maxs = maxs[index]
+
+        results = [
+            {
+                'zone_id': zone_ids[i - 1],
+                'mean_temp': float(mean),
+                'min_temp': float(lo),
+                'max_temp': float(hi),
+                'std_temp': float(std),
+                'pixel_count': int(counts[i])
+            }
+            for i, mean, lo, hi, std in zip(index, means, mins, maxs, stds)
+        ]
 
         # Save results
         with open(output_path, 'w') as f:
@@ -83,26 +176,25 @@ class UrbanHeatIslandAnalysis:
         logging.info(f"✅ Zonal statistics saved: {output_path}")
         return results
 
-    def detect_heat_islands(self, lst_raster, threshold_percentile=75, output_shapefile=None):
+    def detect_heat_islands(self, lst_raster, threshold_percentile=75, output_shapefile=None, lst_data=None):
         """
         Detect urban heat island hotspots
         Identifies areas above temperature threshold and creates polygons
+        lst_data: optional (array, geotransform, projection) from read_lst
         """
         logging.info(f"Detecting heat islands (threshold: {threshold_percentile}th percentile)...")
 
-        # Read LST raster
-        ds = gdal.Open(str(lst_raster))
-        band = ds.GetRasterBand(1)
-        lst_array = band.ReadAsArray()
-        geotransform = ds.GetGeoTransform()
-        projection = ds.GetProjection()
+        # Read LST raster unless the caller already has it in memory
+        lst_array, geotransform, projection = lst_data or self.read_lst(lst_raster)
 
-        # Calculate threshold temperature
-        threshold_temp = np.percentile(lst_array[lst_array > 0], threshold_percentile)
+        # Calculate threshold temperature; 'lower' selects an existing pixel
+        # value so no float64 interpolation copy is made
+        threshold_temp = float(np.quantile(lst_array[lst_array > 0], threshold_percentile / 100, method='lower'))
         logging.info(f"Heat island threshold: {threshold_temp:.2f}°C")
 
-        # Create binary mask of heat islands
-        heat_island_mask = (lst_array >= threshold_temp).astype(np.uint8)
+        # Create binary mask of heat islands directly as uint8
+        heat_island_mask = np.empty(lst_array.shape, dtype=np.uint8)
+        np.greater_equal(lst_array, threshold_temp, out=heat_island_mask)
 
         # Label connected regions
         structure = generate_binary_structure(2, 2)
@@ -110,23 +202,24 @@ class UrbanHeatIslandAnalysis:
 
         logging.info(f"Found {num_features} heat island regions")
 
-        # Convert to polygons
-        heat_islands = []
-
-        for region_id in range(1, num_features + 1):
-            region_mask = (labeled_array == region_id).astype(np.uint8)
-            region_temps = lst_array[region_mask == 1]
-
-            # Calculate region statistics
-            heat_island = {
-                'id': region_id,
-                'mean_temp': float(np.mean(region_temps)),
-                'max_temp': float(np.max(region_temps)),
-                'area_pixels': int(np.sum(region_mask)),
-                'severity': 'high' if np.mean(region_temps) > threshold_temp + 2 else 'moderate'
+        # Per-region statistics in single labelled passes over the raster
+        index = np.arange(1, num_features + 1)
+        mean_temps = ndimage.mean(lst_array, labeled_array, index)
+        max_temps = ndimage.maximum(lst_array, labeled_array, index)
+        areas = np.bincount(labeled_array.ravel(), minlength=num_features + 1)[1:]
+        severities = np.where(mean_temps > threshold_temp + 2, 'high', 'moderate')
+
+        heat_islands = [
+            {
+                'id': int(region_id),
+                'mean_temp': float(mean_temp),
+                'max_temp': float(max_temp),
+                'area_pixels': int(area),
+                'severity': str(severity)
             }
-
-            heat_islands.append(heat_island)
+            for region_id, mean_temp, max_temp, area, severity
+            in zip(index, mean_temps, max_temps, areas, severities)
+        ]
 
         # Create GeoDataFrame
         if output_shapefile:
@@ -176,22 +269,26 @@ class UrbanHeatIslandAnalysis:
         ds = None
         logging.info(f"✅ Heat islands saved: {output_path}")
 
-    def analyze_tree_temperature_correlation(self, lst_raster, tree_canopy_raster):
+    def analyze_tree_temperature_correlation(self, lst_raster, tree_canopy_raster, lst_array=None, seed=None):
         """
         Analyze correlation between tree cover and temperature
+        lst_array: optional pre-loaded LST band from read_lst
+        seed: optional seed for the synthetic tree cover
         """
         logging.info("Analyzing tree cover vs. temperature correlation...")
 
         # Read rasters
-        lst_ds = gdal.Open(str(lst_raster))
-        lst_array = lst_ds.GetRasterBand(1).ReadAsArray()
+        if lst_array is None:
+            lst_array = self.read_lst(lst_raster)[0]
 
         # For demo: create synthetic tree cover data
         # In production: read actual tree canopy raster
-        tree_cover = np.random.randint(0, 100, size=lst_array.shape)
+        # uint8 matches the on-disk canopy raster and is 8x smaller than int64
+        rng = np.random.default_rng(seed)
+        tree_cover = rng.integers(0, 100, size=lst_array.shape, dtype=np.uint8)
 
-        # Calculate correlation
-        valid_mask = (lst_array > 0) & (tree_cover >= 0)
+        # Calculate correlation (uint8 cover is never negative)
+        valid_mask = lst_array > 0
         correlation = np.corrcoef(
             lst_array[valid_mask],
             tree_cover[valid_mask]
@@ -199,27 +296,32 @@ class UrbanHeatIslandAnalysis:
 
         logging.info(f"Tree cover - temperature correlation: {correlation:.3f}")
 
-        # Bin tree cover and calculate mean temperatures
+        # Bin tree cover and calculate mean temperatures in one pass per statistic;
+        # bin k of digitize holds bins[k-1] <= cover < bins[k], the last id is overflow
         bins = [0, 20, 40, 60, 80, 100]
-        bin_stats = []
-
-        for i in range(len(bins) - 1):
-            bin_mask = (tree_cover >= bins[i]) & (tree_cover < bins[i+1]) & (lst_array > 0)
-            if np.sum(bin_mask) > 0:
-                bin_stats.append({
-                    'tree_cover_range': f"{bins[i]}-{bins[i+1]}%",
-                    'mean_temp': float(np.mean(lst_array[bin_mask])),
-                    'pixel_count': int(np.sum(bin_mask))
-                })
+        bin_ids = np.digitize(tree_cover[valid_mask], bins)
+        temp_sums = np.bincount(bin_ids, weights=lst_array[valid_mask], minlength=len(bins) + 1)
+        pixel_counts = np.bincount(bin_ids, minlength=len(bins) + 1)
+
+        bin_stats = [
+            {
+                'tree_cover_range': f"{lo}-{hi}%",
+                'mean_temp': float(total / count),
+                'pixel_count': int(count)
+            }
+            for lo, hi, total, count in zip(bins[:-1], bins[1:], temp_sums[1:-1], pixel_counts[1:-1])
+            if count > 0
+        ]
 
         return {
             'correlation': correlation,
             'bin_statistics': bin_stats
         }
 
-    def run_full_analysis(self):
+    def run_full_analysis(self, lst_data=None):
         """
         Run complete spatial analysis pipeline
+        lst_data: optional (array, geotransform, projection), e.g. from read_lst_handoff
         """
         logging.info("=" * 60)
         logging.info("Starting urban heat island spatial analysis")
@@ -230,24 +332,43 @@ class UrbanHeatIslandAnalysis:
         try:
             lst_file = self.processed_dir / 'land_surface_temperature.tif'
 
+            report_file = self.processed_dir / 'spatial_analysis_report.json'
+
             if lst_file.exists():
+                # Skip the analysis entirely when the LST input is unchanged
+                lst_mtime_ns = lst_file.stat().st_mtime_ns
+                if report_file.exists():
+                    with open(report_file, 'r') as f:
+                        cached = json.load(f)
+                    if cached.get('lst_mtime_ns') == lst_mtime_ns:
+                        logging.info(f"✅ LST unchanged, reusing spatial analysis: {report_file}")
+                        return cached
+
+                results['lst_mtime_ns'] = lst_mtime_ns
+
+                # Read and decompress the LST raster once for both analyses,
+                # unless the previous stage handed it over in memory
+                if lst_data is None:
+                    lst_data = self.read_lst(lst_file)
+
                 # 1. Detect heat islands
                 heat_islands = self.detect_heat_islands(
                     lst_file,
                     threshold_percentile=75,
-                    output_shapefile=str(self.processed_dir / 'heat_islands.shp')
+                    output_shapefile=str(self.processed_dir / 'heat_islands.shp'),
+                    lst_data=lst_data
                 )
                 results['heat_islands'] = heat_islands[:10]  # Top 10
 
                 # 2. Tree cover correlation
                 tree_correlation = self.analyze_tree_temperature_correlation(
                     lst_file,
-                    None  # Will use synthetic data
+                    None,  # Will use synthetic data
+                    lst_array=lst_data[0]
                 )
                 results['tree_correlation'] = tree_correlation
 
                 # Save analysis report
-                report_file = self.processed_dir / 'spatial_analysis_report.json'
                 with open(report_file, 'w') as f:
                     json.dump(results, f, indent=2)
 
@@ -262,7 +383,16 @@ class UrbanHeatIslandAnalysis:
 
         return results
 
+def run(config=None):
+    """Pipeline stage entry point; config may set data_dir and handoff_dir"""
+    config = config or {}
+    analysis = UrbanHeatIslandAnalysis(config.get('data_dir', '/app/data'))
+
+    lst_data = None
+    if config.get('handoff_dir'):
+        lst_data = analysis.read_lst_handoff(config['handoff_dir'])
+    return analysis.run_full_analysis(lst_data=lst_data)
+
 if __name__ == "__main__":
-    analysis = UrbanHeatIslandAnalysis()
-    results = analysis.run_full_analysis()
+    results = run()
     print(json.dumps(results, indent=2))
@@ -6,6 +6,7 @@ Creates styled QGIS projects programmatically using PyQGIS
 
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 import logging
 import json
@@ -14,6 +15,10 @@ import json
 sys.path.append('/usr/share/qgis/python')
 sys.path.append('/usr/share/qgis/python/plugins')
 
+from gdal_env import configure_gdal
+
+configure_gdal()
+
 from qgis.core import (
     QgsApplication,
     QgsProject,
@@ -40,16 +45,52 @@ logging.basicConfig(
     ]
 )
 
+# Temperature gradient: blue (cool) -> red (hot)
+TEMPERATURE_RAMP = (
+    (20, '#2166ac'),
+    (25, '#4393c3'),
+    (30, '#92c5de'),
+    (35, '#fddbc7'),
+    (40, '#f4a582'),
+    (45, '#d6604d'),
+    (50, '#b2182b'),
+)
+
+@lru_cache(maxsize=1)
+def _temperature_ramp_items():
+    """Color ramp items for the LST raster, built once per process"""
+    return [
+        QgsColorRampShader.ColorRampItem(value, QColor(color), f'{value}°C')
+        for value, color in TEMPERATURE_RAMP
+    ]
+
+@lru_cache(maxsize=None)
+def _heat_island_ranges(geometry_type):
+    """Moderate/high severity ranges for the heat island layer"""
+    ranges = [
+        QgsRendererRange(0, 1, QgsSymbol.defaultSymbol(geometry_type), 'Moderate', True),
+        QgsRendererRange(1, 2, QgsSymbol.defaultSymbol(geometry_type), 'High', True)
+    ]
+
+    # Set colors
+    ranges[0].symbol().setColor(QColor('#fdae61'))  # Orange
+    ranges[1].symbol().setColor(QColor('#d73027'))  # Red
+    return ranges
+
 class QGISProjectGenerator:
     def __init__(self, project_dir='/app/projects', data_dir='/app/data'):
         self.project_dir = Path(project_dir)
         self.data_dir = Path(data_dir)
         self.project_dir.mkdir(parents=True, exist_ok=True)
 
-        # Initialize QGIS Application
-        QgsApplication.setPrefixPath('/usr', True)
-        self.qgs = QgsApplication([], False)
-        self.qgs.initQgis()
+        # Initialize QGIS Application, unless this process already runs one
+        # (a warm pipeline worker initializes it once for every stage)
+        self.qgs = QgsApplication.instance()
+        self._owns_qgs = self.qgs is None
+        if self._owns_qgs:
+            QgsApplication.setPrefixPath('/usr', True)
+            self.qgs = QgsApplication([], False)
+            self.qgs.initQgis()
 
         self.project = QgsProject.instance()
 
@@ -59,23 +100,11 @@ class QGISProjectGenerator:
         """
         logging.info("Creating temperature layer style...")
 
-        # Define color ramp for temperature
+        # Define color ramp for temperature; the ramp items are built once
         shader = QgsRasterShader()
         color_ramp = QgsColorRampShader()
         color_ramp.setColorRampType(QgsColorRampShader.Interpolated)
-
-        # Temperature gradient: blue (cool) -> red (hot)
-        color_ramp_items = [
-            QgsColorRampShader.ColorRampItem(20, QColor('#2166ac'), '20°C'),
-            QgsColorRampShader.ColorRampItem(25, QColor('#4393c3'), '25°C'),
-            QgsColorRampShader.ColorRampItem(30, QColor('#92c5de'), '30°C'),
-            QgsColorRampShader.ColorRampItem(35, QColor('#fddbc7'), '35°C'),
-            QgsColorRampShader.ColorRampItem(40, QColor('#f4a582'), '40°C'),
-            QgsColorRampShader.ColorRampItem(45, QColor('#d6604d'), '45°C'),
-            QgsColorRampShader.ColorRampItem(50, QColor('#b2182b'), '50°C'),
-        ]
-
-        color_ramp.setColorRampItemList(color_ramp_items)
+        color_ramp.setColorRampItemList(_temperature_ramp_items())
         shader.setRasterShaderFunction(color_ramp)
 
         # Create renderer
@@ -93,25 +122,8 @@ class QGISProjectGenerator:
         # Create graduated renderer based on severity
         field_name = 'severity'
 
-        # Define ranges
-        ranges = [
-            QgsRendererRange(
-                0, 1,
-                QgsSymbol.defaultSymbol(layer.geometryType()),
-                'Moderate',
-                True
-            ),
-            QgsRendererRange(
-                1, 2,
-                QgsSymbol.defaultSymbol(layer.geometryType()),
-                'High',
-                True
-            )
-        ]
-
-        # Set colors
-        ranges[0].symbol().setColor(QColor('#fdae61'))  # Orange
-        ranges[1].symbol().setColor(QColor('#d73027'))  # Red
+        # Ranges are built once per geometry type; the renderer copies them
+        ranges = _heat_island_ranges(layer.geometryType())
 
         # Create renderer
         renderer = QgsGraduatedSymbolRenderer(field_name, ranges)
@@ -264,13 +276,22 @@ class QGISProjectGenerator:
         """
         Clean up QGIS application
         """
-        self.qgs.exitQgis()
+        if self._owns_qgs:
+            self.qgs.exitQgis()
 
-if __name__ == "__main__":
-    generator = QGISProjectGenerator()
+def run(config=None):
+    """Pipeline stage entry point; config may set project_dir and data_dir"""
+    config = config or {}
+    generator = QGISProjectGenerator(
+        config.get('project_dir', '/app/projects'),
+        config.get('data_dir', '/app/data')
+    )
 
     try:
-        project_file = generator.create_project('urban_heat_island.qgs')
-        print(f"Project created: {project_file}")
+        return {'project_file': generator.create_project('urban_heat_island.qgs')}
     finally:
         generator.cleanup()
+
+if __name__ == "__main__":
+    result = run()
+    print(f"Project created: {result['project_file']}")
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Shared GDAL tuning for the pipeline scripts
+Call configure_gdal() at process entry, before any dataset is opened
+"""
+
+import os
+
+GDAL_CACHE_MAX = 1 << 30  # 1 GiB block cache
+
+GDAL_CONFIG = {
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    'GDAL_NUM_THREADS': 'ALL_CPUS',
+    'VSI_CACHE': 'TRUE',
+}
+
+
+def configure_gdal():
+    """Apply block cache size and config options; falls back to env vars"""
+    try:
+        from osgeo import gdal
+    except ImportError:
+        gdal = None
+
+    if gdal is None:
+        os.environ.setdefault('GDAL_CACHEMAX', str(GDAL_CACHE_MAX // (1 << 20)))
+        for key, value in GDAL_CONFIG.items():
+            os.environ.setdefault(key, value)
+        return
+
+    gdal.SetCacheMax(GDAL_CACHE_MAX)
+    for key, value in GDAL_CONFIG.items():
+        gdal.SetConfigOption(key, value)
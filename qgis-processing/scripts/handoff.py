@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+In-memory handoff of the LST raster between pipeline stages
+Stage 02 leaves its scaled int16 LST in a tmpfs directory (/dev/shm) next to
+the GeoTIFF it writes; stage 03 memory-maps it instead of decoding the COG
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+LST_ARRAY = 'lst.npy'
+LST_META = 'lst.json'
+
+
+def write_lst(handoff_dir, data, geotransform, projection, scale, nodata):
+    """Store the stored-value LST array and its georeferencing"""
+    handoff_dir = Path(handoff_dir)
+    handoff_dir.mkdir(parents=True, exist_ok=True)
+    np.save(handoff_dir / LST_ARRAY, data)
+
+    # Written last: its presence marks a complete handoff
+    (handoff_dir / LST_META).write_text(json.dumps({
+        'geotransform': list(geotransform),
+        'projection': projection,
+        'scale': scale,
+        'nodata': nodata
+    }))
+
+
+def read_lst(handoff_dir):
+    """(read-only memmap of the stored values, metadata), or None if absent"""
+    handoff_dir = Path(handoff_dir)
+    meta_path = handoff_dir / LST_META
+    if not meta_path.exists():
+        return None
+    return np.load(handoff_dir / LST_ARRAY, mmap_mode='r'), json.loads(meta_path.read_text())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Warm worker process for the urban heat island pipeline
+Stage modules are imported once per worker and QGIS is initialized once,
+instead of starting a fresh python3 interpreter for every script. A worker
+that times out or dies is terminated and replaced, never reused
+"""
+
+import os
+import sys
+import importlib
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_qgs = None
+
+
+def init_worker():
+    """Start QGIS once for this worker process"""
+    global _qgs
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    for path in (SCRIPTS_DIR, '/usr/share/qgis/python', '/usr/share/qgis/python/plugins'):
+        if path not in sys.path:
+            sys.path.append(path)
+
+    from qgis.core import QgsApplication
+
+    QgsApplication.setPrefixPath('/usr', True)
+    _qgs = QgsApplication([], False)
+    _qgs.initQgis()
+
+
+def run_stage(module_name, config=None):
+    """Run a pipeline stage module's run(config) and return its result dict"""
+    return importlib.import_module(module_name).run(config or {})
+
+
+class StageTimeout(TimeoutError):
+    """A stage did not finish within its timeout; its worker was terminated"""
+
+
+class StageError(RuntimeError):
+    """A stage raised; the worker itself is still usable"""
+
+
+def _serve(conn):
+    """Worker process loop: run (module_name, config) requests from the pipe"""
+    init_worker()
+    while True:
+        try:
+            module_name, config = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, run_stage(module_name, config)))
+        except Exception as e:
+            conn.send((False, f'{type(e).__name__}: {e}'))
+
+
+class StageWorker:
+    """One warm worker process; stages are sent over a pipe, one at a time"""
+
+    def __init__(self, context):
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def run(self, module_name, config, timeout):
+        """
+        Run a stage and return its result dict
+        Raises StageError if the stage raised, StageTimeout on timeout and
+        EOFError/OSError if the worker died; only after StageError is the
+        worker still usable
+        """
+        self._conn.send((module_name, config))
+        if not self._conn.poll(timeout):
+            raise StageTimeout(f'Timed out after {timeout}s')
+        ok, value = self._conn.recv()
+        if not ok:
+            raise StageError(value)
+        return value
+
+    def terminate(self):
+        """Kill the worker process and wait for it to exit"""
+        self.process.terminate()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self._conn.close()
@@ -4,10 +4,14 @@ Automated scheduling for heat island data updates
 Checks for new Landsat scenes and triggers processing
 """
 
+import os
+import signal
 import schedule
 import time
 import subprocess
+import threading
 import logging
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 
@@ -20,26 +24,54 @@ logging.basicConfig(
     ]
 )
 
+PIPELINE_NICENESS = 10
+PIPELINE_TIMEOUT = 1800  # 30 minute timeout
+
+# Pipeline output is logged line by line as it arrives; only this many
+# trailing lines are kept for the failure report
+OUTPUT_TAIL_LINES = 1000
+
 def run_pipeline():
     """Execute the full processing pipeline"""
     logging.info("🔄 Scheduled pipeline execution starting...")
 
     try:
-        result = subprocess.run(
+        proc = subprocess.Popen(
             ['/app/scripts/run_pipeline.sh'],
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
-            timeout=1800  # 30 minute timeout
+            bufsize=1,
+            start_new_session=True,  # Own process group, so a timeout kills the whole pipeline
+            preexec_fn=lambda: os.nice(PIPELINE_NICENESS)  # Yield CPU to the servers
         )
 
-        if result.returncode == 0:
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            os.killpg(proc.pid, signal.SIGKILL)
+
+        timer = threading.Timer(PIPELINE_TIMEOUT, kill)
+        timer.start()
+        tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        try:
+            with proc.stdout:
+                for line in proc.stdout:
+                    line = line.rstrip('\n')
+                    logging.info(line)
+                    tail.append(line)
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+
+        if timed_out.is_set():
+            logging.error("❌ Pipeline execution timed out")
+        elif returncode == 0:
             logging.info("✅ Pipeline completed successfully")
-            logging.info(result.stdout)
         else:
-            logging.error(f"❌ Pipeline failed: {result.stderr}")
+            logging.error(f"❌ Pipeline failed (exit {returncode}):\n" + '\n'.join(tail))
 
-    except subprocess.TimeoutExpired:
-        logging.error("❌ Pipeline execution timed out")
     except Exception as e:
         logging.error(f"❌ Error running pipeline: {str(e)}")
 
@@ -75,6 +107,9 @@ if __name__ == "__main__":
     logging.info("🕐 Urban Heat Island Data Scheduler Started")
     logging.info("=" * 60)
 
+    # Inherited by the pipeline scripts: skip directory listings on every GDAL open
+    os.environ.setdefault('GDAL_DISABLE_READDIR_ON_OPEN', 'EMPTY_DIR')
+
     # Schedule jobs
     # Check for new data every day at 2 AM
     schedule.every().day.at("02:00").do(check_new_landsat_data)
@@ -90,7 +125,8 @@ if __name__ == "__main__":
     logging.info("   - Daily data check: 2:00 AM")
     logging.info("   - Weekly pipeline: Sunday 3:00 AM")
 
-    # Keep running
+    # Keep running; sleep exactly until the next job is due instead of polling
     while True:
         schedule.run_pending()
-        time.sleep(60)  # Check every minute
+        idle = schedule.idle_seconds()
+        time.sleep(max(idle, 1) if idle is not None else 3600)
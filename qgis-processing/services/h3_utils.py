@@ -0,0 +1,169 @@
+"""
+H3 helpers shared by the hexagon services
+"""
+
+from functools import lru_cache
+import json
+
+# Integer H3 API: cells are 64-bit ints internally, strings only in output
+from h3.api import basic_int as h3
+import numpy as np
+
+# Optional columnar (GeoArrow over Arrow IPC) output for clients that can read it
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+ARROW_STREAM_MIME = 'application/vnd.apache.arrow.stream'
+ARROW_AVAILABLE = pa is not None
+
+# Numeric Arrow columns are int16 in units of 0.01 (°C, ft, m); the scale is
+# recorded on each field, clients multiply by it. Columns whose magnitude does
+# not fit in int16 hundredths are shipped as float32 without a scale
+ARROW_VALUE_SCALE = 0.01
+ARROW_INT16_LIMIT = 327.67
+
+# Bounds are snapped to this many decimals (~10 m) before caching so the
+# same map view always hits the same cache entry
+BOUNDS_DECIMALS = 4
+
+
+def cells_for_bounds(bounds, resolution):
+    """
+    H3 cells (center inside) covering a bounding box, cached per rounded bbox
+
+    Args:
+        bounds: Dict with 'north', 'south', 'east', 'west' keys
+        resolution: H3 resolution
+
+    Returns:
+        Tuple of H3 cell IDs (ints)
+    """
+    return _cells_for_bounds(
+        round(bounds['west'], BOUNDS_DECIMALS), round(bounds['south'], BOUNDS_DECIMALS),
+        round(bounds['east'], BOUNDS_DECIMALS), round(bounds['north'], BOUNDS_DECIMALS),
+        resolution
+    )
+
+
+@lru_cache(maxsize=1024)
+def _cells_for_bounds(west, south, east, north, resolution):
+    # GeoJSON polygon, lon/lat order, counter-clockwise
+    polygon_geojson = {
+        'type': 'Polygon',
+        'coordinates': [[
+            [west, south],
+            [east, south],
+            [east, north],
+            [west, north],
+            [west, south]
+        ]]
+    }
+
+    # Use h3 v4 API (geo_to_cells)
+    return tuple(h3.geo_to_cells(polygon_geojson, resolution))
+
+
+def cell_centers(cells):
+    """Cell centers as an (N, 2) float64 array of [lat, lon] rows"""
+    return np.array([h3.cell_to_latlng(cell) for cell in cells], dtype=np.float64).reshape(-1, 2)
+
+
+def cell_boundaries(cells):
+    """h3 boundaries (tuples of (lat, lon) vertices), one per cell"""
+    return [h3.cell_to_boundary(cell) for cell in cells]
+
+
+def closed_rings(boundaries):
+    """
+    Convert h3.cell_to_boundary outputs to closed GeoJSON rings
+
+    h3 returns (lat, lon) vertices; GeoJSON needs [[lon, lat], ...] with
+    first = last. All six-vertex cells are flipped and closed as one
+    (N, 7, 2) array; pentagons and distorted cells (other vertex counts)
+    take the per-ring path.
+
+    Args:
+        boundaries: Sequence of h3 boundaries
+
+    Returns:
+        List of rings (lists of [lon, lat] pairs), same order as boundaries
+    """
+    rings = [None] * len(boundaries)
+
+    hex_idx = [i for i, b in enumerate(boundaries) if len(b) == 6]
+    if hex_idx:
+        b = np.array([boundaries[i] for i in hex_idx], dtype=np.float64)[..., ::-1]
+        for i, ring in zip(hex_idx, np.concatenate([b, b[:, :1]], axis=1).tolist()):
+            rings[i] = ring
+
+    for i, boundary in enumerate(boundaries):
+        if rings[i] is None:
+            ring = [[lon, lat] for lat, lon in boundary]
+            ring.append(ring[0])
+            rings[i] = ring
+
+    return rings
+
+
+def hexagons_to_arrow(hex_ids, rings, columns, properties=None):
+    """
+    Encode a hexagon layer as a single-batch Arrow IPC stream
+
+    Geometry is a native GeoArrow polygon column (list<list<struct<x, y>>>),
+    numeric attributes are int16 hundredths (ARROW_VALUE_SCALE, float32 when
+    out of range) and the collection-level properties are stored as JSON in
+    the schema metadata.
+
+    Args:
+        hex_ids: Sequence of integer H3 cells
+        rings: Closed [lon, lat] rings, as returned by closed_rings
+        columns: Dict of column name -> per-hexagon values
+        properties: Optional dict of collection-level properties
+
+    Returns:
+        IPC stream bytes
+    """
+    if pa is None:
+        raise RuntimeError('pyarrow is not installed')
+
+    ring_offsets = np.zeros(len(rings) + 1, dtype=np.int32)
+    np.cumsum([len(ring) for ring in rings], out=ring_offsets[1:])
+    xy = np.array([point for ring in rings for point in ring], dtype=np.float64).reshape(-1, 2)
+
+    vertices = pa.StructArray.from_arrays([pa.array(xy[:, 0]), pa.array(xy[:, 1])], names=['x', 'y'])
+    polygon_rings = pa.ListArray.from_arrays(pa.array(ring_offsets), vertices)
+    polygons = pa.ListArray.from_arrays(pa.array(np.arange(len(rings) + 1, dtype=np.int32)), polygon_rings)
+
+    fields = [pa.field('hex_id', pa.uint64())]
+    arrays = [pa.array(np.asarray(hex_ids, dtype=np.uint64))]
+    for name, values in columns.items():
+        array = pa.array(values)
+        if pa.types.is_floating(array.type):
+            values = np.asarray(values, dtype=np.float32)
+            if values.size == 0 or np.abs(values).max() < ARROW_INT16_LIMIT:
+                # Values are already rounded to 0.01; ship them as int16 hundredths
+                hundredths = np.rint(values / ARROW_VALUE_SCALE).astype(np.int16)
+                fields.append(pa.field(name, pa.int16(), metadata={'scale': str(ARROW_VALUE_SCALE)}))
+                arrays.append(pa.array(hundredths))
+            else:
+                # Out of int16 range (or NaN): casting would wrap
+                fields.append(pa.field(name, pa.float32()))
+                arrays.append(pa.array(values))
+        else:
+            fields.append(pa.field(name, array.type))
+            arrays.append(array)
+
+    fields.append(pa.field('geometry', polygons.type, metadata={
+        'ARROW:extension:name': 'geoarrow.polygon',
+        'ARROW:extension:metadata': '{"crs": "OGC:CRS84"}'
+    }))
+    arrays.append(polygons)
+
+    schema = pa.schema(fields, metadata={'properties': json.dumps(properties or {})})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+    return sink.getvalue().to_pybytes()
@@ -8,17 +8,80 @@ Data source: s3://nasa-nex-gddp-cmip6/
 Documentation: https://www.nccs.nasa.gov/services/data-collections/land-based-products/nex-gddp-cmip6
 """
 
-import xarray as xr
 import numpy as np
-import h3
-from shapely.geometry import Polygon
+# Integer H3 API: cells are 64-bit ints internally, strings only in output
+from h3.api import basic_int as h3
+from contextlib import contextmanager
+from functools import lru_cache
 from datetime import datetime
 import logging
+import hashlib
+import json
 import os
 
+from h3_utils import cell_boundaries, cell_centers, cells_for_bounds, closed_rings, hexagons_to_arrow
+
+# Optional: kerchunk reference files let xarray read NetCDF4/HDF5 chunks on
+# S3 directly through the zarr engine instead of walking HDF5 over HTTP
+try:
+    from kerchunk.hdf import SingleHdf5ToZarr
+except ImportError:
+    SingleHdf5ToZarr = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Dask chunking for the daily NEX-GDDP cubes: whole time axis per chunk so
+# the 20-year mean is a single reduction, 256x256 spatial tiles so a
+# city-scale bbox touches only a handful of them
+NASA_CHUNKS = {'time': -1, 'lat': 256, 'lon': 256}
+
+
+@lru_cache(maxsize=64)
+def _simulated_spatial_field(hex_ids):
+    """
+    Spatially varying part of the simulated anomaly for a set of cells
+
+    Cached per cell set (the tuple from cells_for_bounds), so repeat
+    requests for the same view skip the h3 lookups and all of the trig.
+
+    Returns:
+        (centers list of [lat, lon], boundaries, read-only (N,) float64 field)
+    """
+    # All hexagon centers as (N,) arrays so every term below is one
+    # vectorized expression instead of a scalar ufunc call per hexagon
+    centers = cell_centers(hex_ids)
+    lats, lons = centers[:, 0], centers[:, 1]
+    abs_lats = np.abs(lats)
+
+    # More realistic spatial variation based on latitude and geography
+    # Polar amplification: higher latitudes warm more
+    lat_effect = (abs_lats / 45) * np.where(abs_lats > 45, 1.8, 0.8)
+
+    # Ocean vs land effect (simplified): areas near coasts have moderated warming
+    coastal_effect = np.sin(lons * 2.5 + lats * 1.7) * 0.3
+
+    # Continental effect: interior regions have higher variability
+    continental_effect = np.cos(lats * 3.2 - lons * 2.1) * 0.4
+
+    # Perlin-like noise for realistic spatial variation
+    noise1 = np.sin(lats * 7.13 + lons * 5.27) * np.cos(lats * 3.97 - lons * 8.41) * 0.5
+    noise2 = np.sin(lats * 13.71 - lons * 11.39) * np.cos(lats * 19.13 + lons * 7.23) * 0.25
+    noise3 = np.sin(lats * 23.45 + lons * 17.83) * 0.15
+
+    # Urban heat island effect (simplified)
+    urban_factor = np.abs(np.sin(lats * 43.7) * np.cos(lons * 51.3)) * 0.6
+
+    # Combine all spatial factors; the base projection is added per request
+    spatial_effect = (lat_effect +
+                      coastal_effect +
+                      continental_effect +
+                      noise1 + noise2 + noise3 +
+                      urban_factor)
+    spatial_effect.flags.writeable = False
+
+    return centers.tolist(), cell_boundaries(hex_ids), spatial_effect
+
 
 class NASAClimateService:
     """Service for fetching and processing NASA NEX-GDDP-CMIP6 climate projections"""
@@ -50,7 +113,7 @@ class NASAClimateService:
         os.makedirs(cache_dir, exist_ok=True)
 
     def get_temperature_projection(self, bounds, year=2050, scenario='rcp45',
-                                   resolution=7, use_simulated=True):
+                                   resolution=7, use_simulated=True, output_format='geojson'):
         """
         Get temperature projection data for a bounding box
 
@@ -60,6 +123,8 @@ class NASAClimateService:
             scenario: Climate scenario ('rcp26', 'rcp45', 'rcp85')
             resolution: H3 hexagon resolution (0-15, default 7 = ~5km diameter)
             use_simulated: If True, use simulated data (for development/testing)
+            output_format: 'geojson' (default), 'arrow' for GeoArrow IPC bytes or
+                'ndjson' for an iterator of GeoJSON Features
 
         Returns:
             GeoJSON FeatureCollection with hexagonal temperature anomalies
@@ -67,11 +132,16 @@ class NASAClimateService:
 
         if use_simulated:
             logger.info(f"Using simulated data for {year}, scenario {scenario}")
-            return self._generate_simulated_data(bounds, year, scenario, resolution)
+            return self._generate_simulated_data(bounds, year, scenario, resolution, output_format)
 
         try:
             logger.info(f"Fetching NASA data: year={year}, scenario={scenario}")
 
+            # xarray (pandas, netCDF backends) is only imported on the real-data
+            # path; h5netcdf is checked here so a missing engine falls back cleanly
+            import xarray as xr
+            import h5netcdf  # noqa: F401
+
             # Map RCP to SSP scenario
             ssp_scenario = self.SCENARIOS.get(scenario, 'ssp245')
 
@@ -82,44 +152,117 @@ class NASAClimateService:
             s3_path = self._construct_s3_path('tasmax', ssp_scenario,
                                              self.DEFAULT_MODEL, time_range)
 
-            logger.info(f"Opening dataset: {s3_path}")
+            # The time-mean anomaly grid depends only on these inputs, so
+            # repeat requests for the same area never go back to S3
+            cache_file = self._anomaly_cache_path(ssp_scenario, time_range, bounds)
 
-            # Open dataset with anonymous S3 access using fsspec
-            import s3fs
-            fs = s3fs.S3FileSystem(anon=True)
+            if os.path.exists(cache_file):
+                logger.info(f"Using cached anomalies: {cache_file}")
+                anomalies = xr.load_dataarray(cache_file, engine='h5netcdf')
+            else:
+                logger.info(f"Opening dataset: {s3_path}")
 
-            with fs.open(s3_path, 'rb') as f:
-                ds = xr.open_dataset(f, engine='h5netcdf')
+                with self._open_dataset(s3_path) as ds:
+                    # Extract bounding box
+                    lat_slice = slice(bounds['south'], bounds['north'])
+                    lon_slice = slice(bounds['west'], bounds['east'])
 
-                # Extract bounding box
-                lat_slice = slice(bounds['south'], bounds['north'])
-                lon_slice = slice(bounds['west'], bounds['east'])
+                    # Subset first, then reduce over time; still lazy
+                    temp_data = ds['tasmax'].sel(
+                        lat=lat_slice,
+                        lon=lon_slice
+                    ).mean(dim='time')
 
-                # Select data and compute mean over time
-                temp_data = ds['tasmax'].sel(
-                    lat=lat_slice,
-                    lon=lon_slice
-                ).mean(dim='time')
+                    # Convert from Kelvin to Celsius and calculate anomaly
+                    # relative to baseline, then read only the bbox chunks once
+                    anomalies = (temp_data - 273.15 - self.BASELINE_TEMP_C).compute()
 
-                # Convert from Kelvin to Celsius
-                temp_celsius = temp_data - 273.15
+                self._write_anomaly_cache(anomalies, cache_file)
 
-                # Calculate anomaly relative to baseline
-                anomalies = temp_celsius - self.BASELINE_TEMP_C
+            # Generate hexagonal grid
+            hexagons = self._create_hex_grid(bounds, anomalies, resolution)
 
-                # Generate hexagonal grid
-                hexagons = self._create_hex_grid(
-                    bounds, anomalies, resolution
-                )
-
-                ds.close()
-
-            return self._to_geojson(hexagons, year, scenario, ssp_scenario)
+            return self._to_output(hexagons, year, scenario, ssp_scenario, output_format)
 
         except Exception as e:
             logger.error(f"Error fetching NASA data: {str(e)}")
             logger.info("Falling back to simulated data")
-            return self._generate_simulated_data(bounds, year, scenario, resolution)
+            return self._generate_simulated_data(bounds, year, scenario, resolution, output_format)
+
+    @contextmanager
+    def _open_dataset(self, s3_path):
+        """
+        Open a remote NetCDF as a dask-backed Dataset (anonymous S3 access)
+
+        With kerchunk installed the HDF5 chunk index is read once into a
+        reference JSON cached under cache_dir, and xarray then fetches only
+        the chunk byte ranges it needs through the zarr engine. Otherwise the
+        file is read through s3fs + h5netcdf, walking the HDF5 B-trees over
+        HTTP on every open.
+        """
+        import xarray as xr
+
+        # Dask-backed so nothing is read until the bbox subset and
+        # time mean have been composed into one graph
+        if SingleHdf5ToZarr is not None:
+            storage_options = {
+                'fo': self._kerchunk_references(s3_path),
+                'remote_protocol': 's3',
+                'remote_options': {'anon': True}
+            }
+            with xr.open_dataset('reference://', engine='zarr', chunks=NASA_CHUNKS,
+                                 backend_kwargs={'consolidated': False,
+                                                 'storage_options': storage_options}) as ds:
+                yield ds
+            return
+
+        import s3fs
+        fs = s3fs.S3FileSystem(anon=True)
+
+        with fs.open(s3_path, 'rb') as f, \
+                xr.open_dataset(f, engine='h5netcdf', chunks=NASA_CHUNKS) as ds:
+            yield ds
+
+    def _kerchunk_references(self, s3_path):
+        """Kerchunk reference set for a remote NetCDF, generated once per file"""
+        refs_file = os.path.join(self.cache_dir, os.path.basename(s3_path) + '.refs.json')
+
+        if os.path.exists(refs_file):
+            with open(refs_file) as f:
+                return json.load(f)
+
+        logger.info(f"Indexing HDF5 chunks for {s3_path}")
+        import s3fs
+        fs = s3fs.S3FileSystem(anon=True)
+        with fs.open(s3_path, 'rb') as f:
+            refs = SingleHdf5ToZarr(f, s3_path).translate()
+
+        # Write-then-rename so concurrent requests never read a partial file
+        tmp_file = f"{refs_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(refs, f)
+        os.replace(tmp_file, refs_file)
+
+        return refs
+
+    def _anomaly_cache_path(self, ssp_scenario, time_range, bounds):
+        """Local cache file for one (model, scenario, period, bbox) anomaly grid"""
+        rounded = tuple(round(bounds[k], 4) for k in ('north', 'south', 'east', 'west'))
+        key = hashlib.sha1(
+            repr((self.DEFAULT_MODEL, ssp_scenario, time_range, rounded)).encode()
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"anomalies_{key}.nc")
+
+    def _write_anomaly_cache(self, anomalies, cache_file):
+        """Store an anomaly grid as float32 NetCDF; failures only cost the cache"""
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            anomalies.astype(np.float32).rename('anomaly').to_netcdf(tmp_file, engine='h5netcdf')
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            logger.warning(f"Could not cache anomalies: {str(e)}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
 
     def _construct_s3_path(self, variable, scenario, model, time_range):
         """Construct S3 path to NetCDF file"""
@@ -153,64 +296,59 @@ class NASAClimateService:
         Returns:
             List of dicts with hex geometry and properties
         """
-        hexagons = []
+        import xarray as xr
 
         # Get all hexagons covering the bounding box
-        hex_ids = self._get_hexagons_in_bounds(bounds, resolution)
-
-        for hex_id in hex_ids:
-            # Get hexagon center
-            lat, lon = h3.cell_to_latlng(hex_id)
-
-            # Get hexagon boundary
-            boundary = h3.cell_to_boundary(hex_id)
+        hex_ids = cells_for_bounds(bounds, resolution)
+        centers = cell_centers(hex_ids)
+        boundaries = cell_boundaries(hex_ids)
+
+        # Sample temperature at every hex center with one pointwise selection
+        # along a shared 'hex' dimension instead of one .sel() per hexagon
+        lat_da = xr.DataArray(centers[:, 0], dims='hex')
+        lon_da = xr.DataArray(centers[:, 1], dims='hex')
+        # Nearest-neighbour snaps out-of-grid centers to the edge; only an
+        # empty subset (bbox smaller than one grid cell) has nothing to sample
+        if temp_data.size:
+            temp_anomaly = np.asarray(
+                temp_data.sel(lat=lat_da, lon=lon_da, method='nearest').data,
+                dtype=np.float64
+            )
+            # Missing (masked) grid values default to 0.0
+            np.nan_to_num(temp_anomaly, copy=False, nan=0.0)
+        else:
+            temp_anomaly = np.zeros(len(hex_ids))
 
-            # Sample temperature at hex center
-            try:
-                temp_anomaly = float(
-                    temp_data.sel(lat=lat, lon=lon, method='nearest').values
-                )
-            except:
-                temp_anomaly = 0.0  # Default if sampling fails
+        temp_c = np.round(temp_anomaly, 2).tolist()
+        temp_f = np.round(temp_anomaly * 1.8, 2).tolist()  # Celsius to Fahrenheit
 
-            hexagons.append({
+        return [
+            {
                 'hex_id': hex_id,
                 'center': [lon, lat],
                 'boundary': boundary,
-                'temp_anomaly': round(temp_anomaly, 2),
-                'temp_anomaly_f': round(temp_anomaly * 1.8, 2)  # Celsius to Fahrenheit
-            })
-
-        return hexagons
-
-    def _get_hexagons_in_bounds(self, bounds, resolution):
-        """Get all H3 hexagons covering a bounding box"""
-        # Create polygon from bounds (lon, lat order)
-        polygon_geojson = {
-            'type': 'Polygon',
-            'coordinates': [[
-                [bounds['west'], bounds['south']],
-                [bounds['east'], bounds['south']],
-                [bounds['east'], bounds['north']],
-                [bounds['west'], bounds['north']],
-                [bounds['west'], bounds['south']]
-            ]]
-        }
-
-        # Use h3 v4 API (geo_to_cells)
-        hex_ids = h3.geo_to_cells(polygon_geojson, resolution)
-
-        return list(hex_ids)
+                'temp_anomaly': c,
+                'temp_anomaly_f': f
+            }
+            for hex_id, (lat, lon), boundary, c, f in zip(hex_ids, centers.tolist(), boundaries, temp_c, temp_f)
+        ]
 
     def _to_geojson(self, hexagons, year, scenario, ssp_scenario):
         """Convert hexagons to GeoJSON FeatureCollection"""
-        features = []
+        features = list(self._iter_features(hexagons))
+
+        return {
+            'type': 'FeatureCollection',
+            'features': features,
+            'properties': self._collection_properties(year, scenario, ssp_scenario)
+        }
 
-        for hex_data in hexagons:
-            # H3 boundary returns coords as [lat, lon], need to flip to [lon, lat]
-            coords = [[lon, lat] for lat, lon in hex_data['boundary']]
-            coords.append(coords[0])  # Close the polygon
+    def _iter_features(self, hexagons):
+        """Yield one GeoJSON Feature per hexagon, built on demand"""
+        # H3 boundaries are [lat, lon]; flip and close them all in one pass
+        rings = closed_rings([hex_data['boundary'] for hex_data in hexagons])
 
+        for hex_data, coords in zip(hexagons, rings):
             feature = {
                 'type': 'Feature',
                 'geometry': {
@@ -223,27 +361,52 @@ class NASAClimateService:
                     'baseline': self.BASELINE_TEMP_C,
                     'projected': round(self.BASELINE_TEMP_C + hex_data['temp_anomaly'], 2),
                     'center': hex_data['center'],
-                    'hexId': hex_data['hex_id'],
+                    'hexId': h3.int_to_str(hex_data['hex_id']),
                     'source': f'NASA NEX-GDDP-CMIP6 ({self.DEFAULT_MODEL})'
                 }
             }
-            features.append(feature)
+            yield feature
+
+    def _to_arrow(self, hexagons, year, scenario, ssp_scenario):
+        """Convert hexagons to a GeoArrow IPC stream (same values as _to_geojson)"""
+        rings = closed_rings([hex_data['boundary'] for hex_data in hexagons])
+        temp_anomaly = np.array([hex_data['temp_anomaly'] for hex_data in hexagons], dtype=np.float64)
+
+        return hexagons_to_arrow(
+            [hex_data['hex_id'] for hex_data in hexagons],
+            rings,
+            {
+                'tempAnomaly': temp_anomaly,
+                'tempAnomalyF': [hex_data['temp_anomaly_f'] for hex_data in hexagons],
+                'projected': np.round(self.BASELINE_TEMP_C + temp_anomaly, 2)
+            },
+            {
+                **self._collection_properties(year, scenario, ssp_scenario),
+                'baseline': self.BASELINE_TEMP_C
+            }
+        )
+
+    def _to_output(self, hexagons, year, scenario, ssp_scenario, output_format):
+        """Encode hexagons as GeoJSON (default), Arrow ('arrow') or a feature iterator ('ndjson')"""
+        if output_format == 'arrow':
+            return self._to_arrow(hexagons, year, scenario, ssp_scenario)
+        if output_format == 'ndjson':
+            return self._iter_features(hexagons)
+        return self._to_geojson(hexagons, year, scenario, ssp_scenario)
 
+    def _collection_properties(self, year, scenario, ssp_scenario):
+        """Collection-level properties shared by every output format"""
         return {
-            'type': 'FeatureCollection',
-            'features': features,
-            'properties': {
-                'source': f'NASA NEX-GDDP-CMIP6',
-                'model': self.DEFAULT_MODEL,
-                'scenario': scenario,
-                'ssp_scenario': ssp_scenario,
-                'year': year,
-                'baselinePeriod': '1986-2005',
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            }
+            'source': f'NASA NEX-GDDP-CMIP6',
+            'model': self.DEFAULT_MODEL,
+            'scenario': scenario,
+            'ssp_scenario': ssp_scenario,
+            'year': year,
+            'baselinePeriod': '1986-2005',
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
 
-    def _generate_simulated_data(self, bounds, year, scenario, resolution):
+    def _generate_simulated_data(self, bounds, year, scenario, resolution, output_format='geojson'):
         """
         Generate simulated temperature projection data for development/testing
         Mimics the structure of real NASA data
@@ -263,46 +426,27 @@ class NASAClimateService:
                            (config['increase2100'] - config['increase2050']) * year_progress
 
         # Get hexagons covering the area
-        hex_ids = self._get_hexagons_in_bounds(bounds, resolution)
-
-        hexagons = []
-        for hex_id in hex_ids:
-            lat, lon = h3.cell_to_latlng(hex_id)
-            boundary = h3.cell_to_boundary(hex_id)
+        hex_ids = cells_for_bounds(bounds, resolution)
 
-            # More realistic spatial variation based on latitude and geography
-            # Polar amplification: higher latitudes warm more
-            lat_effect = (abs(lat) / 45) * 1.8 if abs(lat) > 45 else (abs(lat) / 45) * 0.8
+        # Geography-only terms depend on the cells alone; year and scenario
+        # only shift the result by projected_increase
+        centers, boundaries, spatial_effect = _simulated_spatial_field(hex_ids)
+        temp_anomaly = projected_increase + spatial_effect
 
-            # Ocean vs land effect (simplified): areas near coasts have moderated warming
-            coastal_effect = np.sin(lon * 2.5 + lat * 1.7) * 0.3
+        # Round once over the arrays; tolist() hands back plain Python floats
+        temp_c = np.round(temp_anomaly, 2).tolist()
+        temp_f = np.round(temp_anomaly * 1.8, 2).tolist()
 
-            # Continental effect: interior regions have higher variability
-            continental_effect = np.cos(lat * 3.2 - lon * 2.1) * 0.4
-
-            # Perlin-like noise for realistic spatial variation
-            noise1 = np.sin(lat * 7.13 + lon * 5.27) * np.cos(lat * 3.97 - lon * 8.41) * 0.5
-            noise2 = np.sin(lat * 13.71 - lon * 11.39) * np.cos(lat * 19.13 + lon * 7.23) * 0.25
-            noise3 = np.sin(lat * 23.45 + lon * 17.83) * 0.15
-
-            # Urban heat island effect (simplified)
-            urban_factor = abs(np.sin(lat * 43.7) * np.cos(lon * 51.3)) * 0.6
-
-            # Combine all factors with the base projection
-            temp_anomaly = (projected_increase +
-                          lat_effect +
-                          coastal_effect +
-                          continental_effect +
-                          noise1 + noise2 + noise3 +
-                          urban_factor)
-
-            hexagons.append({
+        hexagons = [
+            {
                 'hex_id': hex_id,
                 'center': [lon, lat],
                 'boundary': boundary,
-                'temp_anomaly': round(temp_anomaly, 2),
-                'temp_anomaly_f': round(temp_anomaly * 1.8, 2)
-            })
+                'temp_anomaly': c,
+                'temp_anomaly_f': f
+            }
+            for hex_id, (lat, lon), boundary, c, f in zip(hex_ids, centers, boundaries, temp_c, temp_f)
+        ]
 
         ssp_scenario = self.SCENARIOS.get(scenario, 'ssp245')
-        return self._to_geojson(hexagons, year, scenario, ssp_scenario)
+        return self._to_output(hexagons, year, scenario, ssp_scenario, output_format)
@@ -4,14 +4,84 @@ NOAA Sea Level Rise Service
 Converts NOAA sea level rise data into hexagonal grids using H3.
 """
 
-import h3
+# Integer H3 API: cells are 64-bit ints internally, strings only in output
+from h3.api import basic_int as h3
 import numpy as np
 import requests
 import logging
+import math
 from datetime import datetime
 
+from h3_utils import cell_boundaries, cell_centers, cells_for_bounds, closed_rings, hexagons_to_arrow
+
 logger = logging.getLogger(__name__)
 
+# Optional JIT for the per-hexagon flood kernel
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# Coastal zones with simulated flooding (approximate), one row per zone:
+# south, north, west, east, reference coastline longitude, and the longitude
+# span that normalizes distance from that coastline
+COASTAL_ZONES = np.array([
+    [40.4, 40.9, -74.3, -73.7, -74.0, 0.3],     # NYC/Long Island: Hudson River/harbor
+    [25.6, 25.9, -80.3, -80.1, -80.2, 0.1],     # Miami: Atlantic coast
+    [37.4, 37.9, -122.6, -122.2, -122.4, 0.2],  # SF Bay
+])
+
+
+def _flood_depth_numpy(lats, lons, max_feet, zones):
+    """NumPy fallback for _flood_depth_kernel"""
+    # (N, zones) membership in one broadcast pass; argmax picks the first
+    # matching zone and the coastline/span are gathered from the table
+    lat_col = lats[:, None]
+    lon_col = lons[:, None]
+    in_zone = ((lat_col >= zones[:, 0]) & (lat_col <= zones[:, 1]) &
+               (lon_col >= zones[:, 2]) & (lon_col <= zones[:, 3]))
+    zone_idx = in_zone.argmax(axis=1)
+
+    # distance_factor is 1.0 (beyond the 0.1 cutoff) outside every zone
+    distance_factor = np.abs(lons - zones[zone_idx, 4]) / zones[zone_idx, 5]
+    distance_factor[~in_zone.any(axis=1)] = 1.0
+
+    normalized_distance = distance_factor / 0.1
+    depth = max_feet * (1 - normalized_distance * 0.8)
+
+    seed = np.sin((lats * 17.23 + lons * 41.17) * 0.0174533) * 43758.5453
+    depth += (seed - np.floor(seed) - 0.5) * 0.5
+
+    np.clip(depth, 0, max_feet, out=depth)
+    depth[distance_factor > 0.1] = 0
+    return depth
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _flood_depth_kernel(lats, lons, max_feet, zones):
+        """Per-hexagon flood depth (feet) for arrays of hex centers"""
+        depth = np.zeros(lats.shape[0])
+        for i in prange(lats.shape[0]):
+            lat = lats[i]
+            lon = lons[i]
+            distance_factor = 1.0
+            for z in range(zones.shape[0]):
+                if zones[z, 0] <= lat <= zones[z, 1] and zones[z, 2] <= lon <= zones[z, 3]:
+                    distance_factor = abs(lon - zones[z, 4]) / zones[z, 5]
+                    break
+
+            if distance_factor > 0.1:
+                continue
+
+            d = max_feet * (1 - (distance_factor / 0.1) * 0.8)
+            seed = math.sin((lat * 17.23 + lon * 41.17) * 0.0174533) * 43758.5453
+            d += (seed - math.floor(seed) - 0.5) * 0.5
+            depth[i] = min(max(d, 0.0), max_feet)
+        return depth
+else:
+    _flood_depth_kernel = _flood_depth_numpy
+
 
 class NOAASeaLevelService:
     """Service for fetching and processing NOAA sea level rise data"""
@@ -19,7 +89,8 @@ class NOAASeaLevelService:
     def __init__(self):
         self.base_url = "https://coast.noaa.gov/arcgis/rest/services/dc_slr"
 
-    def get_sea_level_hexagons(self, bounds, feet=3, resolution=9, use_depth_data=True):
+    def get_sea_level_hexagons(self, bounds, feet=3, resolution=9, use_depth_data=True,
+                               output_format='geojson'):
         """
         Get sea level rise data as hexagonal grid
 
@@ -28,6 +99,8 @@ class NOAASeaLevelService:
             feet: Sea level rise in feet (0-10)
             resolution: H3 hexagon resolution (9-10 for small hexagons)
             use_depth_data: If True, fetch depth grid data. If False, use extent only.
+            output_format: 'geojson' (default), 'arrow' for GeoArrow IPC bytes or
+                'ndjson' for an iterator of GeoJSON Features
 
         Returns:
             Dict with GeoJSON FeatureCollection of hexagons
@@ -39,6 +112,10 @@ class NOAASeaLevelService:
             # In production, this would query NOAA's actual depth grid
             hexagons = self._generate_hexagons_with_depth(bounds, feet, resolution)
 
+            if output_format == 'arrow':
+                return self._to_arrow(hexagons, feet)
+            if output_format == 'ndjson':
+                return self._iter_features(hexagons)
             return self._to_geojson(hexagons, feet)
 
         except Exception as e:
@@ -51,123 +128,101 @@ class NOAASeaLevelService:
 
         In production, this would query NOAA's depth raster service
         """
-        hexagons = []
-
-        # Get all hexagons covering the bounding box
-        hex_ids = self._get_hexagons_in_bounds(bounds, resolution)
+        # Only ask h3 for cells in the parts of the bounding box that can
+        # flood; h3 assigns cells by center, so this is the same set as
+        # filtering the full bbox afterwards
+        hex_ids = []
+        for sub_bounds in self._flood_candidate_bounds(bounds):
+            hex_ids.extend(cells_for_bounds(sub_bounds, resolution))
 
         logger.info(f"Generated {len(hex_ids)} hexagons for sea level analysis")
 
-        for hex_id in hex_ids:
-            # Get hexagon center
-            lat, lon = h3.cell_to_latlng(hex_id)
-
-            # Get hexagon boundary
-            boundary = h3.cell_to_boundary(hex_id)
-
-            # Simulate depth based on proximity to coast and elevation
-            # This is a placeholder - in production would query NOAA raster
-            depth = self._simulate_flood_depth(lat, lon, feet)
-
-            if depth > 0:  # Only include hexagons with flooding
-                hexagons.append({
-                    'hex_id': hex_id,
-                    'center': [lon, lat],
-                    'boundary': boundary,
-                    'depth_ft': round(depth, 2),
-                    'depth_m': round(depth * 0.3048, 2)
-                })
-
-        return hexagons
-
-    def _get_hexagons_in_bounds(self, bounds, resolution):
-        """Get all H3 hexagons covering a bounding box"""
-        # Create polygon from bounds (lon, lat order for GeoJSON)
-        polygon = [
-            [bounds['west'], bounds['south']],
-            [bounds['east'], bounds['south']],
-            [bounds['east'], bounds['north']],
-            [bounds['west'], bounds['north']],
-            [bounds['west'], bounds['south']]
+        # All centers in one pass; boundaries are only fetched for the
+        # (few) flooded hexagons that make it into the output
+        centers = cell_centers(hex_ids)
+
+        # Simulate depth based on proximity to coast and elevation
+        # This is a placeholder - in production would query NOAA raster
+        depths = self._simulate_flood_depth(centers[:, 0], centers[:, 1], feet)
+
+        # Only include hexagons with flooding
+        keep = np.flatnonzero(depths > 0)
+        kept_ids = [hex_ids[i] for i in keep.tolist()]
+        depth_ft = np.round(depths[keep], 2).tolist()
+        depth_m = np.round(depths[keep] * 0.3048, 2).tolist()
+
+        return [
+            {
+                'hex_id': hex_id,
+                'center': [lon, lat],
+                'boundary': boundary,
+                'depth_ft': ft,
+                'depth_m': m
+            }
+            for hex_id, (lat, lon), boundary, ft, m
+            in zip(kept_ids, centers[keep].tolist(), cell_boundaries(kept_ids), depth_ft, depth_m)
         ]
 
-        polygon_geojson = {
-            'type': 'Polygon',
-            'coordinates': [polygon]
-        }
-
-        # Use h3 v4 API
-        hex_ids = h3.geo_to_cells(polygon_geojson, resolution)
+    def _flood_candidate_bounds(self, bounds):
+        """
+        Intersect a bounding box with the floodable strip of each coastal zone
 
-        return list(hex_ids)
+        Flooding needs distance_factor <= 0.1, i.e. within 0.1 * span of
+        the zone's coastline longitude, so only that strip is kept.
+        """
+        sub_bounds = []
+        for south, north, west, east, coast_lon, span in COASTAL_ZONES.tolist():
+            band = 0.1 * span
+            candidate = {
+                'north': min(bounds['north'], north),
+                'south': max(bounds['south'], south),
+                'east': min(bounds['east'], east, coast_lon + band),
+                'west': max(bounds['west'], west, coast_lon - band)
+            }
+            if candidate['north'] > candidate['south'] and candidate['east'] > candidate['west']:
+                sub_bounds.append(candidate)
+        return sub_bounds
 
-    def _simulate_flood_depth(self, lat, lon, max_feet):
+    def _simulate_flood_depth(self, lats, lons, max_feet):
         """
         Simulate flood depth based on location - COASTAL AREAS ONLY
 
         This is a placeholder for actual NOAA depth data.
         In production, would query NOAA's depth grid raster service.
 
-        For now, only simulate flooding in known coastal regions:
-        - NYC area: Near coastlines, harbors, low-lying areas
-        - Should return 0 for inland areas
-        """
-        # Define coastal bounding areas (approximate)
-        # NYC/Long Island coastal zone: 40.4-40.9 N, -74.3 to -73.7 W
-        is_nyc_coastal = (40.4 <= lat <= 40.9 and -74.3 <= lon <= -73.7)
-
-        # Miami area: 25.6-25.9 N, -80.3 to -80.1 W
-        is_miami_coastal = (25.6 <= lat <= 25.9 and -80.3 <= lon <= -80.1)
-
-        # SF Bay area: 37.4-37.9 N, -122.6 to -122.2 W
-        is_sf_coastal = (37.4 <= lat <= 37.9 and -122.6 <= lon <= -122.2)
-
-        # If not in a coastal zone, no flooding
-        if not (is_nyc_coastal or is_miami_coastal or is_sf_coastal):
-            return 0
-
-        # For coastal areas, create realistic flooding patterns
-        # Simulate distance from coastline using coordinate gradients
-        if is_nyc_coastal:
-            # Flood increases closer to -74.0 (Hudson River/harbor)
-            distance_factor = abs(lon + 74.0) / 0.3
-        elif is_miami_coastal:
-            # Flood increases closer to -80.2 (Atlantic coast)
-            distance_factor = abs(lon + 80.2) / 0.1
-        elif is_sf_coastal:
-            # Flood increases closer to -122.4 (Bay)
-            distance_factor = abs(lon + 122.4) / 0.2
-        else:
-            distance_factor = 1.0
-
-        # Only flood very close to coast (within ~0.1 degrees)
-        if distance_factor > 0.1:
-            return 0
-
-        # Calculate depth based on distance and sea level rise
-        # Closer to coast = more flooding
-        normalized_distance = distance_factor / 0.1  # 0 at coast, 1 at 0.1° away
-        depth = max_feet * (1 - normalized_distance * 0.8)  # 80% reduction inland
+        For now, only simulate flooding in known coastal regions
+        (COASTAL_ZONES: NYC, Miami, SF Bay); inland hexagons get 0.
+        Flooding is limited to ~0.1 of the zone span from the reference
+        coastline and decreases by up to 80% away from it, with a small
+        deterministic ±0.25 ft variation.
 
-        # Add small variation for realism
-        seed = np.sin((lat * 17.23 + lon * 41.17) * 0.0174533) * 43758.5453
-        noise = (seed - np.floor(seed) - 0.5) * 0.5  # Small noise ±0.25 feet
-        depth += noise
-
-        # Clamp to valid range
-        depth = max(0, min(max_feet, depth))
+        Args:
+            lats, lons: Arrays of hexagon center coordinates
+            max_feet: Sea level rise in feet
 
-        return depth
+        Returns:
+            Array of depths in feet, same shape as lats
+        """
+        lats = np.ascontiguousarray(lats, dtype=np.float64)
+        lons = np.ascontiguousarray(lons, dtype=np.float64)
+        return _flood_depth_kernel(lats, lons, float(max_feet), COASTAL_ZONES)
 
     def _to_geojson(self, hexagons, feet):
         """Convert hexagons to GeoJSON FeatureCollection"""
-        features = []
+        features = list(self._iter_features(hexagons))
+
+        return {
+            'type': 'FeatureCollection',
+            'features': features,
+            'properties': self._collection_properties(feet)
+        }
 
-        for hex_data in hexagons:
-            # H3 boundary returns coords as [lat, lon], need to flip to [lon, lat]
-            coords = [[lon, lat] for lat, lon in hex_data['boundary']]
-            coords.append(coords[0])  # Close the polygon
+    def _iter_features(self, hexagons):
+        """Yield one GeoJSON Feature per hexagon, built on demand"""
+        # H3 boundaries are [lat, lon]; flip and close them all in one pass
+        rings = closed_rings([hex_data['boundary'] for hex_data in hexagons])
 
+        for hex_data, coords in zip(hexagons, rings):
             feature = {
                 'type': 'Feature',
                 'geometry': {
@@ -178,18 +233,28 @@ class NOAASeaLevelService:
                     'depth_ft': hex_data['depth_ft'],
                     'depth_m': hex_data['depth_m'],
                     'center': hex_data['center'],
-                    'hexId': hex_data['hex_id'],
+                    'hexId': h3.int_to_str(hex_data['hex_id']),
                     'source': 'NOAA Sea Level Rise (simulated)'
                 }
             }
-            features.append(feature)
-
+            yield feature
+
+    def _to_arrow(self, hexagons, feet):
+        """Convert hexagons to a GeoArrow IPC stream (same values as _to_geojson)"""
+        return hexagons_to_arrow(
+            [hex_data['hex_id'] for hex_data in hexagons],
+            closed_rings([hex_data['boundary'] for hex_data in hexagons]),
+            {
+                'depth_ft': [hex_data['depth_ft'] for hex_data in hexagons],
+                'depth_m': [hex_data['depth_m'] for hex_data in hexagons]
+            },
+            self._collection_properties(feet)
+        )
+
+    def _collection_properties(self, feet):
+        """Collection-level properties shared by every output format"""
         return {
-            'type': 'FeatureCollection',
-            'features': features,
-            'properties': {
-                'source': 'NOAA Sea Level Rise Viewer',
-                'sea_level_feet': feet,
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            }
+            'source': 'NOAA Sea Level Rise Viewer',
+            'sea_level_feet': feet,
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
         }
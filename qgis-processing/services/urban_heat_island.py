@@ -4,18 +4,89 @@ Urban Heat Island Service
 Provides simulated urban heat island intensity data using H3 hexagons.
 """
 
-import h3
+# Integer H3 API: cells are 64-bit ints internally, strings only in output
+from h3.api import basic_int as h3
 import numpy as np
 from datetime import datetime
 import logging
+import math
+
+from h3_utils import cell_boundaries, cell_centers, cells_for_bounds, closed_rings, hexagons_to_arrow
 
 logger = logging.getLogger(__name__)
 
+# Intensity class upper bounds (°C) and their labels; intensities are binned
+# with np.digitize, so a value equal to a bound falls in the next class
+HEAT_ISLAND_BREAKS = np.array([0.5, 1.5, 3.0, 4.5])
+HEAT_ISLAND_LEVELS = np.array(['none', 'low', 'moderate', 'high', 'extreme'])
+
+# Urban heat island intensity (hottest at center, cooler at edges)
+# Maximum intensity ~4.5°C at urban core, exponential decay outside it
+MAX_INTENSITY = 4.5
+URBAN_CORE_RADIUS = 0.15  # degrees
+DECAY_LENGTH = 0.1  # degrees
+
+# Beyond this distance the decay term is below 0.005°C, half the output
+# precision, so it is skipped; the ±0.8°C location noise still applies
+FAR_FIELD_RADIUS = URBAN_CORE_RADIUS + DECAY_LENGTH * math.log(MAX_INTENSITY * 0.3 / 0.005)
+
+# Optional JIT for the per-hexagon intensity kernel
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+def _intensity_numpy(lats, lons, center_lat, center_lon):
+    """NumPy fallback for _intensity_kernel"""
+    # Calculate distance from center (urban core)
+    dist_from_center = np.hypot(lats - center_lat, lons - center_lon)
+
+    # Within urban core - high intensity; outside - exponential decay,
+    # evaluated only out to FAR_FIELD_RADIUS (zero beyond)
+    intensity = np.zeros_like(dist_from_center)
+    core = dist_from_center < URBAN_CORE_RADIUS
+    near = ~core & (dist_from_center < FAR_FIELD_RADIUS)
+    intensity[core] = MAX_INTENSITY * (1 - (dist_from_center[core] / URBAN_CORE_RADIUS) ** 0.7)
+    intensity[near] = MAX_INTENSITY * 0.3 * np.exp(-(dist_from_center[near] - URBAN_CORE_RADIUS) / DECAY_LENGTH)
+
+    # Add spatial variation (simulating buildings, parks, water)
+    # Use deterministic noise based on location
+    seed = np.sin((lats * 23.14 + lons * 37.19) * 0.0174533) * 43758.5453
+    noise = (seed - np.floor(seed)) * 2 - 1  # -1 to 1
+    intensity += noise * 0.8
+
+    # Clamp to reasonable range (0-6°C)
+    np.clip(intensity, 0, 6.0, out=intensity)
+    return intensity
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _intensity_kernel(lats, lons, center_lat, center_lon):
+        """Per-hexagon heat island intensity (°C) for arrays of hex centers"""
+        intensity = np.empty(lats.shape[0])
+        for i in prange(lats.shape[0]):
+            dist = math.hypot(lats[i] - center_lat, lons[i] - center_lon)
+            if dist < URBAN_CORE_RADIUS:
+                value = MAX_INTENSITY * (1 - (dist / URBAN_CORE_RADIUS) ** 0.7)
+            elif dist < FAR_FIELD_RADIUS:
+                value = MAX_INTENSITY * 0.3 * math.exp(-(dist - URBAN_CORE_RADIUS) / DECAY_LENGTH)
+            else:
+                value = 0.0
+
+            seed = math.sin((lats[i] * 23.14 + lons[i] * 37.19) * 0.0174533) * 43758.5453
+            value += ((seed - math.floor(seed)) * 2 - 1) * 0.8
+            intensity[i] = min(max(value, 0.0), 6.0)
+        return intensity
+else:
+    _intensity_kernel = _intensity_numpy
+
 
 class UrbanHeatIslandService:
     """Service for generating urban heat island data"""
 
-    def get_heat_island_data(self, bounds, date=None, resolution=8):
+    def get_heat_island_data(self, bounds, date=None, resolution=8, output_format='geojson'):
         """
         Generate urban heat island H3 hexagon data
 
@@ -23,6 +94,8 @@ class UrbanHeatIslandService:
             bounds: Dict with 'north', 'south', 'east', 'west' keys
             date: ISO date string (YYYY-MM-DD), optional
             resolution: H3 resolution level (0-15), default 8
+            output_format: 'geojson' (default), 'arrow' for GeoArrow IPC bytes or
+                'ndjson' for an iterator of GeoJSON Features
 
         Returns:
             GeoJSON FeatureCollection with hexagon features
@@ -32,102 +105,64 @@ class UrbanHeatIslandService:
         logger.info(f"Generating urban heat island data: resolution {resolution}")
 
         # Get hexagons covering the bounds
-        hex_ids = self._get_hexagons_in_bounds(bounds, resolution)
+        hex_ids = cells_for_bounds(bounds, resolution)
 
         # Calculate center point (urban core)
         center_lat = (bounds['north'] + bounds['south']) / 2
         center_lon = (bounds['east'] + bounds['west']) / 2
 
-        hexagons = []
-        for hex_id in hex_ids:
-            # Get hexagon center
-            lat, lon = h3.cell_to_latlng(hex_id)
+        # Hexagon centers as (N,) arrays; the intensity model below runs once
+        # over all of them instead of scalar ufunc calls per hexagon
+        centers = cell_centers(hex_ids)
+        lats, lons = centers[:, 0], centers[:, 1]
 
-            # Get hexagon boundary
-            boundary = h3.cell_to_boundary(hex_id)
+        intensity = _intensity_kernel(
+            np.ascontiguousarray(lats), np.ascontiguousarray(lons), center_lat, center_lon
+        )
 
-            # Calculate distance from center (urban core)
-            dist_from_center = np.sqrt((lat - center_lat)**2 + (lon - center_lon)**2)
-
-            # Urban heat island intensity (hottest at center, cooler at edges)
-            # Maximum intensity ~4.5°C at urban core
-            max_intensity = 4.5
-            urban_core_radius = 0.15  # degrees
-
-            if dist_from_center < urban_core_radius:
-                # Within urban core - high intensity
-                intensity = max_intensity * (1 - (dist_from_center / urban_core_radius) ** 0.7)
-            else:
-                # Outside urban core - exponential decay
-                decay_factor = np.exp(-(dist_from_center - urban_core_radius) / 0.1)
-                intensity = max_intensity * 0.3 * decay_factor
+        levels = HEAT_ISLAND_LEVELS[np.digitize(intensity, HEAT_ISLAND_BREAKS)].tolist()
+        intensities = np.round(intensity, 2).tolist()
 
-            # Add spatial variation (simulating buildings, parks, water)
-            # Use deterministic noise based on location
-            seed = np.sin((lat * 23.14 + lon * 37.19) * 0.0174533) * 43758.5453
-            noise = (seed - np.floor(seed)) * 2 - 1  # -1 to 1
-            intensity += noise * 0.8
+        boundaries = cell_boundaries(hex_ids)
 
-            # Clamp to reasonable range (0-6°C)
-            intensity = max(0, min(6.0, intensity))
-
-            hexagons.append({
+        hexagons = [
+            {
                 'hex_id': hex_id,
                 'center': [lon, lat],
                 'boundary': boundary,
-                'intensity': round(intensity, 2),
-                'level': self._classify_level(intensity)
-            })
+                'intensity': value,
+                'level': level
+            }
+            for hex_id, (lat, lon), boundary, value, level
+            in zip(hex_ids, centers.tolist(), boundaries, intensities, levels)
+        ]
 
         logger.info(f"Generated {len(hexagons)} urban heat island hexagons")
 
-        # Convert to GeoJSON
+        # Convert to GeoJSON (or Arrow / streamed features)
+        if output_format == 'arrow':
+            return self._to_arrow(hexagons, date, resolution)
+        if output_format == 'ndjson':
+            return self._iter_features(hexagons, resolution)
         return self._to_geojson(hexagons, date, resolution)
 
-    def _get_hexagons_in_bounds(self, bounds, resolution):
-        """Get H3 hexagon IDs that cover the bounding box"""
-        # Build polygon in GeoJSON format (lon, lat order)
-        polygon = [
-            [bounds['west'], bounds['north']],
-            [bounds['east'], bounds['north']],
-            [bounds['east'], bounds['south']],
-            [bounds['west'], bounds['south']],
-            [bounds['west'], bounds['north']]
-        ]
-
-        polygon_geojson = {
-            'type': 'Polygon',
-            'coordinates': [polygon]
-        }
-
-        # Use h3 v4 API
-        hex_ids = h3.geo_to_cells(polygon_geojson, resolution)
-        return list(hex_ids)
-
-    def _classify_level(self, intensity):
-        """Classify heat island intensity level"""
-        if intensity < 0.5:
-            return 'none'
-        elif intensity < 1.5:
-            return 'low'
-        elif intensity < 3.0:
-            return 'moderate'
-        elif intensity < 4.5:
-            return 'high'
-        else:
-            return 'extreme'
-
     def _to_geojson(self, hexagons, date, resolution):
         """Convert hexagons to GeoJSON FeatureCollection"""
-        features = []
+        features = list(self._iter_features(hexagons, resolution))
+
+        return {
+            'type': 'FeatureCollection',
+            'features': features,
+            'metadata': self._collection_metadata(date, resolution, len(features))
+        }
 
-        for hex_data in hexagons:
-            # Convert boundary to proper GeoJSON coordinates format
-            # h3.cell_to_boundary returns list of (lat, lon) tuples
-            # GeoJSON needs [[lon, lat], ...] with first = last
-            coordinates = [[lon, lat] for lat, lon in hex_data['boundary']]
-            coordinates.append(coordinates[0])  # Close the polygon
+    def _iter_features(self, hexagons, resolution):
+        """Yield one GeoJSON Feature per hexagon, built on demand"""
+        # h3.cell_to_boundary returns list of (lat, lon) tuples
+        # GeoJSON needs [[lon, lat], ...] with first = last; done in one pass
+        rings = closed_rings([hex_data['boundary'] for hex_data in hexagons])
 
+        for hex_data, coordinates in zip(hexagons, rings):
             feature = {
                 'type': 'Feature',
                 'geometry': {
@@ -135,24 +170,33 @@ class UrbanHeatIslandService:
                     'coordinates': [coordinates]
                 },
                 'properties': {
-                    'hex_id': hex_data['hex_id'],
+                    'hex_id': h3.int_to_str(hex_data['hex_id']),
                     'heatIslandIntensity': hex_data['intensity'],
                     'level': hex_data['level'],
                     'center': hex_data['center'],
                     'resolution': resolution
                 }
             }
-
-            features.append(feature)
-
+            yield feature
+
+    def _to_arrow(self, hexagons, date, resolution):
+        """Convert hexagons to a GeoArrow IPC stream (same values as _to_geojson)"""
+        return hexagons_to_arrow(
+            [hex_data['hex_id'] for hex_data in hexagons],
+            closed_rings([hex_data['boundary'] for hex_data in hexagons]),
+            {
+                'heatIslandIntensity': [hex_data['intensity'] for hex_data in hexagons],
+                'level': [hex_data['level'] for hex_data in hexagons]
+            },
+            self._collection_metadata(date, resolution, len(hexagons))
+        )
+
+    def _collection_metadata(self, date, resolution, count):
+        """Collection-level metadata shared by every output format"""
         return {
-            'type': 'FeatureCollection',
-            'features': features,
-            'metadata': {
-                'date': date or datetime.now().isoformat().split('T')[0],
-                'resolution': resolution,
-                'count': len(features),
-                'source': 'Simulated Urban Heat Island',
-                'description': 'Urban heat island intensity showing temperature differences between urban and rural areas'
-            }
+            'date': date or datetime.now().isoformat().split('T')[0],
+            'resolution': resolution,
+            'count': count,
+            'source': 'Simulated Urban Heat Island',
+            'description': 'Urban heat island intensity showing temperature differences between urban and rural areas'
         }
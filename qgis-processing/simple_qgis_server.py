@@ -1,6 +1,16 @@
+"""
+Simple QGIS Server for Nassau County sample data
+
+Running this file directly starts Werkzeug's development server (set
+FLASK_DEBUG=1 for the debugger and reloader); production runs under
+gunicorn via wsgi.py (WSGI_APP=simple_qgis_server)
+"""
+
 import os
 import sys
 import json
+import gzip
+import hashlib
 import tempfile
 import uuid
 import requests
@@ -10,11 +20,16 @@ import traceback
 import threading
 import time
 import math
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from shapely.geometry import box, mapping, shape
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+from json_provider import NumpyJSONProvider, json_bytes
 
 # Initialize QGIS
 sys.path.append('/usr/share/qgis/python')
@@ -35,12 +50,107 @@ from processing.core.Processing import Processing
 Processing.initialize()
 
 app = Flask(__name__)
+app.json = NumpyJSONProvider(app)
 CORS(app)
 
-# Global thread pool for parallel processing
-executor = ThreadPoolExecutor(max_workers=4)
-analysis_progress = {}
-analysis_results = {}
+# Analysis bookkeeping expires after an hour and is capped in size
+ANALYSIS_TTL = 3600
+ANALYSIS_STORE_SIZE = 10000
+ANALYSIS_STORE_SHARDS = 16
+
+class ShardedTTLStore:
+    """Bounded, expiring key/value store split into independently locked shards"""
+
+    def __init__(self, maxsize=ANALYSIS_STORE_SIZE, ttl=ANALYSIS_TTL, shards=ANALYSIS_STORE_SHARDS):
+        assert shards & (shards - 1) == 0, "shards must be a power of two"
+        self.ttl = ttl
+        self._shard_size = max(1, maxsize // shards)
+        self._mask = shards - 1
+        self._shards = [(OrderedDict(), threading.Lock()) for _ in range(shards)]
+
+    def _shard(self, key):
+        return self._shards[hash(key) & self._mask]
+
+    def set(self, key, value):
+        table, lock = self._shard(key)
+        now = time.time()
+        with lock:
+            table[key] = (now + self.ttl, value)
+            table.move_to_end(key)
+
+            # Entries are ordered by write time, so expired ones sit at the front
+            while table and (len(table) > self._shard_size or next(iter(table.values()))[0] < now):
+                table.popitem(last=False)
+
+    def get(self, key):
+        table, lock = self._shard(key)
+        with lock:
+            entry = table.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del table[key]
+                return None
+            return entry[1]
+
+class RedisTTLStore:
+    """ShardedTTLStore interface backed by Redis, so every worker sees each entry"""
+
+    def __init__(self, client, prefix, ttl=ANALYSIS_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def set(self, key, value):
+        self.client.setex(self.prefix + key, self.ttl, json_bytes(value))
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+def _connect_redis():
+    """Redis client when REDIS_URL is configured and reachable, else None"""
+    redis_url = os.environ.get('REDIS_URL')
+    if not redis_url:
+        return None
+    try:
+        import redis
+        client = redis.Redis.from_url(redis_url, socket_keepalive=True)
+        client.ping()
+        return client
+    except Exception as e:
+        print(f"⚠️ Redis unavailable ({e}), keeping analyses in process memory")
+        return None
+
+# Concurrency comes from the WSGI server (gunicorn + gevent, see wsgi.py). A
+# status poll may reach any gunicorn worker, so analyses live in Redis when
+# REDIS_URL is set; without it the app must run as a single worker
+# (gunicorn.conf.py enforces this)
+redis_client = _connect_redis()
+if redis_client is not None:
+    analysis_progress = RedisTTLStore(redis_client, 'nassau:analysis:progress:')
+    analysis_results = RedisTTLStore(redis_client, 'nassau:analysis:result:')
+else:
+    analysis_progress = ShardedTTLStore()
+    analysis_results = ShardedTTLStore()
+
+# Sample layers are static, so clients and proxies may keep them for an hour
+DATA_CACHE_CONTROL = 'public, max-age=3600'
+
+# Geometry simplification per zoom bucket, as (max zoom, tolerance in degrees)
+# (roughly web-mercator zooms 8/12/16); without ?zoom= or above the last
+# bucket the full geometry is served
+SIMPLIFY_TOLERANCES = ((8, 0.01), (12, 0.001), (16, 0.0001))
+GZIP_LEVEL = 6
+
+def _zoom_bucket(zoom):
+    """Max zoom of the simplification bucket for zoom, or None for full detail"""
+    if zoom is None:
+        return None
+    for max_zoom, _ in SIMPLIFY_TOLERANCES:
+        if zoom <= max_zoom:
+            return max_zoom
+    return None
 
 class SimpleNassauDataProvider:
     """Simple data provider for Nassau County GIS data"""
@@ -48,6 +158,92 @@ class SimpleNassauDataProvider:
     def __init__(self):
         self.data_dir = Path('/data')
         self.data_dir.mkdir(exist_ok=True)
+
+        # The sample layers never change: parse and index them once
+        self.layers = {
+            'parcels': self.get_parcels_data(),
+            'stations': self.get_stations_data(),
+            'flood_zones': self.get_flood_zones_data()
+        }
+
+        # Bulk-loaded STRtree per layer; query indices map back into features
+        self.geometries = {
+            data_type: [shape(f['geometry']) for f in data['features']]
+            for data_type, data in self.layers.items()
+        }
+        self._indexes = {
+            data_type: STRtree(geometries)
+            for data_type, geometries in self.geometries.items()
+        }
+
+        # Every /nassau/get-data body, per layer and zoom bucket, serialized
+        # once as (plain, gzipped, etag) and served as-is
+        self.loaded_at = datetime.now(timezone.utc).replace(microsecond=0)
+        self._payloads = {}
+        for data_type, data in self.layers.items():
+            self._payloads[data_type, None] = self._encode_payload(data_type, data)
+            for max_zoom, tolerance in SIMPLIFY_TOLERANCES:
+                simplified = self._simplified_layer(data_type, tolerance)
+                self._payloads[data_type, max_zoom] = self._encode_payload(data_type, simplified)
+
+        # Flood zones are few and tested against every parcel, so prepare them once
+        self._prepared_flood = [prep(g) for g in self.geometries['flood_zones']]
+
+    def _simplified_layer(self, data_type, tolerance):
+        """Copy of a layer with every geometry simplified to tolerance"""
+        features = self.layers[data_type]['features']
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                dict(feature, geometry=mapping(geometry.simplify(tolerance, preserve_topology=True)))
+                for feature, geometry in zip(features, self.geometries[data_type])
+            ]
+        }
+
+    def _encode_payload(self, data_type, data):
+        """(plain, gzipped, etag) JSON bytes of the /nassau/get-data envelope"""
+        body = json_bytes({
+            "success": True,
+            "data": data,
+            "type": data_type,
+            "count": len(data['features'])
+        })
+        etag = hashlib.sha1(body).hexdigest()
+        return body, gzip.compress(body, compresslevel=GZIP_LEVEL), etag
+
+    def get_payload(self, data_type, zoom=None, compressed=False):
+        """Pre-serialized /nassau/get-data (body, etag), or (None, None)"""
+        payload = self._payloads.get((data_type, _zoom_bucket(zoom)))
+        if payload is None:
+            return None, None
+        if compressed:
+            # Each encoding is its own representation and needs its own tag
+            return payload[1], payload[2] + '-gzip'
+        return payload[0], payload[2]
+
+    def query_bbox(self, data_type, bbox):
+        """Features of a layer whose envelopes intersect (west, south, east, north)"""
+        features = self.layers[data_type]['features']
+        hits = self._indexes[data_type].query(box(*bbox))
+        return [features[int(i)] for i in sorted(hits)]
+
+    def count_flood_risk_parcels(self, bbox=None):
+        """Number of parcels (optionally within bbox) intersecting a flood zone"""
+        parcels = self.geometries['parcels']
+        if not bbox:
+            candidates = range(len(parcels))
+        else:
+            candidates = self._indexes['parcels'].query(box(*bbox))
+
+        # Envelope hits from the index, exact test on the prepared polygons
+        flood_index = self._indexes['flood_zones']
+        prepared = self._prepared_flood
+        count = 0
+        for i in candidates:
+            parcel = parcels[int(i)]
+            if any(prepared[int(j)].intersects(parcel) for j in flood_index.query(parcel)):
+                count += 1
+        return count
         
     def get_parcels_data(self):
         """Get Nassau County parcels data"""
@@ -158,25 +354,26 @@ def get_nassau_data():
     """Get Nassau County data by type"""
     try:
         data_type = request.args.get('type', 'parcels')
-        
-        if data_type == 'parcels':
-            data = data_provider.get_parcels_data()
-        elif data_type == 'stations':
-            data = data_provider.get_stations_data()
-        elif data_type == 'flood_zones':
-            data = data_provider.get_flood_zones_data()
-        else:
+        zoom = request.args.get('zoom', type=int)
+        compressed = request.accept_encodings['gzip'] > 0
+        body, etag = data_provider.get_payload(data_type, zoom, compressed)
+
+        if body is None:
             return jsonify({
                 "success": False,
                 "error": f"Unknown data type: {data_type}"
             }), 400
-        
-        return jsonify({
-            "success": True,
-            "data": data,
-            "type": data_type,
-            "count": len(data.get('features', []))
-        })
+
+        response = Response(body, mimetype='application/json')
+        response.headers['Cache-Control'] = DATA_CACHE_CONTROL
+        response.headers['Vary'] = 'Accept-Encoding'
+        if compressed:
+            response.headers['Content-Encoding'] = 'gzip'
+
+        # Repeat polls with a matching If-None-Match get an empty 304
+        response.set_etag(etag)
+        response.last_modified = data_provider.loaded_at
+        return response.make_conditional(request)
         
     except Exception as e:
         return jsonify({
@@ -187,51 +384,78 @@ def get_nassau_data():
 @app.route('/nassau/analyze', methods=['POST'])
 def analyze_nassau_data():
     """Analyze Nassau County data"""
+    analysis_id = None
     try:
         data = request.get_json()
         analysis_type = data.get('type', 'basic')
-        
-        # Simple analysis - just return summary stats
+        bbox = data.get('bbox')
+
+        analysis_id = str(uuid.uuid4())
+        analysis_progress.set(analysis_id, {"status": "running", "progress": 0})
+
+        # Summary counts come from the spatial indexes, optionally clipped to bbox
+        if bbox:
+            bbox = tuple(float(v) for v in bbox)
+            total_parcels = len(data_provider.query_bbox('parcels', bbox))
+            total_stations = len(data_provider.query_bbox('stations', bbox))
+        else:
+            total_parcels = len(data_provider.layers['parcels']['features'])
+            total_stations = len(data_provider.layers['stations']['features'])
+
         result = {
             "analysis_type": analysis_type,
             "timestamp": datetime.now().isoformat(),
             "summary": {
-                "total_parcels": 1000,
-                "total_stations": 15,
-                "flood_risk_areas": 5
+                "total_parcels": total_parcels,
+                "total_stations": total_stations,
+                "flood_risk_areas": data_provider.count_flood_risk_parcels(bbox)
             }
         }
+
+        analysis_results.set(analysis_id, result)
+        analysis_progress.set(analysis_id, {"status": "completed", "progress": 100})
         
         return jsonify({
             "success": True,
+            "analysis_id": analysis_id,
             "result": result
         })
         
     except Exception as e:
+        if analysis_id is not None:
+            analysis_progress.set(analysis_id, {"status": "failed", "progress": 0, "error": str(e)})
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+@app.route('/nassau/analyze/status/<analysis_id>', methods=['GET'])
+def get_analysis_status(analysis_id):
+    """Progress and result of an analysis run"""
+    progress = analysis_progress.get(analysis_id)
+    if progress is None:
+        return jsonify({
+            "success": False,
+            "error": f"Unknown analysis: {analysis_id}"
+        }), 404
+
+    return jsonify({
+        "success": True,
+        "analysis_id": analysis_id,
+        "progress": progress,
+        "result": analysis_results.get(analysis_id)
+    })
+
 if __name__ == '__main__':
     print("🚀 Starting Simple QGIS Server...")
     print("📍 Nassau County data endpoints available at /nassau/")
     print("🔍 Health check at /health")
     
     try:
-        app.run(host='0.0.0.0', port=5000, debug=True)
+        debug = os.environ.get('FLASK_DEBUG') == '1'
+        app.run(host='0.0.0.0', port=5000, debug=debug, threaded=not debug, processes=1)
     except Exception as e:
         print(f"❌ Error starting server: {e}")
     finally:
         # Cleanup QGIS
         qgs.exitQgis()
-
-
-
-
-
-
-
-
-
-
@@ -2,16 +2,43 @@
 """
 Urban Heat Island QGIS Server Integration
 Serves WMS/WFS for heat island analysis layers
+
+Running this file directly starts Werkzeug's development server (set
+FLASK_DEBUG=1 for the debugger and reloader); production runs under
+gunicorn via wsgi.py
 """
 
 import os
+import re
+import json
 import sys
+import math
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
 from pathlib import Path
+from urllib.parse import parse_qsl
 from flask import Flask, request, Response
 from flask_cors import CORS
-import subprocess
 import logging
 
+from json_provider import NumpyJSONProvider, json_bytes
+
+# Under gevent (wsgi.py / gunicorn -k gevent) QGIS rendering is a blocking C++
+# call the hub cannot preempt, so it runs on a native thread. QgsServer is not
+# reentrant, hence a single rendering thread shared by all greenlets.
+try:
+    from gevent import monkey as gevent_monkey
+    from gevent.threadpool import ThreadPool
+except ImportError:
+    gevent_monkey = None
+
 # QGIS Server setup
 sys.path.append('/usr/share/qgis/python')
 sys.path.append('/usr/share/qgis/python/plugins')
@@ -26,6 +53,7 @@ logging.basicConfig(
 )
 
 app = Flask(__name__)
+app.json = NumpyJSONProvider(app)
 CORS(app)
 
 # Initialize QGIS
@@ -39,6 +67,286 @@ server = QgsServer()
 # Project file path
 PROJECT_FILE = '/app/projects/urban_heat_island.qgs'
 
+# Pipeline outputs reported by /api/heat-island/status
+PROCESSED_DIR = Path('/app/data/processed')
+STATUS_FILES = {
+    'lst_available': PROCESSED_DIR / 'land_surface_temperature.tif',
+    'heat_islands_available': PROCESSED_DIR / 'heat_islands.shp',
+    'project_exists': Path(PROJECT_FILE)
+}
+
+# /qgis always serves PROJECT_FILE: any client MAP parameter is stripped from
+# the raw query bytes and ours is prepended
+_MAP_PARAM_RE = re.compile(rb'(?:^|[&?])[Mm][Aa][Pp]=[^&]*', re.ASCII)
+PROJECT_MAP_PARAM = b'MAP=' + PROJECT_FILE.encode('utf-8')
+
+# Rendered GetMap responses keyed on the normalized WMS query and the
+# modification times of the project and pipeline outputs, so a rewritten layer
+# (by this worker, another one or a scheduled run) changes every key. Entries
+# expire after TILE_CACHE_TTL seconds and the whole cache is dropped when a
+# pipeline job finishes
+TILE_CACHE_SIZE = 4096
+TILE_CACHE_TTL = 3600
+_tile_cache = OrderedDict()
+_tile_cache_lock = threading.Lock()
+
+# With REDIS_URL set, rendered tiles and the status report are also kept in
+# Redis so every gunicorn worker shares them and they survive restarts. Tile
+# keys include TILE_GENERATION_KEY, bumped when a pipeline job finishes, so no
+# worker's in-process cache can serve tiles rendered before it
+TILE_KEY_PREFIX = b'qgis:tile:'
+TILE_GENERATION_KEY = 'qgis:tile_generation'
+STATUS_KEY = 'qgis:status'
+STATUS_CACHE_TTL = 5
+
+# Serialized status report and its local expiry, refreshed at most every
+# STATUS_CACHE_TTL seconds instead of stat()ing the outputs on every poll
+_status_cache = [0.0, None]
+_status_lock = threading.Lock()
+
+def _connect_redis():
+    """Redis client when REDIS_URL is configured and reachable, else None"""
+    redis_url = os.environ.get('REDIS_URL')
+    if not redis_url:
+        return None
+    try:
+        import redis
+        pool = redis.BlockingConnectionPool.from_url(redis_url, max_connections=64, socket_keepalive=True)
+        client = redis.Redis(connection_pool=pool)
+        client.ping()
+        return client
+    except Exception as e:
+        logging.warning(f"⚠️ Redis unavailable ({e}), using in-process caches only")
+        return None
+
+redis_client = _connect_redis()
+
+# Static response bodies, serialized once
+CAPABILITIES = {
+    'wms': {
+        'url': 'http://localhost:8081/qgis?SERVICE=WMS&REQUEST=GetCapabilities',
+        'layers': [
+            {
+                'name': 'Land Surface Temperature',
+                'type': 'raster',
+                'description': 'Land surface temperature from Landsat thermal band',
+                'example_request': 'http://localhost:8081/qgis?SERVICE=WMS&REQUEST=GetMap&LAYERS=Land Surface Temperature&WIDTH=800&HEIGHT=600&FORMAT=image/png&BBOX=-73.75,40.60,-73.40,40.85&CRS=EPSG:4326&VERSION=1.3.0'
+            }
+        ]
+    },
+    'wfs': {
+        'url': 'http://localhost:8081/qgis?SERVICE=WFS&REQUEST=GetCapabilities',
+        'layers': [
+            {
+                'name': 'Heat Island Hotspots',
+                'type': 'vector',
+                'description': 'Detected urban heat island polygons',
+                'example_request': 'http://localhost:8081/qgis?SERVICE=WFS&REQUEST=GetFeature&TYPENAME=Heat Island Hotspots&OUTPUTFORMAT=GeoJSON'
+            }
+        ]
+    }
+}
+CAPABILITIES_BODY = json_bytes(CAPABILITIES)
+HEALTH_BODY = json_bytes({'status': 'healthy', 'service': 'Urban Heat Island QGIS Server'})
+
+# Heat island pipeline: script -> scripts whose outputs it reads. Stages whose
+# dependencies have all finished run concurrently; dependents of a failed
+# stage are skipped
+SCRIPTS_DIR = Path('/app/scripts')
+PIPELINE_DAG = {
+    '01_data_acquisition.py': (),
+    '02_lst_processing.py': ('01_data_acquisition.py',),
+    '03_spatial_analysis.py': ('02_lst_processing.py',),
+    '04_create_qgis_project.py': ('03_spatial_analysis.py',)
+}
+STAGE_TIMEOUT = 300
+
+# Stages run in warm worker processes that import each script module once and
+# initialize QGIS once (scripts/pipeline_worker.py). Spawned rather than forked
+# so workers never inherit this process's QGIS server state, and started on
+# first use rather than at import (wsgi.py patches gevent before importing us).
+# A worker whose stage times out is terminated and replaced
+sys.path.append(str(SCRIPTS_DIR))
+from pipeline_worker import StageWorker, StageError
+
+PIPELINE_WORKERS = 2
+_idle_workers = []
+_workers_lock = threading.Lock()
+_worker_slots = threading.BoundedSemaphore(PIPELINE_WORKERS)
+
+# Per-job tmpfs directory through which stage 02 hands its LST array to
+# stage 03 without a GeoTIFF decode; removed when the job ends
+HANDOFF_ROOT = Path('/dev/shm/heat_island')
+
+# Pipeline jobs by id, written by the job threads and read by /status, always
+# under _jobs_lock. Finished jobs are dropped JOB_TTL seconds after they end.
+# With Redis every record is mirrored to JOB_KEY_PREFIX + id so /status works
+# from any gunicorn worker; without it the app must run as a single worker
+# (gunicorn.conf.py enforces this)
+JOB_TTL = 3600
+JOB_KEY_PREFIX = 'qgis:job:'
+heat_island_jobs = {}
+_job_expiry = {}
+_jobs_lock = threading.Lock()
+
+# One pipeline at a time: the jobs share /app/data outputs. The running job's
+# id is held in _active_job, or with Redis in ACTIVE_JOB_KEY for all workers,
+# leased so a worker that dies mid-run cannot block new jobs forever
+ACTIVE_JOB_KEY = 'qgis:active_job'
+ACTIVE_JOB_LEASE = STAGE_TIMEOUT * len(PIPELINE_DAG) + 60
+_active_job = None
+
+# Deletes ACTIVE_JOB_KEY only while it still names the finishing job
+_RELEASE_ACTIVE_JOB = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+if gevent_monkey is not None and gevent_monkey.is_module_patched('socket'):
+    _render_pool = ThreadPool(1)
+
+    def handle_qgis_request(qgs_request, qgs_response):
+        """Run server.handleRequest off the event loop"""
+        _render_pool.apply(server.handleRequest, (qgs_request, qgs_response))
+else:
+    # Threaded dev server: serialize access to the non-reentrant QgsServer
+    _render_lock = threading.Lock()
+
+    def handle_qgis_request(qgs_request, qgs_response):
+        """Run server.handleRequest one request at a time"""
+        with _render_lock:
+            server.handleRequest(qgs_request, qgs_response)
+
+def _tile_generation():
+    """Current tile cache generation, or None if it cannot be read"""
+    stamps = []
+    for path in STATUS_FILES.values():
+        try:
+            stamps.append(str(path.stat().st_mtime_ns))
+        except OSError:
+            stamps.append('-')
+    generation = ','.join(stamps).encode('ascii')
+    if redis_client is None:
+        return generation
+
+    try:
+        return (redis_client.get(TILE_GENERATION_KEY) or b'0') + b':' + generation
+    except Exception as e:
+        logging.debug("Redis tile generation lookup failed: %s", e)
+        return None
+
+def _tile_key(query_string):
+    """Digest of a normalized GetMap query and the cache generation, or None if it is not cacheable"""
+    params = {k.upper(): v for k, v in parse_qsl(query_string, keep_blank_values=True)}
+    if params.get('REQUEST', '').upper() != 'GETMAP':
+        return None
+
+    # Snap BBOX to 1/8 pixel so equivalent spellings of a tile share an entry
+    try:
+        coords = [float(c) for c in params.get('BBOX', '').split(',')]
+        width = int(params.get('WIDTH', 0))
+    except ValueError:
+        return None
+    if len(coords) == 4 and width > 0 and coords[2] != coords[0]:
+        pixel = abs(coords[2] - coords[0]) / width
+        digits = max(0, math.ceil(-math.log10(pixel / 8)))
+        params['BBOX'] = ','.join(f'{c:.{digits}f}' for c in coords)
+
+    generation = _tile_generation()
+    if generation is None:
+        return None
+
+    canonical = '&'.join(f'{k}={v}' for k, v in sorted(params.items()))
+    return hashlib.blake2b(generation + b'\0' + canonical.encode('utf-8'), digest_size=16).digest()
+
+def _local_tile_get(key):
+    with _tile_cache_lock:
+        entry = _tile_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _tile_cache[key]
+            return None
+        _tile_cache.move_to_end(key)
+        return entry[1]
+
+def _local_tile_put(key, value):
+    with _tile_cache_lock:
+        _tile_cache[key] = (time.monotonic() + TILE_CACHE_TTL, value)
+        _tile_cache.move_to_end(key)
+        while len(_tile_cache) > TILE_CACHE_SIZE:
+            _tile_cache.popitem(last=False)
+
+def _tile_cache_get(key):
+    """Cached (body, headers, status) for key, if present and fresh"""
+    value = _local_tile_get(key)
+    if value is not None or redis_client is None:
+        return value
+
+    try:
+        entry = redis_client.hgetall(TILE_KEY_PREFIX + key)
+    except Exception as e:
+        logging.debug("Redis tile lookup failed: %s", e)
+        return None
+    if not entry:
+        return None
+
+    value = (entry[b'body'], json.loads(entry[b'headers']), int(entry[b'status']))
+    _local_tile_put(key, value)
+    return value
+
+def _tile_cache_put(key, value):
+    _local_tile_put(key, value)
+    if redis_client is None:
+        return
+
+    body, headers, status_code = value
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(TILE_KEY_PREFIX + key, mapping={
+            'body': body,
+            'headers': json_bytes(headers),
+            'status': status_code
+        })
+        pipe.expire(TILE_KEY_PREFIX + key, TILE_CACHE_TTL)
+        pipe.execute()
+    except Exception as e:
+        logging.debug("Redis tile store failed: %s", e)
+
+def _clear_tile_cache():
+    """Drop cached tiles and the status report, locally and in Redis"""
+    with _tile_cache_lock:
+        _tile_cache.clear()
+    with _status_lock:
+        _status_cache[:] = [0.0, None]
+    if redis_client is None:
+        return
+
+    # Other workers' in-process tiles are keyed on the old generation; the
+    # stored ones are deleted (SCAN in batches rather than KEYS, which blocks
+    # the server) instead of being left to expire
+    try:
+        redis_client.incr(TILE_GENERATION_KEY)
+        batch = [STATUS_KEY]
+        for tile_key in redis_client.scan_iter(match=TILE_KEY_PREFIX + b'*', count=500):
+            batch.append(tile_key)
+            if len(batch) >= 500:
+                redis_client.delete(*batch)
+                batch = []
+        if batch:
+            redis_client.delete(*batch)
+    except Exception as e:
+        logging.warning(f"⚠️ Redis cache invalidation failed: {str(e)}")
+
+def _qgis_response(body, headers, status_code):
+    """Flask response for a rendered QGIS Server result"""
+    response = Response(body, status=status_code)
+    for header_key, header_value in headers.items():
+        response.headers[header_key] = header_value
+    return response
+
 @app.route('/qgis', methods=['GET', 'POST'])
 def qgis_server():
     """
@@ -46,45 +354,50 @@ def qgis_server():
     """
     try:
         # Get query parameters
-        query_string = request.query_string.decode('utf-8')
+        query_string = request.query_string
 
         # Always use the project file
-        if 'MAP=' in query_string.upper():
-            # Remove existing MAP parameter and add ours
-            import re
-            query_string = re.sub(r'[&?]MAP=[^&]*', '', query_string, flags=re.IGNORECASE)
+        if b'map=' in query_string.lower():
+            query_string = _MAP_PARAM_RE.sub(b'', query_string).lstrip(b'&')
+
+        if query_string:
+            query_string = PROJECT_MAP_PARAM + b'&' + query_string
+        else:
+            query_string = PROJECT_MAP_PARAM
+        query_string = query_string.decode('utf-8')
 
-        # Ensure we have the MAP parameter
-        separator = '&' if query_string else ''
-        query_string = f'MAP={PROJECT_FILE}{separator}{query_string}'
+        # Per-tile logging is debug-only and formatted lazily
+        logging.debug("QGIS Request: %s", query_string)
 
-        logging.info(f"QGIS Request: {query_string}")
+        tile_key = _tile_key(query_string) if request.method == 'GET' else None
+        if tile_key is not None:
+            cached = _tile_cache_get(tile_key)
+            if cached is not None:
+                return _qgis_response(*cached)
 
         # Create QGIS server request
-        headers = {key: value for key, value in request.headers}
         qgs_request = QgsServerRequest(
             query_string,
             QgsServerRequest.GetMethod if request.method == 'GET' else QgsServerRequest.PostMethod,
-            headers
+            dict(request.headers.items())
         )
 
         # Create response buffer
         qgs_response = QgsBufferServerResponse()
 
         # Handle request
-        server.handleRequest(qgs_request, qgs_response)
+        handle_qgis_request(qgs_request, qgs_response)
 
         # Get response
         body = bytes(qgs_response.body())
         headers = qgs_response.headers()
         status_code = qgs_response.statusCode()
 
-        # Create Flask response
-        response = Response(body, status=status_code)
-        for header_key, header_value in headers.items():
-            response.headers[header_key] = header_value
+        # WMS service exceptions come back as 200 XML, so require an image
+        if tile_key is not None and status_code == 200 and headers.get('Content-Type', '').startswith('image/'):
+            _tile_cache_put(tile_key, (body, dict(headers), status_code))
 
-        return response
+        return _qgis_response(body, headers, status_code)
 
     except Exception as e:
         logging.error(f"Error handling QGIS request: {str(e)}")
@@ -95,96 +408,262 @@ def get_capabilities():
     """
     Return WMS/WFS capabilities information
     """
-    return {
-        'wms': {
-            'url': 'http://localhost:8081/qgis?SERVICE=WMS&REQUEST=GetCapabilities',
-            'layers': [
-                {
-                    'name': 'Land Surface Temperature',
-                    'type': 'raster',
-                    'description': 'Land surface temperature from Landsat thermal band',
-                    'example_request': 'http://localhost:8081/qgis?SERVICE=WMS&REQUEST=GetMap&LAYERS=Land Surface Temperature&WIDTH=800&HEIGHT=600&FORMAT=image/png&BBOX=-73.75,40.60,-73.40,40.85&CRS=EPSG:4326&VERSION=1.3.0'
-                }
-            ]
-        },
-        'wfs': {
-            'url': 'http://localhost:8081/qgis?SERVICE=WFS&REQUEST=GetCapabilities',
-            'layers': [
-                {
-                    'name': 'Heat Island Hotspots',
-                    'type': 'vector',
-                    'description': 'Detected urban heat island polygons',
-                    'example_request': 'http://localhost:8081/qgis?SERVICE=WFS&REQUEST=GetFeature&TYPENAME=Heat Island Hotspots&OUTPUTFORMAT=GeoJSON'
-                }
-            ]
-        }
-    }
+    return Response(CAPABILITIES_BODY, mimetype='application/json')
+
+def _run_stage(script, config):
+    """Run one pipeline stage on a warm worker and collect its result"""
+    path = str(SCRIPTS_DIR / script)
+    logging.info(f"Running {path}...")
+
+    with _worker_slots:
+        with _workers_lock:
+            worker = _idle_workers.pop() if _idle_workers else None
+        try:
+            if worker is None:
+                worker = StageWorker(multiprocessing.get_context('spawn'))
+            output = worker.run(Path(script).stem, config, STAGE_TIMEOUT)
+        except StageError as e:
+            error = str(e)
+        except Exception as e:
+            # Timed out or died: the worker may still be busy, so it is killed
+            # here before the job goes on (and removes its handoff directory)
+            if worker is not None:
+                worker.terminate()
+            worker = None
+            error = str(e) or type(e).__name__
+        else:
+            error = None
+        finally:
+            if worker is not None:
+                with _workers_lock:
+                    _idle_workers.append(worker)
+
+    if error is not None:
+        return {'script': path, 'success': False, 'output': None, 'error': error}
+    return {'script': path, 'success': True, 'output': output, 'error': None}
+
+def _store_job(job_id, body):
+    """Mirror a serialized job record to Redis, if configured"""
+    if redis_client is None:
+        return
+    try:
+        redis_client.setex(JOB_KEY_PREFIX + job_id, JOB_TTL, body)
+    except Exception as e:
+        logging.warning(f"⚠️ Redis job store failed: {str(e)}")
+
+def _update_job(job_id, result=None, **fields):
+    """Set job fields and/or append a stage result under _jobs_lock"""
+    with _jobs_lock:
+        job = heat_island_jobs[job_id]
+        job.update(fields)
+        if result is not None:
+            job['results'].append(result)
+        body = json_bytes(job)
+
+    # Only the job's own thread updates it, so mirrored writes stay in order
+    _store_job(job_id, body)
+
+def _claim_active_job(job_id):
+    """Make job_id the running job; returns the id of a job already running, if any"""
+    global _active_job
+    if redis_client is not None:
+        while True:
+            if redis_client.set(ACTIVE_JOB_KEY, job_id, nx=True, ex=ACTIVE_JOB_LEASE):
+                return None
+            active = redis_client.get(ACTIVE_JOB_KEY)
+            if active is not None:
+                return active.decode('utf-8')
+
+    with _jobs_lock:
+        if _active_job is not None:
+            return _active_job
+        _active_job = job_id
+        return None
+
+def _release_active_job(job_id):
+    """Let the next job run once job_id has finished"""
+    global _active_job
+    if redis_client is not None:
+        try:
+            redis_client.eval(_RELEASE_ACTIVE_JOB, 1, ACTIVE_JOB_KEY, job_id)
+        except Exception as e:
+            logging.warning(f"⚠️ Redis job release failed: {str(e)}")
+        return
+
+    with _jobs_lock:
+        if _active_job == job_id:
+            _active_job = None
+
+def _prune_jobs():
+    """Drop finished jobs past their expiry; call with _jobs_lock held"""
+    now = time.monotonic()
+    for job_id in [k for k, expires in _job_expiry.items() if expires < now]:
+        del _job_expiry[job_id]
+        heat_island_jobs.pop(job_id, None)
+
+def _run_pipeline(job_id):
+    """Execute PIPELINE_DAG for a job, recording per-stage results"""
+    _update_job(job_id, status='running')
+
+    # Missing scripts are dropped and count as satisfied dependencies
+    present = {s for s in PIPELINE_DAG if (SCRIPTS_DIR / s).exists()}
+    waiting = {s: tuple(d for d in PIPELINE_DAG[s] if d in present) for s in PIPELINE_DAG if s in present}
+    outcomes = {}
+    running = {}
+    handoff_dir = HANDOFF_ROOT / job_id
+    config = {'handoff_dir': str(handoff_dir)}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(len(waiting), 1)) as pool:
+            while waiting or running:
+                ready = [s for s, deps in waiting.items() if all(d in outcomes for d in deps)]
+                for script in ready:
+                    deps = waiting.pop(script)
+                    if all(outcomes[d] for d in deps):
+                        running[pool.submit(_run_stage, script, config)] = script
+                    else:
+                        outcomes[script] = False
+                        _update_job(job_id, result={'script': str(SCRIPTS_DIR / script), 'success': False,
+                                                    'output': None, 'error': 'Skipped: an upstream stage failed'})
+
+                if not running:
+                    if not ready:
+                        break
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    script = running.pop(future)
+                    result = future.result()
+                    outcomes[script] = result['success']
+                    _update_job(job_id, result=result)
+
+        _update_job(job_id, success=all(outcomes.values()), status='completed')
+        logging.info(f"✅ Heat island job {job_id} completed")
+
+    except Exception as e:
+        logging.error(f"Processing failed: {str(e)}")
+        _update_job(job_id, error=str(e), status='failed')
+
+    finally:
+        shutil.rmtree(handoff_dir, ignore_errors=True)
+        _update_job(job_id, finished=datetime.now().isoformat())
+        with _jobs_lock:
+            _job_expiry[job_id] = time.monotonic() + JOB_TTL
+        _clear_tile_cache()
+        _release_active_job(job_id)
 
 @app.route('/api/heat-island/process', methods=['POST'])
 def process_heat_island():
     """
     Trigger heat island processing pipeline
+    Returns a job id immediately; poll /api/heat-island/status?job=<id>.
+    While a job is running, returns 409 with that job's id instead
     """
     try:
-        logging.info("Starting heat island processing pipeline...")
+        job_id = str(uuid.uuid4())
+        active = _claim_active_job(job_id)
+        if active is not None:
+            return {
+                'error': 'A heat island job is already running',
+                'job_id': active,
+                'status_url': f'/api/heat-island/status?job={active}'
+            }, 409
 
-        # Run processing scripts
-        scripts = [
-            '/app/scripts/01_data_acquisition.py',
-            '/app/scripts/02_lst_processing.py',
-            '/app/scripts/03_spatial_analysis.py',
-            '/app/scripts/04_create_qgis_project.py'
-        ]
+        logging.info("Starting heat island processing pipeline...")
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'started': datetime.now().isoformat(),
+            'finished': None,
+            'results': []
+        }
+        with _jobs_lock:
+            _prune_jobs()
+            heat_island_jobs[job_id] = job
+            body = json_bytes(job)
+        _store_job(job_id, body)
 
-        results = []
-        for script in scripts:
-            if Path(script).exists():
-                logging.info(f"Running {script}...")
-                result = subprocess.run(
-                    ['python3', script],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
-
-                results.append({
-                    'script': script,
-                    'success': result.returncode == 0,
-                    'output': result.stdout,
-                    'error': result.stderr if result.returncode != 0 else None
-                })
+        threading.Thread(target=_run_pipeline, args=(job_id,), daemon=True).start()
 
         return {
-            'status': 'completed',
-            'results': results
-        }
+            'status': 'queued',
+            'job_id': job_id,
+            'status_url': f'/api/heat-island/status?job={job_id}'
+        }, 202
 
     except Exception as e:
         logging.error(f"Processing failed: {str(e)}")
         return {"error": str(e)}, 500
 
+def _status_body():
+    """Serialized availability report, cached locally and in Redis"""
+    now = time.monotonic()
+    with _status_lock:
+        if _status_cache[0] > now:
+            return _status_cache[1]
+
+    body = None
+    if redis_client is not None:
+        try:
+            body = redis_client.get(STATUS_KEY)
+        except Exception:
+            body = None
+
+    if body is None:
+        report = {name: path.exists() for name, path in STATUS_FILES.items()}
+        report.update(project_file=PROJECT_FILE, server_status='running')
+        body = json_bytes(report)
+
+        # File availability rarely flips, so workers share the report for a few seconds
+        if redis_client is not None:
+            try:
+                redis_client.setex(STATUS_KEY, STATUS_CACHE_TTL, body)
+            except Exception as e:
+                logging.debug("Redis status store failed: %s", e)
+
+    with _status_lock:
+        _status_cache[:] = [now + STATUS_CACHE_TTL, body]
+    return body
+
+def _job_body(job_id):
+    """Serialized job record, from this worker or (with Redis) any worker"""
+    with _jobs_lock:
+        _prune_jobs()
+        job = heat_island_jobs.get(job_id)
+        if job is not None:
+            return json_bytes(job)
+    if redis_client is None:
+        return None
+
+    try:
+        return redis_client.get(JOB_KEY_PREFIX + job_id)
+    except Exception as e:
+        logging.debug("Redis job lookup failed: %s", e)
+        return None
+
 @app.route('/api/heat-island/status', methods=['GET'])
 def get_status():
     """
-    Get processing status and available data
+    Get processing status and available data, or a pipeline job's progress
     """
-    data_dir = Path('/app/data/processed')
-
-    return {
-        'lst_available': (data_dir / 'land_surface_temperature.tif').exists(),
-        'heat_islands_available': (data_dir / 'heat_islands.shp').exists(),
-        'project_file': PROJECT_FILE,
-        'project_exists': Path(PROJECT_FILE).exists(),
-        'server_status': 'running'
-    }
+    job_id = request.args.get('job')
+    if job_id:
+        body = _job_body(job_id)
+        if body is None:
+            return {"error": f"Unknown job: {job_id}"}, 404
+        return Response(body, mimetype='application/json')
+
+    return Response(_status_body(), mimetype='application/json')
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return {'status': 'healthy', 'service': 'Urban Heat Island QGIS Server'}
+    return Response(HEALTH_BODY, mimetype='application/json')
 
 if __name__ == '__main__':
     logging.info("🌡️ Starting Urban Heat Island QGIS Server on port 5000")
     logging.info(f"📁 Project file: {PROJECT_FILE}")
     logging.info("🗺️  WMS/WFS endpoints ready at /qgis")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    debug = os.environ.get('FLASK_DEBUG') == '1'
+    app.run(host='0.0.0.0', port=5000, debug=debug, threaded=not debug, processes=1)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for the QGIS Flask servers
+
+Production launch (gevent workers, one QGIS instance per worker):
+    REDIS_URL=redis://redis:6379/0 \
+    gunicorn -k gevent -w 4 --worker-connections 1000 -b 0.0.0.0:5000 wsgi:app
+
+Jobs and caches are shared between workers through Redis; without REDIS_URL
+gunicorn.conf.py runs a single worker.
+
+WSGI_APP selects the server module: urban_heat_server (default) or
+simple_qgis_server.
+"""
+
+# Patch the stdlib before anything imports socket/ssl/subprocess (requests,
+# flask, the QGIS bindings); gunicorn's gevent worker does the same, this
+# keeps other launchers consistent
+from gevent import monkey
+monkey.patch_all()
+
+import importlib
+import os
+
+WSGI_APP = os.environ.get('WSGI_APP', 'urban_heat_server')
+
+app = importlib.import_module(WSGI_APP).app